@@ -0,0 +1,203 @@
+"""Micro benchmarks for the paginator rendering and attribute access.
+
+Every benchmark reports the best time per call out of a number of repeats.
+Results can be stored as a baseline and later runs can be compared against
+it, benchmarks that got slower than the threshold are flagged as regressions
+and make the script exit with status 1.
+
+Usage:
+    python benchmarks/paginators.py
+    python benchmarks/paginators.py --save baseline.json
+    python benchmarks/paginators.py --compare baseline.json --threshold 0.1
+    python benchmarks/paginators.py --filter get_attr --repeat 10
+
+Baselines only compare well against runs on the same machine and Python
+version, so they are not part of the repository.
+"""
+
+import argparse
+import functools
+import json
+import os
+import platform
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.fixtures import (  # noqa: E402
+    InvoiceTable,
+    dict_item,
+    object_item,
+    record_item,
+)
+from uweb3plugins.core.paginators import helpers  # noqa: E402
+from uweb3plugins.core.paginators.html_elements import TablePagination  # noqa: E402
+from uweb3plugins.core.paginators.table import (  # noqa: E402
+    RenderCompleteTable,
+    RenderSimpleTable,
+)
+
+ROW_COUNTS = (10, 1000, 50000)
+PATH_DEPTHS = (1, 2, 3, 4)
+ITEM_FACTORIES = {"dict": dict_item, "object": object_item, "record": record_item}
+
+
+def nested_dict(depth):
+    item = "value"
+    for _level in range(depth):
+        item = {"child": item}
+    return item, ".".join(["child"] * depth)
+
+
+def render(component):
+    return component.render
+
+
+def table_benchmarks():
+    for count in ROW_COUNTS:
+        items = [dict_item(index) for index in range(count)]
+        simple = InvoiceTable(items, renderer=RenderSimpleTable())
+        complete = InvoiceTable(
+            items,
+            sort_by="ID",
+            sort_direction="ASC",
+            search_url="/invoices",
+            page=3,
+            total_pages=10,
+            query="invoice",
+            renderer=RenderCompleteTable(),
+        )
+        yield "table.render.simple.%d" % count, functools.partial(render, simple)
+        yield "table.render.complete.%d" % count, functools.partial(render, complete)
+
+
+def column_benchmarks():
+    for kind, factory in ITEM_FACTORIES.items():
+        item = factory(1)
+        for name, col in (("col", InvoiceTable.id), ("linkcol", InvoiceTable.client)):
+            yield "%s.cell.%s" % (name, kind), functools.partial(col.cell, item)
+            yield "%s.element.%s" % (name, kind), functools.partial(
+                lambda col, item: col.render(item).render, col, item
+            )
+
+
+def get_attr_benchmarks():
+    for depth in PATH_DEPTHS:
+        item, attr = nested_dict(depth)
+        yield "get_attr.depth%d" % depth, functools.partial(
+            helpers.get_attr, item, attr
+        )
+    for kind, factory in ITEM_FACTORIES.items():
+        yield "get_attr.nested.%s" % kind, functools.partial(
+            helpers.get_attr, factory(1), "client.name"
+        )
+
+
+def pagination_benchmarks():
+    for page, total_pages in ((1, 1), (50, 100)):
+        table = InvoiceTable(
+            [], sort_by="ID", page=page, total_pages=total_pages, query="invoice"
+        )
+        yield "pagination.page%d" % page, functools.partial(
+            lambda table: TablePagination(table).render, table
+        )
+
+
+BENCHMARKS = (
+    table_benchmarks,
+    column_benchmarks,
+    get_attr_benchmarks,
+    pagination_benchmarks,
+)
+
+
+def measure(func, repeat):
+    """Returns the best time per call in seconds."""
+    timer = timeit.Timer(func)
+    number, _elapsed = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def run(pattern, repeat):
+    results = {}
+    for group in BENCHMARKS:
+        for name, func in group():
+            if pattern and pattern not in name:
+                continue
+            results[name] = measure(func, repeat)
+            print("%-32s %12s" % (name, format_time(results[name])), flush=True)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Prints the change per benchmark, returns the names of the regressions."""
+    regressions = []
+    print()
+    print("%-32s %12s %12s %9s" % ("benchmark", "baseline", "current", "change"))
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            print("%-32s %12s %12s %9s" % (name, "-", format_time(current), "new"))
+            continue
+        change = current / previous - 1
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(
+            "%-32s %12s %12s %+8.1f%%%s"
+            % (name, format_time(previous), format_time(current), change * 100, flag)
+        )
+    return regressions
+
+
+def format_time(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return "%.2f %s" % (seconds / scale, unit)
+    return "%.0f ns" % (seconds / 1e-9)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--save", metavar="PATH", help="store the results as baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare with a baseline")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="relative slowdown that counts as regression (default: 0.1)",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="number of repeats (default: 5)"
+    )
+    parser.add_argument("--filter", help="only run benchmarks containing this text")
+    args = parser.parse_args()
+
+    results = run(args.filter, args.repeat)
+    if args.save:
+        with open(args.save, "w") as baseline_file:
+            json.dump(
+                {"python": platform.python_version(), "results": results},
+                baseline_file,
+                indent=2,
+                sort_keys=True,
+            )
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline.get("python") != platform.python_version():
+            print(
+                "Warning: the baseline was recorded with Python %s"
+                % baseline.get("python")
+            )
+        regressions = compare(results, baseline["results"], args.threshold)
+        if regressions:
+            print("\n%d regression(s): %s" % (len(regressions), ", ".join(regressions)))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
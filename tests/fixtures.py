@@ -0,0 +1,293 @@
+"""Stand-ins for records and the database side of the models.
+
+Shared by the tests and the benchmarks.
+"""
+
+import functools
+import threading
+
+import requests
+import uweb3
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from uweb3.libs.safestring import HTMLsafestring
+from uweb3plugins.core.models import keyset
+from uweb3plugins.core.models.api_model import ModelSession
+from uweb3plugins.core.paginators.columns import Col, LinkCol, batch_formatter
+from uweb3plugins.core.paginators.html_elements import Element
+from uweb3plugins.core.paginators.model.searchable_table import SearchableTableMixin
+from uweb3plugins.core.paginators.table import BasicTable
+
+
+class FakeRequest:
+    """Request data with only the getfirst method of IndexedFieldStorage."""
+
+    def __init__(self, **fields):
+        self.fields = fields
+
+    def getfirst(self, key, default=None):
+        return self.fields.get(key, default)
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def Execute(self, query):
+        self.connection.queries.append(query)
+        if self.connection.results:
+            return self.connection.results.pop(0)
+        return []
+
+    _Execute = Execute
+
+    # The string helpers of a sqltalk cursor that the models build queries with.
+    def _StringTable(self, table, escape):
+        if isinstance(table, str):
+            return escape(table)
+        return ", ".join(map(escape, table))
+
+    def _StringConditions(self, conditions, escape):
+        if not conditions:
+            return "1"
+        if isinstance(conditions, str):
+            return conditions
+        return " AND ".join(conditions)
+
+    def _StringOrder(self, order, escape):
+        if not order:
+            return ""
+        return "ORDER BY %s" % ", ".join(
+            "%s %s" % (escape(field), "DESC" if descending else "ASC")
+            for field, descending in keyset.normalize_order(order)
+        )
+
+    def _StringLimit(self, limit, offset):
+        if limit is None:
+            return ""
+        return "LIMIT %d OFFSET %d" % (limit, offset or 0)
+
+
+class FakeConnection:
+    """Connection that escapes like sqltalk, without a database behind it.
+
+    The queries executed on its cursor are recorded in queries, and answered
+    with the next result in results.
+    """
+
+    class OperationalError(Exception):
+        pass
+
+    def __init__(self, results=()):
+        self.queries = []
+        self.results = list(results)
+
+    def __enter__(self):
+        return FakeCursor(self)
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def EscapeField(self, field):
+        return ".".join("`%s`" % part.strip("`") for part in field.split("."))
+
+    def EscapeValues(self, value):
+        if value is None:
+            return "NULL"
+        if isinstance(value, bool):
+            return str(int(value))
+        if isinstance(value, (int, float)):
+            return str(value)
+        return "'%s'" % str(value).replace("\\", "\\\\").replace("'", "\\'")
+
+
+def _column(field):
+    return field.rsplit(".", 1)[-1].strip("`")
+
+
+def _compare(order, left, right):
+    for (_field, descending), first, second in zip(order, left, right):
+        if first != second:
+            result = -1 if first < second else 1
+            return -result if descending else result
+    return 0
+
+
+class FakeModel(dict, SearchableTableMixin):
+    """Model whose List sorts, seeks and limits the rows in ROWS in memory.
+
+    Every call of List is recorded in calls with its keyword arguments.
+    Conditions are recorded but not applied.
+    """
+
+    _PRIMARY_KEY = "ID"
+    ROWS = []
+
+    def __init__(self, connection, record):
+        super().__init__(record)
+        self.connection = connection
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.calls = []
+
+    @classmethod
+    def TableName(cls):
+        return "invoice"
+
+    @classmethod
+    def List(
+        cls,
+        connection,
+        conditions=None,
+        limit=None,
+        offset=None,
+        order=None,
+        yield_unlimited_total_first=False,
+        seek=None,
+        **kwargs,
+    ):
+        cls.calls.append(
+            dict(
+                kwargs,
+                conditions=conditions,
+                limit=limit,
+                offset=offset,
+                order=order,
+                yield_unlimited_total_first=yield_unlimited_total_first,
+                seek=seek,
+            )
+        )
+        order = [
+            (rule, False) if isinstance(rule, str) else tuple(rule)
+            for rule in order or ()
+        ]
+
+        def values(row):
+            return [row[_column(field)] for field, _descending in order]
+
+        rows = sorted(
+            cls.ROWS,
+            key=functools.cmp_to_key(
+                lambda left, right: _compare(order, values(left), values(right))
+            ),
+        )
+        if seek is not None:
+            rows = [row for row in rows if _compare(order, values(row), seek) > 0]
+        total = len(rows)
+        start = offset or 0
+        rows = rows[start : start + limit if limit is not None else None]
+        if yield_unlimited_total_first:
+            yield total
+        for row in rows:
+            yield cls(connection, row)
+
+
+class Item:
+    def __init__(self, **attrs):
+        self.__dict__.update(attrs)
+
+
+class Client(uweb3.model.Record):
+    """Foreign record, stored in the invoice as an already loaded record."""
+
+
+class Invoice(uweb3.model.Record):
+    """Record with a nested client record."""
+
+
+class InvoiceTable(BasicTable):
+    id = Col("ID", "ID", sortable=True)
+    title = LinkCol("Title", "title", href="/invoices/{ID}", sortable=True)
+    client = LinkCol("Client", "client.name", href="/clients/{client.ID}")
+    amount = Col("Amount", "amount", value_formatter="{:.2f}".format)
+    note = Col("Note", "note")
+
+
+@batch_formatter
+def doubled(values):
+    return [value * 2 for value in values]
+
+
+class BatchTable(BasicTable):
+    id = Col("ID", "ID")
+    amount = Col("Amount", "amount", value_formatter=doubled)
+
+
+NOTES = [0, "", None, False, "<b>escaped</b>", HTMLsafestring("<b>safe</b>")]
+
+
+def dict_item(index):
+    """Returns the values of an InvoiceTable row as nested dicts."""
+    return {
+        "ID": index,
+        "title": "Invoice <%d>" % index,
+        "amount": index * 1.5,
+        "client": {"ID": index % 3, "name": "Client & %d" % (index % 3)},
+        "note": NOTES[index % len(NOTES)],
+    }
+
+
+def object_item(index):
+    """Returns the values of dict_item as plain objects."""
+    values = dict_item(index)
+    values["client"] = Item(**values["client"])
+    return Item(**values)
+
+
+def record_item(index):
+    """Returns the values of dict_item as an Invoice with a Client record."""
+    values = dict_item(index)
+    values["client"] = Client(None, values["client"])
+    return Invoice(None, values)
+
+
+def element_body(table):
+    """Renders the table body through the Element tree, like it used to be."""
+    return Element(
+        "tbody",
+        children=[
+            Element("tr", children=[col.render(item) for col in table._get_columns()])
+            for item in table.items
+        ],
+    ).render
+
+
+class StubAdapter(BaseAdapter):
+    """Connection adapter that answers requests by calling handler(request).
+
+    The handler returns a (status, headers, body) tuple or raises.
+    """
+
+    def __init__(self, handler):
+        super().__init__()
+        self.handler = handler
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        with self._lock:
+            self.requests.append(request)
+        status, headers, body = self.handler(request)
+        response = requests.Response()
+        response.status_code = status
+        response.headers = CaseInsensitiveDict(headers)
+        response._content = body
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+    def close(self):
+        pass
+
+
+def stub_session(layers, handler):
+    adapter = StubAdapter(handler)
+    session = ModelSession(layers)
+    session.mount("http://", adapter)
+    return session, adapter
+
+
+def ok(body=b"ok", **headers):
+    return lambda request: (200, headers, body)
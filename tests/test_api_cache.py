@@ -0,0 +1,56 @@
+import unittest
+
+from uweb3plugins.core.models.api_cache import ResponseCache
+from tests.fixtures import ok, stub_session
+
+
+class ResponseCacheTest(unittest.TestCase):
+    def test_repeated_get_is_served_from_the_cache(self):
+        cache = ResponseCache()
+        session, adapter = stub_session([cache], ok())
+        session.get("http://api/items")
+        response = session.get("http://api/items")
+        self.assertEqual(response.content, b"ok")
+        self.assertTrue(response.from_cache)
+        self.assertEqual(len(adapter.requests), 1)
+        self.assertEqual(cache.stats["hits"], 1)
+
+    def test_other_methods_are_not_cached(self):
+        session, adapter = stub_session([ResponseCache()], ok())
+        session.post("http://api/items")
+        session.post("http://api/items")
+        self.assertEqual(len(adapter.requests), 2)
+
+    def test_vary_headers_are_part_of_the_key(self):
+        session, adapter = stub_session([ResponseCache()], ok())
+        session.get("http://api/items", headers={"Authorization": "one"})
+        session.get("http://api/items", headers={"Authorization": "two"})
+        session.get("http://api/items", headers={"Authorization": "one"})
+        self.assertEqual(len(adapter.requests), 2)
+
+    def test_no_store_is_not_cached(self):
+        session, adapter = stub_session(
+            [ResponseCache()], ok(**{"Cache-Control": "no-store"})
+        )
+        session.get("http://api/items")
+        session.get("http://api/items")
+        self.assertEqual(len(adapter.requests), 2)
+
+    def test_stale_response_is_revalidated(self):
+        def handler(request):
+            if request.headers.get("If-None-Match") == '"v1"':
+                return 304, {}, b""
+            return 200, {"ETag": '"v1"', "Cache-Control": "max-age=0"}, b"body"
+
+        cache = ResponseCache()
+        session, adapter = stub_session([cache], handler)
+        session.get("http://api/items")
+        response = session.get("http://api/items")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b"body")
+        self.assertEqual(len(adapter.requests), 2)
+        self.assertEqual(cache.stats["revalidated"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
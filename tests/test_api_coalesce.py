@@ -0,0 +1,74 @@
+import threading
+import time
+import unittest
+
+import requests
+from uweb3plugins.core.models.api_coalesce import RequestCoalescer
+from tests.fixtures import ok, stub_session
+
+
+class RequestCoalescerTest(unittest.TestCase):
+    def send_concurrently(self, session, count):
+        results = [None] * count
+
+        def get(index):
+            try:
+                results[index] = session.get("http://api/items")
+            except Exception as error:
+                results[index] = error
+
+        threads = [threading.Thread(target=get, args=(i,)) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        return threads, results
+
+    def wait_for_followers(self, coalescer, count):
+        deadline = time.monotonic() + 5
+        while coalescer.stats["shared"] < count and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def test_identical_requests_share_one_call(self):
+        release = threading.Event()
+
+        def handler(request):
+            release.wait(5)
+            return 200, {}, b"shared"
+
+        coalescer = RequestCoalescer()
+        session, adapter = stub_session([coalescer], handler)
+        threads, results = self.send_concurrently(session, 4)
+        self.wait_for_followers(coalescer, 3)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([result.content for result in results], [b"shared"] * 4)
+        self.assertEqual(len(adapter.requests), 1)
+        self.assertEqual(coalescer.stats, {"sent": 1, "shared": 3, "in_flight": 0})
+
+    def test_followers_receive_the_error(self):
+        release = threading.Event()
+
+        def handler(request):
+            release.wait(5)
+            raise requests.exceptions.ConnectionError("down")
+
+        coalescer = RequestCoalescer()
+        session, adapter = stub_session([coalescer], handler)
+        threads, results = self.send_concurrently(session, 3)
+        self.wait_for_followers(coalescer, 2)
+        release.set()
+        for thread in threads:
+            thread.join()
+        for result in results:
+            self.assertIsInstance(result, requests.exceptions.ConnectionError)
+        self.assertEqual(len(adapter.requests), 1)
+
+    def test_different_requests_are_sent_separately(self):
+        session, adapter = stub_session([RequestCoalescer()], ok())
+        session.get("http://api/items/1")
+        session.get("http://api/items/2")
+        self.assertEqual(len(adapter.requests), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
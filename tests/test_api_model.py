@@ -0,0 +1,193 @@
+import asyncio
+import http.server
+import threading
+import time
+import unittest
+import urllib.parse
+from unittest import mock
+
+import requests
+from uweb3plugins.core.models import api_model
+from uweb3plugins.core.models.api_model import ModelSessionMixin
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    """Answers with the requested path after sleeping `delay` seconds."""
+
+    lock = threading.Lock()
+    active = 0
+    max_active = 0
+
+    def do_GET(self):
+        query = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+        with self.lock:
+            type(self).active += 1
+            type(self).max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(float(query.get("delay", [0])[0]))
+        finally:
+            with self.lock:
+                type(self).active -= 1
+        body = self.path.encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class LocalModel(ModelSessionMixin):
+    ASYNC_CONCURRENCY = 2
+
+
+class LocalServerTestCase(unittest.TestCase):
+    """Runs a Handler server on a free local port for the tests of the class."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.url = "http://127.0.0.1:%d" % cls.server.server_address[1]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+
+class AsyncRequestTest(LocalServerTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        LocalModel.async_request.close()
+
+    def setUp(self):
+        Handler.max_active = 0
+
+    def test_get(self):
+        response = asyncio.run(LocalModel.async_request.get(self.url + "/item/1"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.text, "/item/1")
+
+    def test_gather_keeps_the_order_of_the_calls(self):
+        responses = asyncio.run(
+            LocalModel.async_request.gather(
+                ("GET", self.url + "/slow", {"params": {"delay": 0.2}}),
+                ("GET", self.url + "/fast"),
+            )
+        )
+        self.assertEqual(
+            [response.text for response in responses], ["/slow?delay=0.2", "/fast"]
+        )
+
+    def test_gather_returns_exceptions(self):
+        responses = asyncio.run(
+            LocalModel.async_request.gather(
+                ("GET", self.url + "/ok"),
+                ("GET", "http://127.0.0.1:1/refused"),
+                return_exceptions=True,
+            )
+        )
+        self.assertEqual(responses[0].text, "/ok")
+        self.assertIsInstance(responses[1], requests.exceptions.ConnectionError)
+
+    def test_concurrency_is_bounded(self):
+        asyncio.run(
+            LocalModel.async_request.gather(
+                *[
+                    ("GET", self.url + "/slow/%d" % index, {"params": {"delay": 0.1}})
+                    for index in range(6)
+                ]
+            )
+        )
+        self.assertEqual(Handler.max_active, LocalModel.ASYNC_CONCURRENCY)
+
+
+class SessionTest(unittest.TestCase):
+    def test_session_is_reused(self):
+        class Model(ModelSessionMixin):
+            pass
+
+        self.assertIs(Model.request, Model.request)
+
+    def test_subclass_gets_its_own_session(self):
+        class Model(ModelSessionMixin):
+            REQUEST_TIMEOUT = 3
+
+        class SlowModel(Model):
+            REQUEST_TIMEOUT = 30
+
+        session = Model.request
+        self.assertIsNot(SlowModel.request, session)
+        self.assertIs(Model.request, session)
+        self.assertEqual(session.request.keywords["timeout"], 3)
+        self.assertEqual(SlowModel.request.request.keywords["timeout"], 30)
+
+    def test_changed_pid_recreates_the_session(self):
+        class Model(ModelSessionMixin):
+            pass
+
+        session = Model.request
+        with mock.patch.object(api_model.os, "getpid", return_value=-1):
+            forked = Model.request
+            self.assertIsNot(forked, session)
+            self.assertIs(Model.request, forked)
+        self.assertIsNot(Model.request, forked)
+
+    def test_keep_alive(self):
+        class Model(ModelSessionMixin):
+            KEEP_ALIVE = False
+
+        self.assertEqual(Model.request.headers["Connection"], "close")
+
+
+class PoolStatsTest(LocalServerTestCase):
+    def test_connections_are_reused(self):
+        class Model(ModelSessionMixin):
+            pass
+
+        for index in range(3):
+            Model.request.get(self.url + "/item/%d" % index).close()
+        self.assertEqual(Model.pool_stats["opened"], 1)
+        self.assertEqual(Model.pool_stats["discarded"], 0)
+
+    def test_full_pool_discards_connections(self):
+        class Model(ModelSessionMixin):
+            POOL_MAXSIZE = 1
+
+        def get(index):
+            Model.request.get(self.url + "/slow/%d" % index, params={"delay": 0.1})
+
+        threads = [threading.Thread(target=get, args=(index,)) for index in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = Model.pool_stats
+        self.assertEqual(stats["opened"], 3)
+        self.assertEqual(stats["discarded"], 2)
+
+    def test_blocking_pool_waits(self):
+        class Model(ModelSessionMixin):
+            POOL_MAXSIZE = 1
+            POOL_BLOCK = True
+
+        def get(index):
+            Model.request.get(self.url + "/slow/%d" % index, params={"delay": 0.1})
+
+        threads = [threading.Thread(target=get, args=(index,)) for index in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = Model.pool_stats
+        self.assertEqual(stats["opened"], 1)
+        self.assertEqual(stats["waits"], 1)
+        self.assertGreater(stats["wait_time"], 0.05)
+
+
+if __name__ == "__main__":
+    unittest.main()
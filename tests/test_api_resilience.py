@@ -0,0 +1,119 @@
+import threading
+import time
+import unittest
+
+import requests
+from uweb3plugins.core.models.api_resilience import (
+    CLOSED,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    HedgedRequests,
+)
+from tests.fixtures import ok, stub_session
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    def test_opens_after_failures_and_fails_fast(self):
+        breaker = CircuitBreaker(failure_rate=0.5, minimum_requests=4)
+        session, adapter = stub_session([breaker], lambda request: (503, {}, b""))
+        for _attempt in range(4):
+            session.get("http://api/items")
+        self.assertEqual(breaker.states, {"api": OPEN})
+        with self.assertRaises(CircuitOpenError):
+            session.get("http://api/items")
+        self.assertEqual(len(adapter.requests), 4)
+
+    def test_connection_errors_count_as_failures(self):
+        def handler(request):
+            raise requests.exceptions.ConnectionError("down")
+
+        breaker = CircuitBreaker(minimum_requests=2)
+        session, _adapter = stub_session([breaker], handler)
+        for _attempt in range(2):
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                session.get("http://api/items")
+        self.assertEqual(breaker.states, {"api": OPEN})
+
+    def test_successful_probe_closes_the_circuit(self):
+        status = [500]
+        breaker = CircuitBreaker(minimum_requests=2, reset_timeout=0)
+        session, _adapter = stub_session(
+            [breaker], lambda request: (status[0], {}, b"")
+        )
+        session.get("http://api/items")
+        session.get("http://api/items")
+        self.assertEqual(breaker.states, {"api": OPEN})
+        status[0] = 200
+        self.assertEqual(session.get("http://api/items").status_code, 200)
+        self.assertEqual(breaker.states, {"api": CLOSED})
+
+    def test_hosts_have_their_own_circuit(self):
+        breaker = CircuitBreaker(minimum_requests=1)
+        session, _adapter = stub_session(
+            [breaker],
+            lambda request: (500 if "down" in request.url else 200, {}, b""),
+        )
+        session.get("http://down/items")
+        self.assertEqual(session.get("http://up/items").status_code, 200)
+        self.assertEqual(breaker.states, {"down": OPEN, "up": CLOSED})
+
+
+class HedgedRequestsTest(unittest.TestCase):
+    def slow_first_attempt(self):
+        calls = []
+        lock = threading.Lock()
+
+        def handler(request):
+            with lock:
+                calls.append(request)
+                attempt = len(calls)
+            if attempt == 1:
+                time.sleep(0.5)
+            return 200, {}, b"attempt %d" % attempt
+
+        return handler
+
+    def test_slow_request_is_hedged(self):
+        hedged = HedgedRequests(delay=0.05)
+        session, adapter = stub_session([hedged], self.slow_first_attempt())
+        response = session.get("http://api/items")
+        self.assertEqual(response.content, b"attempt 2")
+        self.assertEqual(len(adapter.requests), 2)
+        self.assertEqual(hedged.stats, {"hedged": 1, "wins": 1})
+
+    def test_fast_request_is_not_hedged(self):
+        hedged = HedgedRequests(delay=1)
+        session, adapter = stub_session([hedged], ok())
+        self.assertEqual(session.get("http://api/items").content, b"ok")
+        self.assertEqual(len(adapter.requests), 1)
+        self.assertEqual(hedged.stats, {"hedged": 0, "wins": 0})
+
+    def test_no_hedging_without_latencies(self):
+        hedged = HedgedRequests(min_samples=5)
+        session, adapter = stub_session([hedged], self.slow_first_attempt())
+        self.assertEqual(session.get("http://api/items").content, b"attempt 1")
+        self.assertEqual(len(adapter.requests), 1)
+
+    def test_hedge_never_waits_for_a_worker(self):
+        hedged = HedgedRequests(delay=0.05, max_workers=1)
+        session, adapter = stub_session([hedged], self.slow_first_attempt())
+        self.assertEqual(session.get("http://api/items").content, b"attempt 1")
+        self.assertEqual(len(adapter.requests), 1)
+        self.assertEqual(hedged.stats["hedged"], 0)
+
+    def test_other_methods_are_not_hedged(self):
+        hedged = HedgedRequests(delay=0.05)
+        session, adapter = stub_session([hedged], self.slow_first_attempt())
+        self.assertEqual(session.post("http://api/items").content, b"attempt 1")
+        self.assertEqual(len(adapter.requests), 1)
+
+    def test_deadline(self):
+        self.assertEqual(HedgedRequests._deadline(2, 0.5), 9.5)
+        self.assertEqual(HedgedRequests._deadline((1, 2), 0.5), 12.5)
+        self.assertIsNone(HedgedRequests._deadline(None, 0.5))
+        self.assertIsNone(HedgedRequests._deadline((1, None), 0.5))
+
+
+if __name__ == "__main__":
+    unittest.main()
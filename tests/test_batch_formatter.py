@@ -0,0 +1,72 @@
+import unittest
+
+from uweb3plugins.core.paginators.columns import Col, batch_formatter
+from uweb3plugins.core.paginators.html_elements import TableBody
+from uweb3plugins.core.paginators.table import BasicTable, RenderCsvTable
+from tests.fixtures import BatchTable, dict_item, element_body
+
+
+class Labels:
+    """Batch formatter that records the values of every call."""
+
+    batch = True
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, values):
+        self.calls.append(list(values))
+        return ["label %s" % value for value in values]
+
+
+def table(formatter, items):
+    class LabelTable(BasicTable):
+        id = Col("ID", "ID")
+        label = Col("Label", "ID", value_formatter=formatter)
+
+    return LabelTable(items)
+
+
+class BatchFormatterTest(unittest.TestCase):
+    def test_same_markup_as_items(self):
+        table = BatchTable([dict_item(index) for index in range(5)])
+        self.assertEqual(TableBody(table).render, element_body(table))
+
+    def test_called_once_per_render(self):
+        labels = Labels()
+        body = TableBody(table(labels, [dict_item(index) for index in range(5)]))
+        self.assertIn("<td>label 4</td>", body.render)
+        self.assertEqual(labels.calls, [[0, 1, 2, 3, 4]])
+
+    def test_called_once_per_chunk(self):
+        labels = Labels()
+        items = [dict_item(index) for index in range(5)]
+        "".join(table(labels, items).stream(chunk_size=2))
+        self.assertEqual(labels.calls, [[0, 1], [2, 3], [4]])
+
+    def test_export(self):
+        labels = Labels()
+        csv_table = table(labels, [dict_item(index) for index in range(3)])
+        csv = RenderCsvTable().render(csv_table)
+        self.assertIn("1,label 1\r\n", csv)
+        self.assertEqual(labels.calls, [[0, 1, 2]])
+
+    def test_single_value(self):
+        labels = Labels()
+        self.assertEqual(
+            Col("ID", "ID", value_formatter=labels).value({"ID": 7}), "label 7"
+        )
+
+    def test_a_value_per_row(self):
+        @batch_formatter
+        def first_only(values):
+            return values[:1]
+
+        with self.assertRaises(ValueError):
+            TableBody(
+                table(first_only, [dict_item(index) for index in range(2)])
+            ).render
+
+
+if __name__ == "__main__":
+    unittest.main()
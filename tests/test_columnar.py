@@ -0,0 +1,55 @@
+import unittest
+
+from uweb3plugins.core.paginators.columnar import ColumnarData
+from uweb3plugins.core.paginators.columns import LinkCol
+from uweb3plugins.core.paginators.html_elements import TableBody
+from tests.fixtures import BatchTable, InvoiceTable, dict_item, element_body
+
+
+class ColumnarDataTest(unittest.TestCase):
+    def test_same_markup_as_items(self):
+        items = [dict_item(index) for index in range(9)]
+        data = ColumnarData(
+            {
+                "ID": [item["ID"] for item in items],
+                "title": [item["title"] for item in items],
+                "client.ID": [item["client"]["ID"] for item in items],
+                "client.name": [item["client"]["name"] for item in items],
+                "amount": [item["amount"] for item in items],
+                "note": [item["note"] for item in items],
+            }
+        )
+        self.assertEqual(
+            TableBody(InvoiceTable(data)).render, element_body(InvoiceTable(items))
+        )
+
+    def test_columns_must_have_the_same_length(self):
+        with self.assertRaises(ValueError):
+            ColumnarData({"ID": [1, 2], "title": ["one"]})
+
+    def test_slice_and_stream(self):
+        data = ColumnarData({"ID": list(range(10)), "amount": [1.0] * 10})
+        table = BatchTable(data)
+        self.assertEqual(len(data.slice(2, 5)), 3)
+        self.assertEqual("".join(table.stream(chunk_size=4)), table.render)
+
+    def test_link_urls_are_built_a_column_at_a_time(self):
+        class Columns(ColumnarData):
+            def __iter__(self):
+                raise AssertionError("Rows should not be iterated")
+
+        data = Columns({"title": ["a b", "c"], "ID": [1, 2]})
+        col = LinkCol("Title", "title", href="/invoices/{ID:03d}?title={title}")
+        urls = ["/invoices/001?title=a%20b", "/invoices/002?title=c"]
+        self.assertEqual(col._url.column(data), urls)
+        self.assertEqual(col.url({"ID": 1, "title": "a b"}), urls[0])
+        self.assertIn('href="/invoices/001?title=a%20b"', col.cells(data)[0])
+
+    def test_link_urls_without_placeholders(self):
+        col = LinkCol("Title", "title", href="/invoices")
+        data = ColumnarData({"title": ["a", "b"]})
+        self.assertEqual(col._url.column(data), ["/invoices", "/invoices"])
+
+
+if __name__ == "__main__":
+    unittest.main()
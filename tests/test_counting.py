@@ -0,0 +1,153 @@
+import unittest
+from unittest import mock
+
+import uweb3
+
+from uweb3plugins.core.models import counting
+from tests.fixtures import FakeConnection
+
+
+class Invoice:
+    @classmethod
+    def TableName(cls):
+        return "invoice"
+
+
+class VersionedInvoice(uweb3.model.VersionedRecord):
+    @classmethod
+    def TableName(cls):
+        return "invoice"
+
+
+def key(conditions=None, search=None, tables=None):
+    return counting.count_key(Invoice, conditions, search, tables)
+
+
+class CountKeyTest(unittest.TestCase):
+    def test_key(self):
+        self.assertEqual(key(), ("invoice", "None", None, "None"))
+        self.assertEqual(key([], " foo ", []), ("invoice", "None", "foo", "None"))
+        self.assertNotEqual(key("`ID` > 1"), key("`ID` > 2"))
+
+
+class CachedCountTest(unittest.TestCase):
+    def test_lookup_and_store(self):
+        strategy = counting.CachedCount()
+        self.assertIsNone(strategy.lookup(Invoice, None, key()))
+        strategy.store(Invoice, None, key(), 25)
+        self.assertEqual(strategy.lookup(Invoice, None, key()), 25)
+        self.assertIsNone(strategy.lookup(Invoice, None, key("`ID` > 1")))
+
+    def test_ttl(self):
+        strategy = counting.CachedCount(ttl=10)
+        with mock.patch.object(counting.time, "monotonic", return_value=100):
+            strategy.store(Invoice, None, key(), 25)
+        with mock.patch.object(counting.time, "monotonic", return_value=110):
+            self.assertEqual(strategy.lookup(Invoice, None, key()), 25)
+        with mock.patch.object(counting.time, "monotonic", return_value=110.5):
+            self.assertIsNone(strategy.lookup(Invoice, None, key()))
+        self.assertEqual(len(strategy._totals), 0)
+
+    def test_least_recently_used_is_evicted(self):
+        strategy = counting.CachedCount(maxsize=2)
+        strategy.store(Invoice, None, key("a"), 1)
+        strategy.store(Invoice, None, key("b"), 2)
+        strategy.lookup(Invoice, None, key("a"))
+        strategy.store(Invoice, None, key("c"), 3)
+        self.assertEqual(strategy.lookup(Invoice, None, key("a")), 1)
+        self.assertIsNone(strategy.lookup(Invoice, None, key("b")))
+        self.assertEqual(strategy.lookup(Invoice, None, key("c")), 3)
+
+    def test_clear(self):
+        strategy = counting.CachedCount()
+        strategy.store(Invoice, None, key(), 25)
+        strategy.clear()
+        self.assertIsNone(strategy.lookup(Invoice, None, key()))
+
+
+class EstimatedCountTest(unittest.TestCase):
+    def test_unfiltered_listing_is_estimated(self):
+        connection = FakeConnection(results=[[(1234,)]])
+        strategy = counting.EstimatedCount()
+        self.assertEqual(strategy.lookup(Invoice, connection, key()), 1234)
+        (query,) = connection.queries
+        self.assertIn("`information_schema`.`TABLES`", query)
+        self.assertIn("`TABLE_NAME` = 'invoice'", query)
+
+    def test_filtered_queries_use_the_fallback(self):
+        fallback = counting.CachedCount()
+        strategy = counting.EstimatedCount(fallback)
+        for filtered in (key("`ID` > 1"), key(search="foo"), key(tables=["client"])):
+            fallback.store(Invoice, None, filtered, 7)
+            connection = FakeConnection()
+            self.assertEqual(strategy.lookup(Invoice, connection, filtered), 7)
+            self.assertEqual(connection.queries, [])
+
+    def test_versioned_records_use_the_fallback(self):
+        connection = FakeConnection()
+        strategy = counting.EstimatedCount()
+        self.assertIsNone(
+            strategy.lookup(
+                VersionedInvoice,
+                connection,
+                counting.count_key(VersionedInvoice, None, None, None),
+            )
+        )
+        self.assertEqual(connection.queries, [])
+
+    def test_missing_estimate_uses_the_fallback(self):
+        for result in ([], [(None,)]):
+            strategy = counting.EstimatedCount()
+            connection = FakeConnection(results=[result])
+            self.assertIsNone(strategy.lookup(Invoice, connection, key()))
+
+    def test_store_goes_to_the_fallback(self):
+        fallback = counting.CachedCount()
+        counting.EstimatedCount(fallback).store(Invoice, None, key("a"), 3)
+        self.assertEqual(fallback.lookup(Invoice, None, key("a")), 3)
+
+
+class GetStrategyTest(unittest.TestCase):
+    def test_get_strategy(self):
+        self.assertIs(counting.get_strategy(True), counting.EXACT)
+        self.assertIsNone(counting.get_strategy(False))
+        self.assertIsNone(counting.get_strategy(None))
+        strategy = counting.CachedCount()
+        self.assertIs(counting.get_strategy(strategy), strategy)
+
+
+class TotalTest(unittest.TestCase):
+    def total(self, strategy, connection=None):
+        return counting.Total(Invoice, connection, strategy, None, None, None)
+
+    def test_not_requested(self):
+        total = self.total(False)
+        self.assertFalse(total)
+        self.assertIsNone(total.cache_hit)
+        self.assertFalse(total.found_rows(10))
+
+    def test_counted(self):
+        strategy = counting.CachedCount()
+        total = self.total(strategy)
+        self.assertTrue(total.counted)
+        self.assertIs(total.cache_hit, False)
+        self.assertTrue(total.found_rows(10))
+        self.assertFalse(total.found_rows(None))
+        self.assertEqual(total.resolve(25, 10), 25)
+        self.assertEqual(strategy.lookup(Invoice, None, key()), 25)
+
+    def test_unlimited_total_is_the_number_of_rows(self):
+        self.assertEqual(self.total(True).resolve(None, 10), 10)
+
+    def test_known_total(self):
+        strategy = counting.CachedCount()
+        strategy.store(Invoice, None, key(), 25)
+        total = self.total(strategy)
+        self.assertFalse(total.counted)
+        self.assertIs(total.cache_hit, True)
+        self.assertFalse(total.found_rows(10))
+        self.assertEqual(total.resolve(None, 10), 25)
+
+
+if __name__ == "__main__":
+    unittest.main()
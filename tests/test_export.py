@@ -0,0 +1,113 @@
+import datetime
+import json
+import unittest
+
+from uweb3plugins.core.paginators.columnar import ColumnarData
+from uweb3plugins.core.paginators.columns import Col, LinkCol
+from uweb3plugins.core.paginators.table import (
+    BasicTable,
+    RenderCsvTable,
+    RenderJsonLinesTable,
+)
+
+
+class InvoiceTable(BasicTable):
+    invoice_id = Col("ID", "ID")
+    title = LinkCol("Title", "title", href="/invoices/{ID}")
+    note = Col("Note", "note")
+
+
+ITEMS = [
+    {"ID": 1, "title": "First", "note": None},
+    {"ID": 2, "title": "Second, with comma", "note": "paid"},
+    {"ID": 3, "title": "Third", "note": ""},
+]
+
+
+def table(renderer, items=ITEMS):
+    return InvoiceTable(items, renderer=renderer)
+
+
+class RenderCsvTableTest(unittest.TestCase):
+    def test_render(self):
+        self.assertEqual(
+            table(RenderCsvTable()).render,
+            "ID,Title,Note\r\n"
+            "1,First,\r\n"
+            '2,"Second, with comma",paid\r\n'
+            "3,Third,\r\n",
+        )
+
+    def test_without_header(self):
+        csv = table(RenderCsvTable(header=False)).render
+        self.assertTrue(csv.startswith("1,First,\r\n"))
+
+    def test_header_of_empty_table(self):
+        self.assertEqual(table(RenderCsvTable(), []).render, "ID,Title,Note\r\n")
+
+    def test_dialect(self):
+        csv = table(RenderCsvTable(dialect="excel-tab")).render
+        self.assertTrue(csv.startswith("ID\tTitle\tNote\r\n"))
+
+    def test_stream_chunks(self):
+        chunks = list(table(RenderCsvTable()).stream(chunk_size=2))
+        self.assertEqual(
+            chunks,
+            [
+                'ID,Title,Note\r\n1,First,\r\n2,"Second, with comma",paid\r\n',
+                "3,Third,\r\n",
+            ],
+        )
+
+    def test_stream_reads_items_a_chunk_at_a_time(self):
+        read = []
+
+        def items():
+            for item in ITEMS:
+                read.append(item["ID"])
+                yield item
+
+        chunks = table(RenderCsvTable(), items()).stream(chunk_size=2)
+        next(chunks)
+        self.assertEqual(read, [1, 2])
+
+    def test_columnar_data(self):
+        data = ColumnarData(
+            {"ID": [1, 2], "title": ["First", "Second"], "note": [None, "paid"]}
+        )
+        self.assertEqual(
+            table(RenderCsvTable(), data).render,
+            "ID,Title,Note\r\n1,First,\r\n2,Second,paid\r\n",
+        )
+
+
+class RenderJsonLinesTableTest(unittest.TestCase):
+    def lines(self, output):
+        return [json.loads(line) for line in output.splitlines()]
+
+    def test_keys_are_the_column_attribute_names(self):
+        self.assertEqual(
+            self.lines(table(RenderJsonLinesTable()).render),
+            [
+                {"invoice_id": 1, "title": "First", "note": None},
+                {"invoice_id": 2, "title": "Second, with comma", "note": "paid"},
+                {"invoice_id": 3, "title": "Third", "note": ""},
+            ],
+        )
+
+    def test_default(self):
+        items = [{"ID": 1, "title": "First", "note": datetime.date(2024, 1, 2)}]
+        (line,) = self.lines(table(RenderJsonLinesTable(), items).render)
+        self.assertEqual(line["note"], "2024-01-02")
+
+    def test_stream_chunks(self):
+        chunks = list(table(RenderJsonLinesTable()).stream(chunk_size=2))
+        self.assertEqual(len(chunks), 2)
+        self.assertEqual([chunk.count("\n") for chunk in chunks], [2, 1])
+
+    def test_empty_table(self):
+        self.assertEqual(table(RenderJsonLinesTable(), []).render, "")
+
+
+if __name__ == "__main__":
+    unittest.main()
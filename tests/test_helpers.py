@@ -0,0 +1,105 @@
+import unittest
+
+import uweb3
+from uweb3plugins.core.paginators import helpers
+from uweb3plugins.core.paginators.columns import ConstantAttr
+
+
+class Invoice(uweb3.model.Record):
+    lookups = 0
+
+    def __getitem__(self, key):
+        type(self).lookups += 1
+        return super().__getitem__(key)
+
+    def total(self):
+        return self["amount"] * 2
+
+    @property
+    def label(self):
+        return "Invoice %d" % self["ID"]
+
+
+class Item:
+    def __init__(self, **attrs):
+        self.__dict__.update(attrs)
+
+
+class Row:
+    """Subscriptable item that is not a mapping."""
+
+    def __init__(self, values):
+        self.values = values
+
+    def __getitem__(self, key):
+        return self.values[key]
+
+
+class CompileAttrTest(unittest.TestCase):
+    def setUp(self):
+        Invoice.lookups = 0
+
+    def test_record_method_does_not_probe_the_record(self):
+        getter = helpers.compile_attr("total")
+        invoices = [Invoice(None, {"ID": index, "amount": index}) for index in range(5)]
+        self.assertEqual([getter(invoice) for invoice in invoices], [0, 2, 4, 6, 8])
+        # Only the lookups of "amount" inside total(), none for "total" itself.
+        self.assertEqual(Invoice.lookups, 5)
+
+    def test_record_property(self):
+        getter = helpers.compile_attr("label")
+        self.assertEqual(getter(Invoice(None, {"ID": 3})), "Invoice 3")
+        self.assertEqual(Invoice.lookups, 1)
+
+    def test_mapping_key_present_in_some_items(self):
+        getter = helpers.compile_attr("items")
+        self.assertEqual(getter({"items": 3}), 3)
+        # A dict without the key falls back to the dict method, like get_attr.
+        self.assertEqual(list(getter({"other": 1})), [("other", 1)])
+        self.assertEqual(getter({"items": 4}), 4)
+
+    def test_item_types(self):
+        getter = helpers.compile_attr("name")
+        self.assertEqual(getter({"name": "dict"}), "dict")
+        self.assertEqual(getter(Item(name="object")), "object")
+        self.assertEqual(getter(Row({"name": "row"})), "row")
+        self.assertEqual(getter(Invoice(None, {"name": "record"})), "record")
+
+    def test_subscriptable_falls_back_to_attribute(self):
+        row = Row({})
+        row.name = "attribute"
+        self.assertEqual(helpers.compile_attr("name")(row), "attribute")
+
+    def test_dotted_path(self):
+        getter = helpers.compile_attr("client.name")
+        self.assertEqual(getter({"client": Item(name="nested")}), "nested")
+        self.assertIsNone(getter({"client": None}))
+
+    def test_same_as_get_attr(self):
+        items = [{"a": {"b": 1}}, Item(a=Item(b=2)), Invoice(None, {"a": {"b": 3}})]
+        getter = helpers.compile_attr("a.b")
+        for item in items:
+            self.assertEqual(getter(item), helpers._recursive_getattr(item, "a.b"))
+
+    def test_constant_attr(self):
+        self.assertEqual(helpers.compile_attr(ConstantAttr("fixed"))({}), "fixed")
+
+    def test_missing_attr_raises(self):
+        with self.assertRaises(AttributeError):
+            helpers.compile_attr("missing")(Item())
+
+
+class CompileUrlTest(unittest.TestCase):
+    def test_placeholders_are_quoted(self):
+        url = helpers.compile_url("/clients/{client.ID}/{name}")
+        self.assertEqual(
+            url({"client": {"ID": 5}, "name": "a b&c"}), "/clients/5/a%20b%26c"
+        )
+
+    def test_positional_placeholders_are_rejected(self):
+        with self.assertRaises(ValueError):
+            helpers.compile_url("/clients/{}")
+
+
+if __name__ == "__main__":
+    unittest.main()
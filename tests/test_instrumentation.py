@@ -0,0 +1,136 @@
+import contextvars
+import threading
+import unittest
+
+from uweb3plugins.core.models import instrumentation
+
+
+class Invoice:
+    pass
+
+
+class ShapeTest(unittest.TestCase):
+    def test_literals(self):
+        self.assertEqual(
+            instrumentation.shape(
+                "SELECT * FROM `t1` WHERE `name` = 'O\\'Brien' AND `a` > -1.5"
+                ' AND `b` = "x"'
+            ),
+            "SELECT * FROM `t1` WHERE `name` = ? AND `a` > ? AND `b` = ?",
+        )
+
+    def test_value_lists_and_whitespace(self):
+        self.assertEqual(
+            instrumentation.shape("SELECT *\n  FROM t WHERE ID IN (1, 2,  3)"),
+            "SELECT * FROM t WHERE ID IN (...)",
+        )
+
+    def test_names_with_digits_are_kept(self):
+        self.assertEqual(
+            instrumentation.shape("SELECT t2.col1 FROM t2 LIMIT 10"),
+            "SELECT t2.col1 FROM t2 LIMIT ?",
+        )
+
+
+class CollectTest(unittest.TestCase):
+    def test_collect(self):
+        self.assertFalse(instrumentation.enabled())
+        with instrumentation.collect() as queries:
+            self.assertTrue(instrumentation.enabled())
+            instrumentation.record(Invoice, "List", "SELECT 1", 0.5, 3)
+        instrumentation.record(Invoice, "List", "SELECT 2", 0.5, 3)
+        (query,) = queries
+        self.assertEqual(
+            (query.model, query.method, query.rows), ("Invoice", "List", 3)
+        )
+        self.assertFalse(instrumentation.enabled())
+
+    def test_nested(self):
+        with instrumentation.collect() as outer:
+            instrumentation.record(Invoice, "List", "SELECT 1", 0, 0)
+            with instrumentation.collect() as inner:
+                instrumentation.record(Invoice, "List", "SELECT 2", 0, 0)
+        self.assertEqual([query.sql for query in outer], ["SELECT 1", "SELECT 2"])
+        self.assertEqual([query.sql for query in inner], ["SELECT 2"])
+
+    def test_contexts_are_isolated(self):
+        seen = []
+
+        def other_request():
+            with instrumentation.collect() as queries:
+                instrumentation.record(Invoice, "List", "SELECT 2", 0, 0)
+            seen.extend(query.sql for query in queries)
+
+        with instrumentation.collect() as queries:
+            instrumentation.record(Invoice, "List", "SELECT 1", 0, 0)
+            thread = threading.Thread(target=other_request)
+            thread.start()
+            thread.join()
+            contextvars.Context().run(other_request)
+        self.assertEqual([query.sql for query in queries], ["SELECT 1"])
+        self.assertEqual(seen, ["SELECT 2", "SELECT 2"])
+
+
+class QueryLogTest(unittest.TestCase):
+    def setUp(self):
+        with instrumentation.collect() as self.queries:
+            instrumentation.record(Invoice, "List", "SELECT * WHERE ID = 1", 0.25, 1)
+            instrumentation.record(Invoice, "List", "SELECT * WHERE ID = 2", 0.5, 1)
+            instrumentation.record(Invoice, "Count", None, 0.125, 0)
+
+    def test_summary(self):
+        self.assertEqual(
+            self.queries.summary(),
+            {
+                "SELECT * WHERE ID = ?": {"queries": 2, "time": 0.75, "rows": 2},
+                "Invoice.Count": {"queries": 1, "time": 0.125, "rows": 0},
+            },
+        )
+
+    def test_total_time_and_slowest(self):
+        self.assertEqual(self.queries.total_time, 0.875)
+        self.assertEqual(
+            [query.duration for query in self.queries.slowest(2)], [0.5, 0.25]
+        )
+
+
+class ListenerTest(unittest.TestCase):
+    def test_listener(self):
+        queries = []
+        instrumentation.add_listener(queries.append)
+        try:
+            self.assertTrue(instrumentation.enabled())
+            query = instrumentation.record(Invoice, "List", "SELECT 1", 0, 0)
+        finally:
+            instrumentation.remove_listener(queries.append)
+        self.assertEqual(queries, [query])
+        self.assertFalse(instrumentation.enabled())
+
+    def test_remove_unknown_listener(self):
+        instrumentation.remove_listener(print)
+
+
+class InstrumentStreamTest(unittest.TestCase):
+    def test_rows_are_reported_after_consumption(self):
+        with instrumentation.collect() as queries:
+            records = instrumentation.instrument_stream(
+                Invoice, "List", "SELECT 1", iter(range(3))
+            )
+            next(records)
+            self.assertEqual(len(queries), 0)
+            self.assertEqual(list(records), [1, 2])
+        (query,) = queries
+        self.assertEqual((query.sql, query.rows), ("SELECT 1", 3))
+
+    def test_closed_stream_reports_the_rows_read(self):
+        with instrumentation.collect() as queries:
+            records = instrumentation.instrument_stream(
+                Invoice, "List", "SELECT 1", iter(range(3))
+            )
+            next(records)
+            records.close()
+        self.assertEqual(queries.queries[0].rows, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,191 @@
+import base64
+import unittest
+
+from uweb3plugins.core.models import keyset
+from tests.fixtures import FakeConnection, FakeModel, FakeRequest
+
+
+class Invoice(FakeModel):
+    ROWS = [
+        {"ID": index, "amount": amount, "client": index % 2}
+        for index, amount in enumerate([5, 3, 5, 1, 3, 5, 2], start=1)
+    ]
+
+
+class OrderTest(unittest.TestCase):
+    def test_normalize_order(self):
+        self.assertEqual(keyset.normalize_order(None), [])
+        self.assertEqual(keyset.normalize_order("ID"), [("ID", False)])
+        self.assertEqual(
+            keyset.normalize_order(["date", ("ID", 1)]),
+            [("date", False), ("ID", True)],
+        )
+
+    def test_reverse_order(self):
+        self.assertEqual(
+            keyset.reverse_order([("date", True), "ID"]),
+            [("date", False), ("ID", True)],
+        )
+
+    def test_foreign_fields(self):
+        order = [
+            ("client.name", False),
+            ("invoice.ID", False),
+            ("`invoice`.`date`", True),
+            ("amount", False),
+        ]
+        self.assertEqual(keyset.foreign_fields(order, "invoice"), ["client.name"])
+
+
+class SeekConditionTest(unittest.TestCase):
+    def test_single_field(self):
+        self.assertEqual(
+            keyset.seek_condition(FakeConnection(), [("ID", False)], [7]),
+            "((`ID` > 7))",
+        )
+
+    def test_mixed_directions(self):
+        self.assertEqual(
+            keyset.seek_condition(
+                FakeConnection(),
+                [("date", True), ("invoice.ID", False)],
+                ["2024-01-01", 7],
+            ),
+            "((`date` < '2024-01-01') OR "
+            "(`date` = '2024-01-01' AND `invoice`.`ID` > 7))",
+        )
+
+    def test_values_are_escaped(self):
+        condition = keyset.seek_condition(FakeConnection(), ["name"], ["x' OR 1"])
+        self.assertEqual(condition, "((`name` > 'x\\' OR 1'))")
+
+    def test_a_value_per_field(self):
+        with self.assertRaises(ValueError):
+            keyset.seek_condition(FakeConnection(), ["date", "ID"], [1])
+
+
+class TokenTest(unittest.TestCase):
+    def test_round_trip(self):
+        values = ["text", 7, 1.5, True, None]
+        token = keyset.encode_token(values)
+        self.assertNotIn("=", token)
+        self.assertEqual(keyset.decode_token(token), values)
+
+    def test_non_json_values_become_strings(self):
+        class Date:
+            def __str__(self):
+                return "2024-01-01"
+
+        token = keyset.encode_token([Date()])
+        self.assertEqual(keyset.decode_token(token), ["2024-01-01"])
+
+    def test_invalid_tokens(self):
+        def encode(data):
+            return base64.urlsafe_b64encode(data).decode("ascii")
+
+        for token in (
+            None,
+            "",
+            "!!!",
+            encode(b"not json"),
+            encode(b"\xff\xfe"),
+            encode(b'{"ID": 1}'),
+            encode(b"7"),
+            encode(b"[[1, 2]]"),
+            encode(b'[{"a": 1}]'),
+        ):
+            self.assertIsNone(keyset.decode_token(token), token)
+
+
+class RecordValuesTest(unittest.TestCase):
+    def test_values_of_own_fields(self):
+        record = Invoice(None, {"ID": 3, "amount": 5})
+        self.assertEqual(
+            keyset.record_values(record, [("`invoice`.`amount`", True), "ID"]), [5, 3]
+        )
+
+    def test_joined_fields_are_rejected(self):
+        record = Invoice(None, {"ID": 3, "name": "client"})
+        with self.assertRaises(ValueError):
+            keyset.record_values(record, ["client.name"])
+
+
+class KeysetTableTest(unittest.TestCase):
+    def setUp(self):
+        Invoice.calls.clear()
+
+    def page(self, page_size=3, default_sort=None, **fields):
+        return Invoice.KeysetTable(
+            FakeConnection(),
+            FakeRequest(**fields),
+            page_size,
+            default_sort=default_sort,
+        )
+
+    def ids(self, results):
+        return [record["ID"] for record in results]
+
+    def test_first_page(self):
+        results, page = self.page()
+        self.assertEqual(self.ids(results), [1, 2, 3])
+        self.assertTrue(page.has_next)
+        self.assertFalse(page.has_previous)
+        self.assertEqual(Invoice.calls[0]["limit"], 4)
+        self.assertEqual(Invoice.calls[0]["order"], [("invoice.ID", False)])
+
+    def test_forward_and_backward(self):
+        _results, first = self.page()
+        results, second = self.page(after=first.next_token)
+        self.assertEqual(self.ids(results), [4, 5, 6])
+        self.assertTrue(second.has_previous)
+        results, last = self.page(after=second.next_token)
+        self.assertEqual(self.ids(results), [7])
+        self.assertFalse(last.has_next)
+
+        results, back = self.page(before=last.previous_token)
+        self.assertEqual(self.ids(results), [4, 5, 6])
+        self.assertEqual(back.next_token, second.next_token)
+        self.assertTrue(back.has_previous)
+        results, start = self.page(before=back.previous_token)
+        self.assertEqual(self.ids(results), [1, 2, 3])
+        self.assertFalse(start.has_previous)
+        self.assertTrue(start.has_next)
+
+    def test_ties_are_broken_on_the_primary_key(self):
+        default_sort = [("amount", True)]
+        seen = []
+        results, page = self.page(2, default_sort)
+        seen.extend(self.ids(results))
+        while page.has_next:
+            results, page = self.page(2, default_sort, after=page.next_token)
+            seen.extend(self.ids(results))
+        self.assertEqual(seen, [6, 3, 1, 5, 2, 7, 4])
+        self.assertEqual(Invoice.calls[0]["order"][-1], ("invoice.ID", True))
+
+    def test_invalid_token_starts_at_the_first_page(self):
+        results, page = self.page(after="garbage")
+        self.assertEqual(self.ids(results), [1, 2, 3])
+        self.assertIsNone(Invoice.calls[0]["seek"])
+
+    def test_token_of_another_order_is_ignored(self):
+        token = keyset.encode_token([5, 1])
+        results, page = self.page(after=token)
+        self.assertEqual(self.ids(results), [1, 2, 3])
+        self.assertFalse(page.has_previous)
+
+    def test_joined_sort_falls_back_to_default_sort(self):
+        results, _page = self.page(
+            default_sort=[("amount", False)], sort_by="client.name"
+        )
+        self.assertEqual(
+            Invoice.calls[0]["order"], [("amount", False), ("invoice.ID", False)]
+        )
+        self.assertEqual(self.ids(results), [4, 7, 2])
+
+    def test_joined_default_sort_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.page(default_sort=[("client.name", False)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import unittest
+from unittest import mock
+
+from uweb3plugins.core.paginators import html_elements
+from uweb3plugins.core.paginators.columns import Col
+from uweb3plugins.core.paginators.html_elements import TablePagination
+from uweb3plugins.core.paginators.model.page_cache import PageCache
+from uweb3plugins.core.paginators.table import BasicTable
+from tests.fixtures import FakeConnection, FakeModel, FakeRequest
+
+
+class Invoice(FakeModel):
+    ROWS = [{"ID": index, "title": "Invoice %d" % index} for index in range(1, 8)]
+
+
+class InvoiceTable(BasicTable):
+    id = Col("ID", "ID")
+
+
+class NextPageTableTest(unittest.TestCase):
+    def setUp(self):
+        Invoice.calls.clear()
+
+    def table(self, page_size=3, page="1", cache=None):
+        return Invoice.NextPageTable(
+            FakeConnection(),
+            FakeRequest(page=page),
+            page_size,
+            default_sort=[("ID", False)],
+            cache=cache,
+        )
+
+    def ids(self, results):
+        return [record["ID"] for record in results]
+
+    def test_an_extra_record_is_fetched(self):
+        results, has_next, page = self.table(page="2")
+        self.assertEqual(self.ids(results), [4, 5, 6])
+        self.assertTrue(has_next)
+        self.assertEqual(page, 2)
+        (call,) = Invoice.calls
+        self.assertEqual((call["limit"], call["offset"]), (4, 3))
+        self.assertFalse(call["yield_unlimited_total_first"])
+
+    def test_last_page(self):
+        results, has_next, _page = self.table(page="3")
+        self.assertEqual(self.ids(results), [7])
+        self.assertFalse(has_next)
+
+    def test_boundary(self):
+        results, has_next, _page = self.table(page_size=7)
+        self.assertEqual(len(results), 7)
+        self.assertFalse(has_next)
+        results, has_next, _page = self.table(page_size=6)
+        self.assertEqual(len(results), 6)
+        self.assertTrue(has_next)
+
+    def test_empty_page(self):
+        self.assertEqual(self.table(page="4")[:2], ([], False))
+
+    def test_cached_page(self):
+        cache = PageCache()
+        first = self.table(cache=cache)
+        self.assertEqual(self.table(cache=cache), first)
+        self.assertEqual(len(Invoice.calls), 1)
+
+    def test_cache_key_differs_from_intergrated_table(self):
+        cache = PageCache()
+        self.table(page_size=4, cache=cache)
+        results, total, _page = Invoice.IntergratedTable(
+            FakeConnection(),
+            FakeRequest(page="1"),
+            5,
+            default_sort=[("ID", False)],
+            cache=cache,
+        )
+        # Both fetch five records, but the total is not a next page flag.
+        self.assertEqual((len(results), total), (5, 7))
+        self.assertEqual(len(Invoice.calls), 2)
+        self.assertEqual(cache.stats["size"], 2)
+
+
+class NextPaginationTest(unittest.TestCase):
+    def pagination(self, **kwargs):
+        return TablePagination(InvoiceTable([], **kwargs))
+
+    def test_next_pagination_template(self):
+        pagination = self.pagination(page=2, has_next=True)
+        self.assertEqual(
+            (pagination.previous_page, pagination.next_page, pagination.has_next),
+            (1, 3, True),
+        )
+        with mock.patch.object(html_elements, "get_parser") as get_parser:
+            pagination.render
+        get_parser().Parse.assert_called_once_with(
+            "next_pagination.html", element=pagination
+        )
+
+    def test_last_page(self):
+        with mock.patch.object(html_elements, "get_parser") as get_parser:
+            self.pagination(page=3, has_next=False).render
+        self.assertEqual(get_parser().Parse.call_args[0][0], "next_pagination.html")
+
+    def test_total_pages_without_has_next(self):
+        with mock.patch.object(html_elements, "get_parser") as get_parser:
+            self.pagination(page=1, total_pages=3).render
+        self.assertEqual(get_parser().Parse.call_args[0][0], "pagination.html")
+
+
+if __name__ == "__main__":
+    unittest.main()
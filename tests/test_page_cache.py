@@ -0,0 +1,176 @@
+import gc
+import unittest
+from unittest import mock
+
+from uweb3plugins.core.models import invalidation
+from uweb3plugins.core.paginators.model.page_cache import PageCache
+from tests.fixtures import FakeConnection, FakeModel, FakeRequest
+
+
+class Client:
+    @classmethod
+    def TableName(cls):
+        return "client"
+
+
+class Invoice(FakeModel):
+    ROWS = [{"ID": index, "title": "Invoice %d" % index} for index in range(1, 8)]
+
+
+class SearchedInvoice(Invoice):
+    SEARCHABLE_COLUMNS = ("title", "client.name")
+
+    @classmethod
+    def _SearchForeignTable(cls, name):
+        return Client, "ID"
+
+
+class PageCacheTest(unittest.TestCase):
+    def store(self, cache, key, tables=("invoice",)):
+        cache.store(key, [{"ID": 1}], 1, tables, cache.writes)
+
+    def test_lookup_and_store(self):
+        cache = PageCache()
+        self.assertIsNone(cache.lookup("page"))
+        self.store(cache, "page")
+        self.assertEqual(cache.lookup("page"), ([{"ID": 1}], 1))
+        self.assertEqual(cache.stats["hits"], 1)
+        self.assertEqual(cache.stats["misses"], 1)
+
+    def test_store_is_refused_after_a_write(self):
+        cache = PageCache()
+        writes = cache.writes
+        cache.invalidate("client")
+        cache.store("page", [{"ID": 1}], 1, ("invoice",), writes)
+        self.assertIsNone(cache.lookup("page"))
+
+    def test_invalidate_drops_only_dependent_pages(self):
+        cache = PageCache(depends=("client",))
+        self.store(cache, "invoices")
+        self.store(cache, "invoices and products", ("invoice", "product"))
+        self.store(cache, "products", ("product",))
+        cache.invalidate("invoice")
+        self.assertIsNone(cache.lookup("invoices"))
+        self.assertIsNone(cache.lookup("invoices and products"))
+        self.assertIsNotNone(cache.lookup("products"))
+        cache.invalidate("client")
+        self.assertIsNone(cache.lookup("products"))
+        self.assertEqual(cache.stats["invalidations"], 2)
+        self.assertEqual(dict(cache._tables), {})
+
+    def test_ttl(self):
+        cache = PageCache(ttl=10)
+        with mock.patch("time.monotonic", return_value=100):
+            self.store(cache, "page")
+        with mock.patch("time.monotonic", return_value=111):
+            self.assertIsNone(cache.lookup("page"))
+        self.assertEqual(cache.stats["size"], 0)
+
+    def test_least_recently_used_is_evicted(self):
+        cache = PageCache(maxsize=2)
+        self.store(cache, "a")
+        self.store(cache, "b")
+        cache.lookup("a")
+        self.store(cache, "c")
+        self.assertIsNone(cache.lookup("b"))
+        self.assertIsNotNone(cache.lookup("a"))
+        self.assertIsNotNone(cache.lookup("c"))
+
+    def test_writes_are_reported_to_the_cache(self):
+        cache = PageCache()
+        self.store(cache, "page")
+        invalidation.notify("invoice")
+        self.assertIsNone(cache.lookup("page"))
+
+
+class Owner:
+    def __init__(self):
+        self.tables = []
+
+    def written(self, table):
+        self.tables.append(table)
+
+
+class WeakListenerTest(unittest.TestCase):
+    def test_listener_is_called(self):
+        owner = Owner()
+        listener = invalidation.add_weak_listener(owner.written)
+        try:
+            invalidation.notify("invoice")
+            self.assertEqual(owner.tables, ["invoice"])
+        finally:
+            invalidation.remove_listener(listener)
+
+    def test_listener_is_removed_once_the_owner_is_collected(self):
+        owner = Owner()
+        listener = invalidation.add_weak_listener(owner.written)
+        del owner
+        gc.collect()
+        self.assertIn(listener, invalidation._listeners)
+        invalidation.notify("invoice")
+        self.assertNotIn(listener, invalidation._listeners)
+
+    def test_collected_page_cache_is_unregistered(self):
+        gc.collect()
+        invalidation.notify("invoice")
+        listeners = len(invalidation._listeners)
+        cache = PageCache()
+        self.assertEqual(len(invalidation._listeners), listeners + 1)
+        del cache
+        gc.collect()
+        invalidation.notify("invoice")
+        self.assertEqual(len(invalidation._listeners), listeners)
+
+    def test_remove_unknown_listener(self):
+        invalidation.remove_listener(Owner().written)
+
+
+class TableCacheTest(unittest.TestCase):
+    def setUp(self):
+        Invoice.calls.clear()
+        self.cache = PageCache()
+
+    def table(self, connection=None, **fields):
+        return Invoice.IntergratedTable(
+            connection or FakeConnection(),
+            FakeRequest(**fields),
+            3,
+            default_sort=[("ID", False)],
+            cache=self.cache,
+        )
+
+    def test_page_is_reused(self):
+        first = self.table()
+        connection = FakeConnection()
+        second = self.table(connection)
+        self.assertEqual(second, first)
+        self.assertEqual(len(Invoice.calls), 1)
+        # Cached records are bound to the connection of the request.
+        self.assertIs(second[0][0].connection, connection)
+        self.assertEqual(self.cache.stats["hits"], 1)
+
+    def test_pages_are_keyed_on_the_request(self):
+        self.table()
+        self.table(page="2")
+        self.table(sort_by="title")
+        self.assertEqual(len(Invoice.calls), 3)
+
+    def test_write_invalidates_the_page(self):
+        self.table()
+        invalidation.notify("invoice")
+        self.table()
+        self.assertEqual(len(Invoice.calls), 2)
+
+    def test_cache_tables(self):
+        self.assertEqual(Invoice._TableCacheTables(None), {"invoice"})
+        self.assertEqual(
+            Invoice._TableCacheTables(["title", "`client`.name", "product.name"]),
+            {"invoice", "client", "product"},
+        )
+
+    def test_cache_tables_include_searched_foreign_tables(self):
+        self.assertEqual(SearchedInvoice._TableCacheTables(None), {"invoice", "client"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+
+from uweb3plugins.core.paginators.columns import Col
+from uweb3plugins.core.paginators.html_elements import Element, TableBody
+from uweb3plugins.core.paginators.table import BasicTable
+from tests.fixtures import (
+    InvoiceTable,
+    dict_item,
+    element_body,
+    object_item,
+    record_item,
+)
+
+
+class UpperCol(Col):
+    def render(self, item):
+        return Element("td", value=str(self.value(item)).upper())
+
+
+class ShoutTable(BasicTable):
+    id = Col("ID", "ID")
+    title = UpperCol("Title", "title")
+
+
+class CompiledRowsTest(unittest.TestCase):
+    def assertSameBody(self, table):
+        self.assertEqual(TableBody(table).render, element_body(table))
+
+    def test_dict_items(self):
+        self.assertSameBody(InvoiceTable([dict_item(index) for index in range(12)]))
+
+    def test_object_items(self):
+        self.assertSameBody(InvoiceTable([object_item(index) for index in range(12)]))
+
+    def test_record_items(self):
+        self.assertSameBody(InvoiceTable([record_item(index) for index in range(12)]))
+
+    def test_no_items(self):
+        self.assertSameBody(InvoiceTable([]))
+
+    def test_falsy_and_safe_values(self):
+        body = TableBody(InvoiceTable([dict_item(index) for index in range(6)]))
+        # Falsy values render as empty cells, like element.html omits them.
+        self.assertIn("<td>0.00</td>\n  <td></td>", body.render)
+        self.assertNotIn("None", body.render)
+        self.assertNotIn("False", body.render)
+        self.assertIn("<td>&lt;b&gt;escaped&lt;/b&gt;</td>", body.render)
+        self.assertIn("<td><b>safe</b></td>", body.render)
+
+    def test_render_override(self):
+        table = ShoutTable([dict_item(index) for index in range(3)])
+        self.assertSameBody(table)
+        self.assertIn("INVOICE &lt;1&gt;", TableBody(table).render)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import unittest
+
+import uweb3
+from uweb3plugins.core.paginators.columns import Col, LinkCol
+from uweb3plugins.core.paginators.prefetch import prefetch_relations, relation_paths
+from uweb3plugins.core.paginators.table import BasicTable
+from tests.fixtures import FakeConnection
+
+
+class ListedRecord(uweb3.model.Record):
+    """Record whose List returns ROWS and records the conditions it got."""
+
+    _PRIMARY_KEY = "ID"
+    ROWS = []
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.calls = []
+
+    @classmethod
+    def List(cls, connection, conditions=None):
+        cls.calls.append(conditions)
+        return [cls(connection, row) for row in cls.ROWS]
+
+
+class Company(ListedRecord):
+    ROWS = [{"ID": 10, "name": "Acme"}]
+
+    @classmethod
+    def TableName(cls):
+        return "company"
+
+
+class Client(ListedRecord):
+    _FOREIGN_RELATIONS = {"company": Company}
+    ROWS = [{"ID": 1, "name": "One", "company": 10}, {"ID": 2, "name": "Two"}]
+
+    @classmethod
+    def TableName(cls):
+        return "client"
+
+
+class Invoice(uweb3.model.Record):
+    _PRIMARY_KEY = "ID"
+    _FOREIGN_RELATIONS = {
+        "client": Client,
+        "owner": {"class": Client, "loader": "FromName"},
+        "payer": {"class": Client, "LookupKey": "name"},
+    }
+
+
+class InvoiceTable(BasicTable):
+    id = Col("ID", "ID")
+    client = LinkCol("Client", "client.name", href="/clients/{client.ID}")
+    company = Col("Company", "client.company.name")
+
+
+def invoices(connection, *clients, field="client"):
+    return [
+        Invoice(connection, {"ID": index, field: client})
+        for index, client in enumerate(clients, start=1)
+    ]
+
+
+class RelationPathsTest(unittest.TestCase):
+    def test_parents_come_first(self):
+        self.assertEqual(
+            relation_paths(InvoiceTable._columns.values()), ["client", "client.company"]
+        )
+
+    def test_no_relations(self):
+        self.assertEqual(relation_paths([Col("ID", "ID")]), [])
+
+
+class PrefetchTest(unittest.TestCase):
+    def setUp(self):
+        Client.calls.clear()
+        Company.calls.clear()
+        self.connection = FakeConnection()
+
+    def test_one_query_per_relation(self):
+        items = invoices(self.connection, 1, 2, 1, None)
+        prefetch_relations(items, ["client", "client.company"])
+        self.assertEqual(Client.calls, ["`client`.`ID` IN (1, 2)"])
+        self.assertEqual(Company.calls, ["`company`.`ID` IN (10)"])
+        first, second, third, fourth = (dict.get(item, "client") for item in items)
+        self.assertIsInstance(first, Client)
+        self.assertIs(first, third)
+        self.assertEqual(second["name"], "Two")
+        self.assertIsNone(fourth)
+        self.assertIsInstance(dict.get(first, "company"), Company)
+        self.assertEqual(dict.get(first, "company")["name"], "Acme")
+
+    def test_loaded_records_are_not_queried_again(self):
+        client = Client(self.connection, {"ID": 1, "company": 10})
+        items = invoices(self.connection, client)
+        prefetch_relations(items, ["client", "client.company"])
+        self.assertEqual(Client.calls, [])
+        self.assertEqual(Company.calls, ["`company`.`ID` IN (10)"])
+        self.assertIs(dict.get(items[0], "client"), client)
+
+    def test_lookup_key(self):
+        items = invoices(self.connection, "Two", field="payer")
+        prefetch_relations(items, ["payer"])
+        self.assertEqual(Client.calls, ["`client`.`name` IN ('Two')"])
+        self.assertEqual(dict.get(items[0], "payer")["ID"], 2)
+
+    def test_other_loaders_and_unknown_fields_are_left_alone(self):
+        items = invoices(self.connection, 1, field="owner")
+        items += invoices(self.connection, 1, field="unknown")
+        prefetch_relations(items, ["owner", "unknown"])
+        self.assertEqual(Client.calls, [])
+        self.assertEqual(dict.get(items[0], "owner"), 1)
+
+    def test_items_that_are_not_records_are_left_alone(self):
+        items = [{"client": 1}]
+        prefetch_relations(items, ["client"])
+        self.assertEqual((Client.calls, items), ([], [{"client": 1}]))
+
+    def test_table_prefetch(self):
+        items = invoices(self.connection, 1, 2)
+        table = InvoiceTable(items, prefetch=True)
+        prepared = table._prepare_items(iter(items))
+        self.assertEqual(prepared, items)
+        self.assertEqual(len(Client.calls), 1)
+        self.assertEqual(len(Company.calls), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
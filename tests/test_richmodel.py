@@ -0,0 +1,94 @@
+import unittest
+
+from uweb3plugins.core.models import counting, instrumentation, keyset
+from uweb3plugins.core.models.richmodel import RichModel
+from tests.fixtures import FakeConnection
+
+ROWS = [{"ID": 1, "title": "one"}, {"ID": 2, "title": "two"}]
+
+
+class Invoice(RichModel):
+    _PRIMARY_KEY = "ID"
+
+    @classmethod
+    def TableName(cls):
+        return "invoice"
+
+
+class ListTest(unittest.TestCase):
+    def test_records(self):
+        connection = FakeConnection(results=[ROWS])
+        records = list(Invoice.List(connection, conditions="`ID` > 0"))
+        self.assertEqual(records, ROWS)
+        self.assertIsInstance(records[0], Invoice)
+        (query,) = connection.queries
+        self.assertIn("SELECT invoice.*", query)
+        self.assertIn("WHERE `ID` > 0", query)
+        self.assertNotIn("SQL_CALC_FOUND_ROWS", query)
+
+    def test_counted_total(self):
+        connection = FakeConnection(results=[ROWS, [(25,)]])
+        total, *records = Invoice.List(
+            connection, limit=2, yield_unlimited_total_first=True
+        )
+        self.assertEqual((total, records), (25, ROWS))
+        query, found_rows = connection.queries
+        self.assertIn("SELECT SQL_CALC_FOUND_ROWS ", query)
+        self.assertEqual(found_rows, "SELECT FOUND_ROWS()")
+
+    def test_unlimited_total_is_the_number_of_records(self):
+        connection = FakeConnection(results=[ROWS])
+        total, *_records = Invoice.List(connection, yield_unlimited_total_first=True)
+        self.assertEqual(total, 2)
+        self.assertEqual(len(connection.queries), 1)
+
+    def test_cached_total(self):
+        strategy = counting.CachedCount()
+        connection = FakeConnection(results=[ROWS, [(25,)], ROWS])
+        list(Invoice.List(connection, limit=2, yield_unlimited_total_first=strategy))
+        total, *_records = Invoice.List(
+            connection, limit=2, yield_unlimited_total_first=strategy
+        )
+        self.assertEqual(total, 25)
+        self.assertEqual(len(connection.queries), 3)
+        self.assertNotIn("SQL_CALC_FOUND_ROWS", connection.queries[2])
+
+    def test_seek(self):
+        connection = FakeConnection(results=[ROWS])
+        conditions = ["`title` != ''"]
+        list(
+            Invoice.List(
+                connection, conditions=conditions, order=[("ID", False)], seek=[7]
+            )
+        )
+        self.assertIn("WHERE `title` != '' AND ((`ID` > 7))", connection.queries[0])
+        self.assertEqual(conditions, ["`title` != ''"])
+
+    def test_executed_query_is_instrumented(self):
+        connection = FakeConnection(results=[ROWS, [(25,)]])
+        with instrumentation.collect() as queries:
+            list(Invoice.List(connection, limit=2, yield_unlimited_total_first=True))
+        (query,) = queries
+        self.assertEqual(query.sql, connection.queries[0])
+        self.assertEqual((query.rows, query.counted, query.cache_hit), (2, True, False))
+
+
+class ExtendConditionsTest(unittest.TestCase):
+    def test_extend(self):
+        self.assertEqual(keyset.extend_conditions(None, "a"), ["a"])
+        self.assertEqual(keyset.extend_conditions("a", "b", "c"), ["a", "b", "c"])
+        conditions = ["a"]
+        self.assertEqual(keyset.extend_conditions(conditions, "b"), ["a", "b"])
+        self.assertEqual(conditions, ["a"])
+
+    def test_add_seek_condition(self):
+        connection = FakeConnection()
+        self.assertEqual(keyset.add_seek_condition(connection, "a", ["ID"], None), "a")
+        self.assertEqual(
+            keyset.add_seek_condition(connection, "a", ["ID"], [3]),
+            ["a", "((`ID` > 3))"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+import sys
+import unittest
+
+import uweb3
+from uweb3plugins.core.paginators.columns import Col
+from uweb3plugins.core.paginators.row_cache import RowCache, version_key
+from uweb3plugins.core.paginators.table import BasicTable
+
+
+class Invoice(uweb3.model.VersionedRecord):
+    _PRIMARY_KEY = "ID"
+
+    @classmethod
+    def RecordKey(cls):
+        return "invoiceID"
+
+    @property
+    def key(self):
+        return self["ID"]
+
+
+def invoice(version, record_key=1, title="Invoice"):
+    return Invoice(None, {"ID": version, "invoiceID": record_key, "title": title})
+
+
+class Renderer:
+    """Renders the items it was created with, recording the requested indices."""
+
+    def __init__(self, items):
+        self.items = items
+        self.calls = []
+
+    def __call__(self, indices):
+        self.calls.append(list(indices))
+        return ["<tr>%s</tr>" % self.items[index] for index in indices]
+
+
+class VersionKeyTest(unittest.TestCase):
+    def test_versioned_record(self):
+        self.assertEqual(version_key(invoice(4, record_key=2)), (Invoice, 2, 4))
+
+    def test_plain_items(self):
+        self.assertIsNone(version_key({"ID": 1}))
+        self.assertIsNone(version_key(uweb3.model.Record(None, {"ID": 1})))
+
+
+class RenderRowsTest(unittest.TestCase):
+    def test_only_misses_are_rendered(self):
+        cache = RowCache(key=lambda item: item)
+        cache.render_rows(["a", "b"], Renderer(["a", "b"]), "table")
+        items = ["b", "c", "a"]
+        render = Renderer(items)
+        rows = cache.render_rows(items, render, "table")
+        self.assertEqual(rows, ["<tr>b</tr>", "<tr>c</tr>", "<tr>a</tr>"])
+        self.assertEqual(render.calls, [[1]])
+        self.assertEqual(cache.stats["hits"], 2)
+        self.assertEqual(cache.stats["misses"], 3)
+
+    def test_nothing_rendered_when_all_rows_are_cached(self):
+        cache = RowCache(key=lambda item: item)
+        cache.render_rows(["a"], Renderer(["a"]), "table")
+        render = Renderer(["a"])
+        self.assertEqual(cache.render_rows(["a"], render, "table"), ["<tr>a</tr>"])
+        self.assertEqual(render.calls, [])
+
+    def test_prefix_separates_tables(self):
+        cache = RowCache(key=lambda item: item)
+        cache.render_rows(["a"], Renderer(["a"]), "table")
+        render = Renderer(["a"])
+        cache.render_rows(["a"], render, "other")
+        self.assertEqual(render.calls, [[0]])
+
+    def test_items_without_key_are_not_cached(self):
+        cache = RowCache()
+        items = [{"ID": 1}]
+        cache.render_rows(items, Renderer(items), "table")
+        render = Renderer(items)
+        cache.render_rows(items, render, "table")
+        self.assertEqual(render.calls, [[0]])
+        self.assertEqual(cache.stats["size"], 0)
+
+    def test_least_recently_used_is_evicted(self):
+        cache = RowCache(maxsize=2, key=lambda item: item)
+        cache.render_rows(["a", "b"], Renderer(["a", "b"]), "table")
+        cache.render_rows(["a"], Renderer(["a"]), "table")
+        cache.render_rows(["c"], Renderer(["c"]), "table")
+        render = Renderer(["a", "b", "c"])
+        cache.render_rows(["a", "b", "c"], render, "table")
+        self.assertEqual(render.calls, [[1]])
+
+    def test_maxbytes(self):
+        row_size = sys.getsizeof("<tr>a</tr>")
+        cache = RowCache(maxbytes=row_size * 2, key=lambda item: item)
+        cache.render_rows(["a", "b", "c"], Renderer(["a", "b", "c"]), "table")
+        self.assertEqual(cache.stats["size"], 2)
+        self.assertLessEqual(cache.stats["bytes"], row_size * 2)
+        render = Renderer(["a", "b", "c"])
+        cache.render_rows(["a", "b", "c"], render, "table")
+        self.assertEqual(render.calls[0][0], 0)
+
+    def test_rows_larger_than_maxbytes_are_not_cached(self):
+        cache = RowCache(maxbytes=10, key=lambda item: item)
+        cache.render_rows(["a"], Renderer(["a"]), "table")
+        self.assertEqual(cache.stats, {"hits": 0, "misses": 1, "size": 0, "bytes": 0})
+
+    def test_clear(self):
+        cache = RowCache(key=lambda item: item)
+        cache.render_rows(["a"], Renderer(["a"]), "table")
+        cache.clear()
+        self.assertEqual((cache.stats["size"], cache.stats["bytes"]), (0, 0))
+
+
+class InvoiceTable(BasicTable):
+    id = Col("ID", "ID")
+    title = Col("Title", "title")
+
+
+class BasicTableTest(unittest.TestCase):
+    def setUp(self):
+        InvoiceTable.row_cache = RowCache()
+
+    def render(self, items):
+        return InvoiceTable(items)._render_rows(items)
+
+    def test_cached_row_is_reused(self):
+        first = self.render([invoice(1)])
+        self.assertEqual(self.render([invoice(1, title="Changed")]), first)
+        self.assertEqual(InvoiceTable.row_cache.stats["hits"], 1)
+
+    def test_new_version_misses(self):
+        self.render([invoice(1)])
+        (row,) = self.render([invoice(2, title="Changed")])
+        self.assertIn("Changed", row)
+        self.assertEqual(InvoiceTable.row_cache.stats["hits"], 0)
+
+    def test_rows_are_cached_per_column_set(self):
+        self.render([invoice(1)])
+        table = InvoiceTable([invoice(1)])
+        table._columns["title"].enabled = False
+        try:
+            (row,) = table._render_rows([invoice(1)])
+        finally:
+            table._columns["title"].enabled = True
+        self.assertNotIn("Invoice", row)
+        self.assertEqual(InvoiceTable.row_cache.stats["hits"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+
+from tests.fixtures import FakeConnection, FakeModel, FakeRequest
+
+
+class Invoice(FakeModel):
+    ROWS = [{"ID": index, "title": "Invoice %d" % index} for index in range(1, 8)]
+
+
+class IntergratedTableTest(unittest.TestCase):
+    def setUp(self):
+        Invoice.calls.clear()
+
+    def table(self, page_size=3, **kwargs):
+        return Invoice.IntergratedTable(
+            FakeConnection(),
+            FakeRequest(page=kwargs.pop("page", "1")),
+            page_size,
+            default_sort=[("ID", False)],
+            **kwargs,
+        )
+
+    def test_page_and_total(self):
+        results, total, page = self.table(page="3")
+        self.assertEqual([record["ID"] for record in results], [7])
+        self.assertEqual((total, page), (7, 3))
+        self.assertEqual(Invoice.calls[0]["offset"], 6)
+        self.assertEqual(Invoice.calls[0]["limit"], 3)
+
+    def test_empty_page(self):
+        results, total, _page = self.table(page="4")
+        self.assertEqual((results, total), ([], 7))
+
+    def test_count_is_required(self):
+        for count in (False, None, 0):
+            with self.assertRaises(ValueError):
+                self.table(count=count)
+        self.assertEqual(Invoice.calls, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+import unittest
+
+import pymysql.cursors
+
+from uweb3plugins.core.models import counting, streaming
+from uweb3plugins.core.models.richmodel import RichModel
+from tests.fixtures import FakeConnection
+
+ROWS = [{"ID": index} for index in range(1, 8)]
+
+
+class ServerCursor:
+    def __init__(self, rows):
+        self.rows = list(rows)
+        self.queries = []
+        self.fetches = 0
+        self.closed = False
+
+    def execute(self, query):
+        self.queries.append(query)
+
+    def fetchmany(self, size):
+        self.fetches += 1
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        return rows
+
+    def close(self):
+        self.closed = True
+
+
+class StreamConnection(FakeConnection):
+    def __init__(self, rows):
+        super().__init__()
+        self.server_cursor = ServerCursor(rows)
+
+    def cursor(self, cursor_class):
+        assert cursor_class is pymysql.cursors.SSDictCursor
+        return self.server_cursor
+
+
+class Invoice(RichModel):
+    _PRIMARY_KEY = "ID"
+    preseeded = []
+
+    @classmethod
+    def TableName(cls):
+        return "invoice"
+
+    @classmethod
+    def _addToCache(cls, record):
+        pass
+
+    @classmethod
+    def _cacheListPreseed(cls, records):
+        cls.preseeded.append([record["ID"] for record in records])
+        return iter(records)
+
+
+class FetchBatchesTest(unittest.TestCase):
+    def test_batches(self):
+        connection = StreamConnection(ROWS)
+        batches = list(streaming.fetch_batches(connection, "SELECT 1", 3))
+        self.assertEqual([len(batch) for batch in batches], [3, 3, 1])
+        self.assertEqual(connection.server_cursor.queries, ["SELECT 1"])
+        self.assertTrue(connection.server_cursor.closed)
+
+    def test_cursor_is_closed_when_closed_early(self):
+        connection = StreamConnection(ROWS)
+        batches = streaming.fetch_batches(connection, "SELECT 1", 3)
+        next(batches)
+        self.assertFalse(connection.server_cursor.closed)
+        batches.close()
+        self.assertTrue(connection.server_cursor.closed)
+
+
+class StreamRecordsTest(unittest.TestCase):
+    def setUp(self):
+        Invoice.preseeded = []
+
+    def test_records_arrive_a_batch_at_a_time(self):
+        connection = StreamConnection(ROWS)
+        records = streaming.stream_records(Invoice, connection, "SELECT 1", 3)
+        first = next(records)
+        self.assertIsInstance(first, Invoice)
+        self.assertEqual(connection.server_cursor.fetches, 1)
+        self.assertEqual(Invoice.preseeded, [])
+        for _index in range(3):
+            next(records)
+        self.assertEqual(connection.server_cursor.fetches, 2)
+        self.assertEqual(Invoice.preseeded, [[1, 2, 3]])
+        self.assertEqual([record["ID"] for record in records], [5, 6, 7])
+        self.assertEqual(Invoice.preseeded, [[1, 2, 3], [4, 5, 6], [7]])
+
+    def test_without_preseed(self):
+        connection = StreamConnection(ROWS)
+        list(
+            streaming.stream_records(Invoice, connection, "SELECT 1", 3, preseed=False)
+        )
+        self.assertEqual(Invoice.preseeded, [])
+
+    def test_closing_the_records_closes_the_cursor(self):
+        connection = StreamConnection(ROWS)
+        records = streaming.stream_records(Invoice, connection, "SELECT 1", 3)
+        next(records)
+        records.close()
+        self.assertTrue(connection.server_cursor.closed)
+
+
+class ListStreamTest(unittest.TestCase):
+    def setUp(self):
+        Invoice.preseeded = []
+
+    def test_stream(self):
+        connection = StreamConnection(ROWS)
+        records = Invoice.List(connection, stream=True, batch_size=4, limit=7)
+        self.assertEqual([record["ID"] for record in records], list(range(1, 8)))
+        (query,) = connection.server_cursor.queries
+        self.assertIn("LIMIT 7", query)
+        self.assertEqual(connection.queries, [])
+        self.assertEqual(Invoice.preseeded, [[1, 2, 3, 4], [5, 6, 7]])
+
+    def test_stream_is_lazy(self):
+        connection = StreamConnection(ROWS)
+        records = Invoice.List(connection, stream=True, batch_size=2)
+        next(records)
+        self.assertEqual(connection.server_cursor.fetches, 1)
+        records.close()
+        self.assertTrue(connection.server_cursor.closed)
+
+    def test_totals_can_not_be_streamed(self):
+        for strategy in (True, counting.CachedCount()):
+            with self.assertRaises(ValueError):
+                next(
+                    Invoice.List(
+                        StreamConnection(ROWS),
+                        stream=True,
+                        yield_unlimited_total_first=strategy,
+                    )
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+
+from uweb3plugins.core.paginators.table import RenderCompleteTable, RenderSimpleTable
+from tests.fixtures import InvoiceTable, dict_item
+
+
+class StreamTest(unittest.TestCase):
+    def table(self, items, renderer):
+        return InvoiceTable(
+            items,
+            sort_by="ID",
+            page=2,
+            total_pages=5,
+            query="invoice",
+            renderer=renderer,
+        )
+
+    def test_stream_joins_to_render(self):
+        items = [dict_item(index) for index in range(25)]
+        for renderer in (RenderSimpleTable(), RenderCompleteTable()):
+            for chunk_size in (1, 7, 100):
+                table = self.table(items, renderer)
+                self.assertEqual(
+                    "".join(table.stream(chunk_size=chunk_size)), table.render
+                )
+
+    def test_stream_empty_table(self):
+        table = self.table([], RenderSimpleTable())
+        self.assertEqual("".join(table.stream()), table.render)
+
+    def test_stream_generator(self):
+        items = [dict_item(index) for index in range(10)]
+        expected = self.table(items, RenderSimpleTable()).render
+        table = self.table((item for item in items), RenderSimpleTable())
+        self.assertEqual("".join(table.stream(chunk_size=3)), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
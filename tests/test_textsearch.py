@@ -0,0 +1,190 @@
+import unittest
+
+from uweb3plugins.core.models import textsearch
+from tests.fixtures import FakeConnection
+
+
+class LikeConditionTest(unittest.TestCase):
+    def test_fields(self):
+        self.assertEqual(
+            textsearch.like_condition(FakeConnection(), ["`a`", "`b`"], "foo"),
+            "(`a` LIKE '%foo%' OR `b` LIKE '%foo%')",
+        )
+
+    def test_wildcards_are_escaped(self):
+        self.assertEqual(
+            textsearch.like_condition(FakeConnection(), ["`a`"], "50%_off\\"),
+            "(`a` LIKE '%50\\\\%\\\\_off\\\\\\\\%')",
+        )
+
+    def test_quotes_are_escaped(self):
+        condition = textsearch.like_condition(FakeConnection(), ["`a`"], "x' OR 1")
+        self.assertEqual(condition, "(`a` LIKE '%x\\' OR 1%')")
+
+
+class SearchConditionTest(unittest.TestCase):
+    columns = {
+        "title": "`invoice`.`title`",
+        "body": "`invoice`.`body`",
+        "client.name": "`client`.`name`",
+    }
+
+    def search(self, fulltext_indexes, columns=None):
+        return textsearch.search_condition(
+            FakeConnection(), columns or self.columns, fulltext_indexes, "foo"
+        )
+
+    def test_like_only(self):
+        condition, relevance = self.search(())
+        self.assertEqual(
+            condition,
+            "(`invoice`.`title` LIKE '%foo%' OR `invoice`.`body` LIKE '%foo%' "
+            "OR `client`.`name` LIKE '%foo%')",
+        )
+        self.assertIsNone(relevance)
+
+    def test_fulltext_and_like(self):
+        condition, relevance = self.search([("title", "body")])
+        match = (
+            "MATCH (`invoice`.`title`, `invoice`.`body`) "
+            "AGAINST ('foo' IN NATURAL LANGUAGE MODE)"
+        )
+        self.assertEqual(condition, "(%s OR (`client`.`name` LIKE '%%foo%%'))" % match)
+        self.assertEqual(relevance, match)
+
+    def test_fulltext_only(self):
+        condition, relevance = self.search(
+            [("title",), ("body", "client.name")],
+        )
+        first = "MATCH (`invoice`.`title`) AGAINST ('foo' IN NATURAL LANGUAGE MODE)"
+        second = (
+            "MATCH (`invoice`.`body`, `client`.`name`) "
+            "AGAINST ('foo' IN NATURAL LANGUAGE MODE)"
+        )
+        self.assertEqual(condition, "(%s OR %s)" % (first, second))
+        self.assertEqual(relevance, "%s + %s" % (first, second))
+
+    def test_single_index_is_not_wrapped(self):
+        condition, relevance = self.search([("title",)], {"title": "`title`"})
+        self.assertEqual(
+            condition, "MATCH (`title`) AGAINST ('foo' IN NATURAL LANGUAGE MODE)"
+        )
+        self.assertEqual(relevance, condition)
+
+    def test_index_with_unsearchable_column_is_skipped(self):
+        condition, relevance = self.search([("title", "notes")])
+        self.assertNotIn("MATCH", condition)
+        self.assertIsNone(relevance)
+
+    def test_no_columns(self):
+        self.assertEqual(
+            textsearch.search_condition(FakeConnection(), {}, (), "foo"), (None, None)
+        )
+
+
+class StripRelevanceTest(unittest.TestCase):
+    def test_strip(self):
+        record = {"ID": 1, textsearch.RELEVANCE_FIELD: 2.5}
+        self.assertEqual(textsearch.strip_relevance(record), {"ID": 1})
+        self.assertIn(textsearch.RELEVANCE_FIELD, record)
+        plain = {"ID": 1}
+        self.assertIs(textsearch.strip_relevance(plain), plain)
+
+
+class Client:
+    @classmethod
+    def TableName(cls):
+        return "client"
+
+
+class Invoice:
+    SEARCHABLE_COLUMNS = ("title", "client.name", "invoice.number")
+
+    @classmethod
+    def TableName(cls):
+        return "invoice"
+
+
+def foreign_table(name):
+    return {"client": (Client, "ID"), "invoice": (Invoice, "ID")}[name]
+
+
+class SearchPlanTest(unittest.TestCase):
+    def test_build(self):
+        plan = textsearch.SearchPlan.Build(Invoice, foreign_table)
+        self.assertEqual(plan.searchable, Invoice.SEARCHABLE_COLUMNS)
+        self.assertEqual(plan.tables, ["client"])
+        self.assertEqual(
+            plan.joins,
+            ["`invoice`.`client` = client.ID", "`invoice`.`invoice` = invoice.ID"],
+        )
+        self.assertEqual(
+            plan.columns,
+            {
+                "title": "`invoice`.`title`",
+                "client.name": "`client`.`name`",
+                "invoice.number": "`invoice`.`number`",
+            },
+        )
+
+    def test_bind(self):
+        plan = textsearch.SearchPlan.Build(Invoice, foreign_table)
+        tables = ["invoice"]
+        bound, conditions, relevance = plan.Bind(FakeConnection(), tables, "foo")
+        self.assertEqual(bound, ["invoice", "client"])
+        self.assertEqual(conditions[:2], plan.joins)
+        self.assertIn("`client`.`name` LIKE '%foo%'", conditions[2])
+        self.assertIsNone(relevance)
+
+    def test_bind_does_not_grow_the_tables(self):
+        plan = textsearch.SearchPlan.Build(Invoice, foreign_table)
+        tables = ["invoice"]
+        for term in ("foo", "bar"):
+            bound, conditions, _relevance = plan.Bind(FakeConnection(), tables, term)
+            self.assertEqual(bound, ["invoice", "client"])
+            self.assertEqual(len(conditions), 3)
+        self.assertEqual(tables, ["invoice"])
+        self.assertEqual(plan.tables, ["client"])
+        self.assertEqual(len(plan.joins), 2)
+
+    def test_bind_does_not_repeat_joined_tables(self):
+        plan = textsearch.SearchPlan.Build(Invoice, foreign_table)
+        bound, _conditions, _relevance = plan.Bind(
+            FakeConnection(), ("invoice", "client"), "foo"
+        )
+        self.assertEqual(bound, ["invoice", "client"])
+
+    def test_bind_fulltext(self):
+        plan = textsearch.SearchPlan.Build(Invoice, foreign_table)
+        _tables, conditions, relevance = plan.Bind(
+            FakeConnection(), [], "foo", fulltext_indexes=[("title",)]
+        )
+        self.assertIn(relevance, conditions[2])
+        self.assertTrue(relevance.startswith("MATCH (`invoice`.`title`)"))
+
+
+class GetPlanTest(unittest.TestCase):
+    def test_plan_is_cached_per_class(self):
+        class Searched(Invoice):
+            pass
+
+        class Other(Invoice):
+            pass
+
+        plan = textsearch.get_plan(Searched, foreign_table)
+        self.assertIs(textsearch.get_plan(Searched, foreign_table), plan)
+        self.assertIsNot(textsearch.get_plan(Other, foreign_table), plan)
+
+    def test_plan_is_rebuilt_when_the_columns_change(self):
+        class Searched(Invoice):
+            pass
+
+        plan = textsearch.get_plan(Searched, foreign_table)
+        Searched.SEARCHABLE_COLUMNS = ("title",)
+        rebuilt = textsearch.get_plan(Searched, foreign_table)
+        self.assertIsNot(rebuilt, plan)
+        self.assertEqual(rebuilt.tables, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
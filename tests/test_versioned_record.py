@@ -0,0 +1,88 @@
+import unittest
+from unittest import mock
+
+import uweb3
+from uweb3plugins.core.models import invalidation
+from uweb3plugins.core.models.richversionrecord import RichVersionedRecord
+from tests.fixtures import FakeConnection
+
+
+class Invoice(RichVersionedRecord):
+    _PRIMARY_KEY = "ID"
+    LATEST_VERSION_TABLE = "invoiceLatest"
+
+    @classmethod
+    def TableName(cls):
+        return "invoice"
+
+    @classmethod
+    def RecordKey(cls):
+        return "invoiceID"
+
+
+class Unversioned(Invoice):
+    LATEST_VERSION_TABLE = None
+
+
+class DeletePrimaryTest(unittest.TestCase):
+    def delete(self, model, connection, pkey):
+        with mock.patch.object(
+            uweb3.model.VersionedRecord, "DeletePrimary", create=True
+        ) as delete:
+            model.DeletePrimary(connection, pkey)
+        delete.assert_called_once_with(connection, pkey)
+
+    def test_pointer_is_refreshed(self):
+        connection = FakeConnection(results=[[(12,)]])
+        self.delete(Invoice, connection, 5)
+        select, delete, insert = connection.queries
+        self.assertEqual(select, "SELECT `invoiceID` FROM `invoice` WHERE `ID` = 5")
+        self.assertEqual(delete, "DELETE FROM `invoiceLatest` WHERE `invoiceID` = 12")
+        self.assertIn("SELECT `invoiceID`, MAX(`ID`)", insert)
+        self.assertIn("WHERE `invoiceID` = 12", insert)
+
+    def test_unknown_version(self):
+        connection = FakeConnection(results=[[]])
+        self.delete(Invoice, connection, 5)
+        self.assertEqual(len(connection.queries), 1)
+
+    def test_writes_are_reported(self):
+        tables = []
+        invalidation.add_listener(tables.append)
+        try:
+            self.delete(Unversioned, FakeConnection(), 5)
+        finally:
+            invalidation.remove_listener(tables.append)
+        self.assertEqual(tables, ["invoice"])
+
+    def test_without_pointer_table(self):
+        connection = FakeConnection()
+        self.delete(Unversioned, connection, 5)
+        self.assertEqual(connection.queries, [])
+
+
+class ListTest(unittest.TestCase):
+    def test_counted_total(self):
+        rows = [{"ID": 3, "invoiceID": 1}, {"ID": 5, "invoiceID": 2}]
+        connection = FakeConnection(results=[rows, [(9,)]])
+        total, *records = Invoice.List(
+            connection, limit=2, yield_unlimited_total_first=True, latest="pointer"
+        )
+        self.assertEqual((total, records), (9, rows))
+        query, found_rows = connection.queries
+        self.assertIn("SELECT SQL_CALC_FOUND_ROWS invoice.*", query)
+        self.assertIn("JOIN `invoiceLatest` AS `versions`", query)
+        self.assertEqual(found_rows, "SELECT FOUND_ROWS()")
+
+    def test_correlated_strategy_keeps_the_conditions(self):
+        connection = FakeConnection(results=[[]])
+        conditions = ["`title` != ''"]
+        list(Invoice.List(connection, conditions=conditions, latest="correlated"))
+        self.assertIn(
+            "WHERE `title` != '' AND `invoice`.`ID` = (", connection.queries[0]
+        )
+        self.assertEqual(conditions, ["`title` != ''"])
+
+
+if __name__ == "__main__":
+    unittest.main()
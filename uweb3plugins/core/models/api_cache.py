@@ -0,0 +1,198 @@
+import collections
+import copy
+import email.utils
+import threading
+import time
+
+CACHEABLE_METHODS = ("GET", "HEAD")
+CACHEABLE_STATUS = (200, 203)
+
+
+def _cache_control(headers):
+    """Parses a Cache-Control header into a dict of lowercase directives."""
+    directives = {}
+    for directive in headers.get("Cache-Control", "").split(","):
+        name, _sep, value = directive.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"')
+    return directives
+
+
+class _Entry:
+    def __init__(self, response, expires):
+        self.response = response
+        self.expires = expires
+
+    @property
+    def validators(self):
+        headers = {}
+        if "ETag" in self.response.headers:
+            headers["If-None-Match"] = self.response.headers["ETag"]
+        if "Last-Modified" in self.response.headers:
+            headers["If-Modified-Since"] = self.response.headers["Last-Modified"]
+        return headers
+
+
+class ResponseCache:
+    def __init__(self, maxsize=256, ttl=300, vary=("Accept", "Authorization")):
+        """In memory LRU cache for the responses of an API model session.
+
+        Only successful GET and HEAD responses are cached. The freshness of a
+        response follows its Cache-Control max-age or Expires header, and
+        falls back to ttl when the response has neither. Responses with
+        Cache-Control no-store are never cached. Stale responses that have an
+        ETag or Last-Modified header are revalidated with a conditional
+        request, a 304 response refreshes the cached response.
+
+        Responses are keyed on method, URL and the request headers named in
+        vary, plus the headers the response listed in its Vary header.
+
+        Usage:
+            class Model(ModelSessionMixin):
+                RESPONSE_CACHE = ResponseCache(maxsize=512, ttl=3600)
+
+        Args:
+            maxsize (int, optional): Maximum number of cached responses, the
+                least recently used response is dropped first. Defaults to 256.
+            ttl (int | float, optional): Seconds a response without freshness
+                information is considered fresh. Defaults to 300.
+            vary (tuple, optional): Request headers that are always part of the
+                cache key. Defaults to ("Accept", "Authorization").
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.vary = tuple(vary)
+        self._entries = collections.OrderedDict()
+        self._vary = {}
+        self._lock = threading.Lock()
+        self._stats = collections.Counter()
+
+    @property
+    def stats(self):
+        """Returns the hits, misses, stale and revalidated counts and size."""
+        with self._lock:
+            return {
+                "hits": self._stats["hits"],
+                "misses": self._stats["misses"],
+                "stale": self._stats["stale"],
+                "revalidated": self._stats["revalidated"],
+                "size": len(self._entries),
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._vary.clear()
+
+    def send(self, send, request, **kwargs):
+        """Session layer that answers requests from the cache when possible."""
+        if (
+            request.method not in CACHEABLE_METHODS
+            or kwargs.get("stream")
+            or "no-store" in _cache_control(request.headers)
+        ):
+            return send(request, **kwargs)
+
+        with self._lock:
+            key = self._key(request)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            if entry is None:
+                self._stats["misses"] += 1
+            elif entry.expires > time.monotonic() and (
+                "no-cache" not in _cache_control(request.headers)
+            ):
+                self._stats["hits"] += 1
+                return self._copy(entry.response, request)
+            else:
+                self._stats["stale"] += 1
+
+        if entry is not None and entry.validators:
+            request = request.copy()
+            request.headers.update(entry.validators)
+            response = send(request, **kwargs)
+            if response.status_code == 304:
+                response.close()
+                with self._lock:
+                    self._stats["revalidated"] += 1
+                    cached = copy.copy(entry.response)
+                    cached.headers = entry.response.headers.copy()
+                    cached.headers.update(response.headers)
+                    self._store(request, cached)
+                return self._copy(cached, request)
+        else:
+            response = send(request, **kwargs)
+
+        if response.status_code in CACHEABLE_STATUS:
+            with self._lock:
+                self._store(request, response)
+        return response
+
+    def _key(self, request):
+        vary = self._vary.get((request.method, request.url), self.vary)
+        return (
+            request.method,
+            request.url,
+            tuple((name.lower(), request.headers.get(name)) for name in vary),
+        )
+
+    def _freshness(self, response):
+        """Returns the seconds a response stays fresh, None when not cacheable."""
+        directives = _cache_control(response.headers)
+        if "no-store" in directives:
+            return None
+        if "no-cache" in directives:
+            return 0
+        if "max-age" in directives:
+            try:
+                return max(0, int(directives["max-age"]))
+            except ValueError:
+                return 0
+        if "Expires" in response.headers:
+            try:
+                expires = email.utils.parsedate_to_datetime(
+                    response.headers["Expires"]
+                )
+                date = email.utils.parsedate_to_datetime(
+                    response.headers.get("Date") or response.headers["Expires"]
+                )
+            except (TypeError, ValueError):
+                return 0
+            return max(0, (expires - date).total_seconds())
+        return self.ttl
+
+    def _store(self, request, response):
+        freshness = self._freshness(response)
+        if freshness is None:
+            return
+        if freshness == 0 and not _Entry(response, 0).validators:
+            return
+        # Read the body so the cached response can be handed out again.
+        response.content
+        vary = self.vary + tuple(
+            name.strip()
+            for name in response.headers.get("Vary", "").split(",")
+            if name.strip() and name.strip().lower() not in map(str.lower, self.vary)
+        )
+        if "*" in vary:
+            return
+        self._vary[(request.method, request.url)] = vary
+        key = self._key(request)
+        self._entries[key] = _Entry(response, time.monotonic() + freshness)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        if len(self._vary) > 2 * self.maxsize:
+            cached = {(method, url) for method, url, _headers in self._entries}
+            self._vary = {
+                target: vary for target, vary in self._vary.items() if target in cached
+            }
+
+    @staticmethod
+    def _copy(response, request):
+        response = copy.copy(response)
+        response.headers = response.headers.copy()
+        response.request = request
+        response.from_cache = True
+        return response
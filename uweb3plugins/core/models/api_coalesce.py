@@ -0,0 +1,98 @@
+import collections
+import copy
+import threading
+
+COALESCE_METHODS = ("GET", "HEAD")
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+class RequestCoalescer:
+    def __init__(self, methods=COALESCE_METHODS):
+        """Session layer that shares one upstream call between identical requests.
+
+        When a request is sent while an identical request (same method, URL,
+        headers and body) is still in flight, it waits for that request instead
+        of sending its own. All waiters receive a copy of the response, or the
+        exception the request raised. Only idempotent methods are coalesced,
+        streamed requests are always sent on their own.
+
+        Usage:
+            class Model(ModelSessionMixin):
+                REQUEST_COALESCER = RequestCoalescer()
+
+        Args:
+            methods (tuple, optional): The methods that are coalesced.
+                Defaults to ("GET", "HEAD").
+        """
+        self.methods = tuple(methods)
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._stats = collections.Counter()
+
+    @property
+    def stats(self):
+        """Returns the number of sent and shared requests, and those in flight."""
+        with self._lock:
+            return {
+                "sent": self._stats["sent"],
+                "shared": self._stats["shared"],
+                "in_flight": len(self._calls),
+            }
+
+    def send(self, send, request, **kwargs):
+        if request.method not in self.methods or kwargs.get("stream"):
+            return send(request, **kwargs)
+
+        key = self._key(request)
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._stats["sent"] += 1
+            else:
+                self._stats["shared"] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return self._copy(call.response, request)
+
+        try:
+            response = send(request, **kwargs)
+            # Read the body so every waiter can access it.
+            response.content
+            call.response = response
+            return response
+        except Exception as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    @staticmethod
+    def _key(request):
+        return (
+            request.method,
+            request.url,
+            tuple(
+                sorted((name.lower(), value) for name, value in request.headers.items())
+            ),
+            request.body,
+        )
+
+    @staticmethod
+    def _copy(response, request):
+        response = copy.copy(response)
+        response.headers = response.headers.copy()
+        response.request = request
+        return response
@@ -1,7 +1,119 @@
+import asyncio
+import concurrent.futures
 import functools
+import os
+import socket
+import threading
 import requests
 
-from requests.adapters import HTTPAdapter, Retry
+from requests.adapters import Retry
+from urllib3.connection import HTTPConnection
+from uweb3plugins.core.models.api_cache import ResponseCache
+from uweb3plugins.core.models.api_coalesce import RequestCoalescer
+from uweb3plugins.core.models.api_pool import MeteredHTTPAdapter
+from uweb3plugins.core.models.api_resilience import (
+    AdaptiveTimeout,
+    CircuitBreaker,
+    HedgedRequests,
+)
+
+_session_lock = threading.Lock()
+
+
+def _reset_session_lock():
+    # The lock could have been held by another thread of the parent process.
+    global _session_lock
+    _session_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_session_lock)
+
+
+class ModelSession(requests.Session):
+    def __init__(self, layers=()):
+        """Requests session that passes every request through a stack of layers.
+
+        A layer is an object with a send(send, request, **kwargs) method, that
+        either answers the prepared request itself or calls send to pass it on
+        to the next layer and finally the connection adapter.
+        """
+        super().__init__()
+        self.layers = list(layers)
+
+    def send(self, request, **kwargs):
+        send = super().send
+        for layer in reversed(self.layers):
+            send = functools.partial(layer.send, send)
+        return send(request, **kwargs)
+
+
+class AsyncSession:
+    def __init__(self, model, concurrency):
+        """Asyncio counterpart of the request session of a ModelSessionMixin.
+
+        Requests are sent through the regular session of the model from a
+        dedicated thread pool, so they share its connection pool, retries and
+        timeout. At most `concurrency` requests of the model are in flight at
+        the same time, further requests wait for a free worker.
+
+        Args:
+            model (ModelSessionMixin): The class whose session is used.
+            concurrency (int): The maximum number of concurrent requests.
+        """
+        self.model = model
+        self.concurrency = concurrency
+        self.pid = os.getpid()
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=concurrency,
+            thread_name_prefix="%s-request" % model.__name__,
+        )
+
+    async def request(self, method, url, **kwargs) -> requests.Response:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor,
+            functools.partial(self.model.request.request, method, url, **kwargs),
+        )
+
+    async def get(self, url, **kwargs) -> requests.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def head(self, url, **kwargs) -> requests.Response:
+        return await self.request("HEAD", url, **kwargs)
+
+    async def post(self, url, **kwargs) -> requests.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def put(self, url, **kwargs) -> requests.Response:
+        return await self.request("PUT", url, **kwargs)
+
+    async def patch(self, url, **kwargs) -> requests.Response:
+        return await self.request("PATCH", url, **kwargs)
+
+    async def delete(self, url, **kwargs) -> requests.Response:
+        return await self.request("DELETE", url, **kwargs)
+
+    async def gather(self, *calls, return_exceptions=False):
+        """Sends several requests concurrently and returns their responses.
+
+        Every call is a (method, url) or (method, url, kwargs) tuple, the
+        responses are returned in the same order:
+
+            user, orders = await Model.async_request.gather(
+                ("GET", "https://api.example.com/user/1"),
+                ("GET", "https://api.example.com/orders", {"params": {"user": 1}}),
+            )
+        """
+        return await asyncio.gather(
+            *(
+                self.request(call[0], call[1], **(call[2] if len(call) > 2 else {}))
+                for call in calls
+            ),
+            return_exceptions=return_exceptions,
+        )
+
+    def close(self):
+        self._executor.shutdown(wait=False)
 
 
 class ModelSessionMeta(type):
@@ -15,23 +127,120 @@ class ModelSessionMeta(type):
 
     @property
     def request(cls) -> requests.Session:
-        if not cls._request_session:
-            cls._request_session = requests.Session()
-            cls._request_session.request = functools.partial(
-                cls._request_session.request,
-                timeout=9,
-            )
-            adapter = HTTPAdapter(
-                max_retries=Retry(
-                    total=2,
-                    backoff_factor=0.3,
-                    status_forcelist=[500, 502, 503, 504],
-                )
-            )
-            cls._request_session.mount("http://", adapter)
-            cls._request_session.mount("https://", adapter)
-        return cls._request_session
+        # The session is created once per class and process. Subclasses get
+        # their own session with their own settings, and a forked worker never
+        # shares the sockets of its parent.
+        session = cls.__dict__.get("_request_session")
+        if session is None or cls.__dict__.get("_request_pid") != os.getpid():
+            with _session_lock:
+                session = cls.__dict__.get("_request_session")
+                if session is None or cls.__dict__.get("_request_pid") != os.getpid():
+                    session = cls._CreateSession()
+                    cls._request_session = session
+                    cls._request_pid = os.getpid()
+        return session
+
+    @property
+    def async_request(cls) -> AsyncSession:
+        """Asyncio client that sends requests through the request session.
+
+        Usage:
+            response = await Model.async_request.get(url)
+        """
+        session = cls.__dict__.get("_async_session")
+        if session is None or session.pid != os.getpid():
+            with _session_lock:
+                session = cls.__dict__.get("_async_session")
+                if session is None or session.pid != os.getpid():
+                    session = AsyncSession(cls, cls.ASYNC_CONCURRENCY)
+                    cls._async_session = session
+        return session
+
+    @property
+    def pool_stats(cls) -> dict:
+        """Returns the connection pool counters of the request session.
+
+        See api_pool.PoolStats for the meaning of the counters.
+        """
+        return cls.request.get_adapter("https://").stats.snapshot()
 
 
 class ModelSessionMixin(metaclass=ModelSessionMeta):
     _request_session: requests.Session | None = None
+    _request_pid: int | None = None
+    _async_session: AsyncSession | None = None
+    # Optional ResponseCache that answers repeated GET requests from memory.
+    RESPONSE_CACHE: ResponseCache | None = None
+    # Optional RequestCoalescer that lets identical GET requests that are in
+    # flight at the same time share one upstream call.
+    REQUEST_COALESCER: RequestCoalescer | None = None
+    # Optional CircuitBreaker that fails fast while a host keeps failing.
+    CIRCUIT_BREAKER: CircuitBreaker | None = None
+    # Optional HedgedRequests that resends GET requests that take unusually long.
+    HEDGED_REQUESTS: HedgedRequests | None = None
+    # Optional AdaptiveTimeout that lowers REQUEST_TIMEOUT to the usual latency.
+    ADAPTIVE_TIMEOUT: AdaptiveTimeout | None = None
+    # Seconds a request may take, per connect and read.
+    REQUEST_TIMEOUT = 9
+    # Maximum number of concurrent requests sent through async_request. Keep
+    # this at or below POOL_MAXSIZE.
+    ASYNC_CONCURRENCY = 10
+    # Number of hosts a connection pool is kept for.
+    POOL_CONNECTIONS = 10
+    # Number of connections kept open per host.
+    POOL_MAXSIZE = 10
+    # Wait for a free connection instead of opening (and later discarding) an
+    # extra connection when all connections to a host are in use.
+    POOL_BLOCK = False
+    # Reuse connections between requests, when disabled every request sends a
+    # "Connection: close" header.
+    KEEP_ALIVE = True
+    # Enable TCP keep-alive probes so idle pooled connections are not silently
+    # dropped by firewalls and load balancers.
+    TCP_KEEPALIVE = False
+
+    @classmethod
+    def _CreateSession(cls):
+        """Creates the requests session with its retrying connection pools."""
+        session = ModelSession(cls._SessionLayers())
+        session.request = functools.partial(
+            session.request,
+            timeout=cls.REQUEST_TIMEOUT,
+        )
+        if not cls.KEEP_ALIVE:
+            session.headers["Connection"] = "close"
+        socket_options = None
+        if cls.TCP_KEEPALIVE:
+            socket_options = HTTPConnection.default_socket_options + [
+                (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            ]
+        adapter = MeteredHTTPAdapter(
+            pool_connections=cls.POOL_CONNECTIONS,
+            pool_maxsize=cls.POOL_MAXSIZE,
+            pool_block=cls.POOL_BLOCK,
+            socket_options=socket_options,
+            max_retries=Retry(
+                total=2,
+                backoff_factor=0.3,
+                status_forcelist=[500, 502, 503, 504],
+            ),
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    @classmethod
+    def _SessionLayers(cls):
+        """Returns the layers every request of the session passes through."""
+        layers = []
+        if cls.RESPONSE_CACHE is not None:
+            layers.append(cls.RESPONSE_CACHE)
+        # Behind the cache, so only cache misses and revalidations are shared.
+        if cls.REQUEST_COALESCER is not None:
+            layers.append(cls.REQUEST_COALESCER)
+        # A hedged request counts as one request for the circuit breaker, while
+        # every attempt gets its own adaptive timeout.
+        for layer in (cls.CIRCUIT_BREAKER, cls.HEDGED_REQUESTS, cls.ADAPTIVE_TIMEOUT):
+            if layer is not None:
+                layers.append(layer)
+        return layers
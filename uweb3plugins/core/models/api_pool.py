@@ -0,0 +1,100 @@
+import collections
+import threading
+import time
+
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# Getting a connection from the pool slower than this counts as a wait.
+WAIT_THRESHOLD = 0.001
+
+
+class PoolStats:
+    def __init__(self):
+        """Thread safe counters for the connection pools of an adapter.
+
+        Counters:
+            opened: Connections that were opened.
+            discarded: Connections that were closed because the pool was full,
+                this is the "Connection pool is full" warning of urllib3.
+            waits: Requests that had to wait for a free connection.
+            wait_time: Total number of seconds spent waiting.
+        """
+        self._lock = threading.Lock()
+        self._counters = collections.Counter()
+
+    def record(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "opened": self._counters["opened"],
+                "discarded": self._counters["discarded"],
+                "waits": self._counters["waits"],
+                "wait_time": self._counters["wait_time"],
+            }
+
+
+class _MeteredPoolMixin:
+    stats: PoolStats
+
+    def _new_conn(self):
+        self.stats.record("opened")
+        return super()._new_conn()
+
+    def _get_conn(self, timeout=None):
+        start = time.monotonic()
+        conn = super()._get_conn(timeout=timeout)
+        waited = time.monotonic() - start
+        if waited > WAIT_THRESHOLD:
+            self.stats.record("waits")
+            self.stats.record("wait_time", waited)
+        return conn
+
+    def _put_conn(self, conn):
+        if self.pool is not None and self.pool.full():
+            self.stats.record("discarded")
+        super()._put_conn(conn)
+
+
+class MeteredHTTPAdapter(HTTPAdapter):
+    __attrs__ = HTTPAdapter.__attrs__ + ["socket_options"]
+
+    def __init__(self, *args, socket_options=None, **kwargs):
+        """HTTPAdapter that keeps PoolStats for its connection pools.
+
+        Args:
+            socket_options (list, optional): Socket options for new connections,
+                for example to enable TCP keep-alive. Defaults to the urllib3
+                defaults.
+
+        All other arguments are passed on to HTTPAdapter, like pool_connections,
+        pool_maxsize, pool_block and max_retries.
+        """
+        self.stats = PoolStats()
+        self.socket_options = socket_options
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        if self.socket_options is not None:
+            pool_kwargs["socket_options"] = self.socket_options
+        super().init_poolmanager(connections, maxsize, block=block, **pool_kwargs)
+        attrs = {"stats": self.stats}
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": type(
+                "MeteredHTTPConnectionPool",
+                (_MeteredPoolMixin, HTTPConnectionPool),
+                attrs,
+            ),
+            "https": type(
+                "MeteredHTTPSConnectionPool",
+                (_MeteredPoolMixin, HTTPSConnectionPool),
+                attrs,
+            ),
+        }
+
+    def __setstate__(self, state):
+        self.stats = PoolStats()
+        super().__setstate__(state)
@@ -0,0 +1,393 @@
+import collections
+import concurrent.futures
+import os
+import threading
+import time
+import urllib.parse
+
+import requests
+
+# Exceptions that mean the upstream could not answer the request.
+UPSTREAM_ERRORS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    requests.exceptions.RetryError,
+)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised instead of sending a request to a host whose circuit is open."""
+
+
+def _host(request):
+    return urllib.parse.urlsplit(request.url).netloc
+
+
+class LatencyTracker:
+    def __init__(self, samples=100):
+        """Keeps the latencies of the most recent requests per host.
+
+        Args:
+            samples (int, optional): The number of latencies that are kept per
+                host. Defaults to 100.
+        """
+        self.samples = samples
+        self._latencies = {}
+        self._lock = threading.Lock()
+
+    def record(self, host, seconds):
+        with self._lock:
+            latencies = self._latencies.get(host)
+            if latencies is None:
+                latencies = self._latencies[host] = collections.deque(
+                    maxlen=self.samples
+                )
+            latencies.append(seconds)
+
+    def percentile(self, host, percentile, min_samples=1):
+        """Returns the given percentile (0-1) of the latencies of a host.
+
+        Returns None when fewer than min_samples latencies are known.
+        """
+        with self._lock:
+            latencies = sorted(self._latencies.get(host, ()))
+        if not latencies or len(latencies) < min_samples:
+            return None
+        return latencies[min(len(latencies) - 1, int(percentile * len(latencies)))]
+
+
+class _Circuit:
+    def __init__(self):
+        self.state = CLOSED
+        self.results = collections.deque()
+        self.opened_at = None
+        self.probes = 0
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        failure_rate=0.5,
+        minimum_requests=10,
+        window=30,
+        reset_timeout=30,
+        half_open_requests=1,
+    ):
+        """Session layer that stops sending requests to a failing host.
+
+        Every host has its own circuit. While the circuit is closed the results
+        of the requests in the last `window` seconds are kept, when at least
+        `minimum_requests` were sent and the share of failures reaches
+        `failure_rate` the circuit opens. An open circuit raises
+        CircuitOpenError right away instead of sending the request, so worker
+        threads are not tied up by a host that is down. After `reset_timeout`
+        seconds the circuit is half-open and lets `half_open_requests` probe
+        requests through, it closes when they succeed and opens again when they
+        fail.
+
+        Connection errors, timeouts, exhausted retries and 5xx responses count
+        as failures.
+
+        Usage:
+            class Model(ModelSessionMixin):
+                CIRCUIT_BREAKER = CircuitBreaker(failure_rate=0.25)
+
+        Args:
+            failure_rate (float, optional): The share of failed requests that
+                opens the circuit. Defaults to 0.5.
+            minimum_requests (int, optional): The number of requests in the
+                window before the circuit can open. Defaults to 10.
+            window (int | float, optional): Seconds the results of requests are
+                taken into account. Defaults to 30.
+            reset_timeout (int | float, optional): Seconds an open circuit waits
+                before it lets a probe request through. Defaults to 30.
+            half_open_requests (int, optional): The number of concurrent probe
+                requests of a half-open circuit. Defaults to 1.
+        """
+        self.failure_rate = failure_rate
+        self.minimum_requests = minimum_requests
+        self.window = window
+        self.reset_timeout = reset_timeout
+        self.half_open_requests = half_open_requests
+        self._circuits = {}
+        self._lock = threading.Lock()
+
+    @property
+    def states(self):
+        """Returns the state of the circuit of every host."""
+        with self._lock:
+            return {host: circuit.state for host, circuit in self._circuits.items()}
+
+    def reset(self):
+        with self._lock:
+            self._circuits.clear()
+
+    def send(self, send, request, **kwargs):
+        host = _host(request)
+        with self._lock:
+            circuit = self._circuits.get(host)
+            if circuit is None:
+                circuit = self._circuits[host] = _Circuit()
+            self._acquire(host, circuit)
+
+        try:
+            response = send(request, **kwargs)
+        except UPSTREAM_ERRORS:
+            with self._lock:
+                self._record(circuit, True)
+            raise
+        except Exception:
+            with self._lock:
+                self._record(circuit, None)
+            raise
+        with self._lock:
+            self._record(circuit, response.status_code >= 500)
+        return response
+
+    def _acquire(self, host, circuit):
+        if circuit.state == OPEN:
+            if time.monotonic() - circuit.opened_at < self.reset_timeout:
+                raise CircuitOpenError("Circuit for %s is open" % host)
+            circuit.state = HALF_OPEN
+            circuit.probes = 0
+        if circuit.state == HALF_OPEN:
+            if circuit.probes >= self.half_open_requests:
+                raise CircuitOpenError("Circuit for %s is half-open" % host)
+            circuit.probes += 1
+
+    def _record(self, circuit, failed):
+        # failed is None for errors that say nothing about the upstream.
+        now = time.monotonic()
+        if circuit.state == HALF_OPEN:
+            circuit.probes -= 1
+            if failed:
+                self._open(circuit, now)
+            elif failed is not None:
+                circuit.state = CLOSED
+                circuit.results.clear()
+            return
+        if circuit.state == OPEN or failed is None:
+            return
+        circuit.results.append((now, failed))
+        while circuit.results and circuit.results[0][0] < now - self.window:
+            circuit.results.popleft()
+        if len(circuit.results) >= self.minimum_requests:
+            failures = sum(1 for _time, failed in circuit.results if failed)
+            if failures / len(circuit.results) >= self.failure_rate:
+                self._open(circuit, now)
+
+    @staticmethod
+    def _open(circuit, now):
+        circuit.state = OPEN
+        circuit.opened_at = now
+        circuit.results.clear()
+
+
+class AdaptiveTimeout:
+    def __init__(
+        self, percentile=0.99, multiplier=2, minimum=1, min_samples=20, samples=100
+    ):
+        """Session layer that lowers the timeout to what a host usually needs.
+
+        The timeout of a request becomes the given percentile of the recent
+        latencies of its host times `multiplier`, but never less than `minimum`
+        and never more than the timeout the request was sent with. Until
+        `min_samples` latencies are known the timeout is left alone. Requests
+        that time out are recorded as well, so the timeout grows again when a
+        host gets slower.
+
+        Usage:
+            class Model(ModelSessionMixin):
+                ADAPTIVE_TIMEOUT = AdaptiveTimeout(percentile=0.95)
+
+        Args:
+            percentile (float, optional): The latency percentile (0-1) the
+                timeout is based on. Defaults to 0.99.
+            multiplier (int | float, optional): Headroom on top of the
+                percentile. Defaults to 2.
+            minimum (int | float, optional): The lowest timeout in seconds.
+                Defaults to 1.
+            min_samples (int, optional): The number of latencies needed before
+                the timeout is adapted. Defaults to 20.
+            samples (int, optional): The number of latencies that are kept per
+                host. Defaults to 100.
+        """
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self.minimum = minimum
+        self.min_samples = min_samples
+        self.latencies = LatencyTracker(samples)
+
+    def timeout(self, host, timeout):
+        """Returns the adapted timeout for a request to host."""
+        latency = self.latencies.percentile(host, self.percentile, self.min_samples)
+        if latency is None or timeout is None:
+            return timeout
+        adapted = max(self.minimum, latency * self.multiplier)
+        if isinstance(timeout, tuple):
+            return tuple(
+                part if part is None else min(part, adapted) for part in timeout
+            )
+        return min(timeout, adapted)
+
+    def send(self, send, request, **kwargs):
+        host = _host(request)
+        kwargs["timeout"] = self.timeout(host, kwargs.get("timeout"))
+        start = time.monotonic()
+        try:
+            response = send(request, **kwargs)
+        except requests.exceptions.Timeout:
+            self.latencies.record(host, time.monotonic() - start)
+            raise
+        self.latencies.record(host, time.monotonic() - start)
+        return response
+
+
+def _close_response(future):
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+class HedgedRequests:
+    def __init__(
+        self,
+        delay=None,
+        percentile=0.95,
+        min_samples=20,
+        max_workers=20,
+        methods=("GET", "HEAD"),
+    ):
+        """Session layer that sends a second copy of a slow idempotent request.
+
+        When a request has not been answered after `delay` seconds the same
+        request is sent again, and whichever response arrives first is used,
+        the other one is closed when it arrives. Without a fixed delay the given
+        percentile of the recent latencies of the host is used, requests are
+        not hedged until `min_samples` latencies are known.
+
+        The attempts are sent from a pool of max_workers threads. Requests never
+        queue for that pool: when no worker is free the request is sent from
+        the calling thread without hedging, and a hedge is only sent when a
+        worker is free. Every hedged request uses an extra connection, keep
+        POOL_MAXSIZE of the model large enough for them.
+
+        Usage:
+            class Model(ModelSessionMixin):
+                HEDGED_REQUESTS = HedgedRequests(percentile=0.9)
+
+        Args:
+            delay (int | float, optional): Seconds after which the request is
+                hedged. Defaults to the latency percentile of the host.
+            percentile (float, optional): The latency percentile (0-1) used as
+                delay. Defaults to 0.95.
+            min_samples (int, optional): The number of latencies needed before
+                requests are hedged. Defaults to 20.
+            max_workers (int, optional): The number of threads that send the
+                attempts of hedged requests. Defaults to 20.
+            methods (tuple, optional): The methods that are hedged. Defaults to
+                ("GET", "HEAD").
+        """
+        self.delay = delay
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.methods = tuple(methods)
+        self.max_workers = max_workers
+        self.latencies = LatencyTracker()
+        self._lock = threading.Lock()
+        self._stats = collections.Counter()
+        self._start_executor()
+
+    def _start_executor(self):
+        # The worker threads of a parent process don't exist in a forked
+        # child, so every process starts its own pool.
+        self._pid = os.getpid()
+        self._workers = threading.BoundedSemaphore(self.max_workers)
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="hedged-request"
+        )
+
+    def _submit(self, send, request, kwargs):
+        """Sends the request from the pool, returns None when no worker is free."""
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._start_executor()
+        workers = self._workers
+        if not workers.acquire(blocking=False):
+            return None
+        future = self._executor.submit(send, request, **kwargs)
+        future.add_done_callback(lambda _future: workers.release())
+        return future
+
+    @staticmethod
+    def _deadline(timeout, delay):
+        """Returns how long to wait for the attempts, None to wait forever."""
+        if timeout is None:
+            return None
+        if isinstance(timeout, tuple):
+            if None in timeout:
+                return None
+            timeout = sum(timeout)
+        # Retries with backoff happen within a single attempt.
+        return delay + 3 * (timeout + 1)
+
+    @property
+    def stats(self):
+        """Returns the number of hedged requests and how often the hedge won."""
+        with self._lock:
+            return {"hedged": self._stats["hedged"], "wins": self._stats["wins"]}
+
+    def send(self, send, request, **kwargs):
+        if request.method not in self.methods or kwargs.get("stream"):
+            return send(request, **kwargs)
+
+        host = _host(request)
+        delay = self.delay
+        if delay is None:
+            delay = self.latencies.percentile(host, self.percentile, self.min_samples)
+        start = time.monotonic()
+        primary = None if delay is None else self._submit(send, request, kwargs)
+        if primary is None:
+            response = send(request, **kwargs)
+            self.latencies.record(host, time.monotonic() - start)
+            return response
+
+        attempts = [primary]
+        done, _pending = concurrent.futures.wait(attempts, timeout=delay)
+        if not done:
+            hedge = self._submit(send, request.copy(), kwargs)
+            if hedge is not None:
+                with self._lock:
+                    self._stats["hedged"] += 1
+                attempts.append(hedge)
+
+        error = None
+        try:
+            for future in concurrent.futures.as_completed(
+                attempts, timeout=self._deadline(kwargs.get("timeout"), delay)
+            ):
+                try:
+                    response = future.result()
+                except Exception as exc:
+                    error = exc
+                    continue
+                self.latencies.record(host, time.monotonic() - start)
+                if future is not attempts[0]:
+                    with self._lock:
+                        self._stats["wins"] += 1
+                for other in attempts:
+                    if other is not future:
+                        other.add_done_callback(_close_response)
+                return response
+        except concurrent.futures.TimeoutError:
+            for attempt in attempts:
+                attempt.add_done_callback(_close_response)
+            raise requests.exceptions.Timeout(
+                "No attempt of the hedged request to %s completed" % host,
+                request=request,
+            )
+        raise error
@@ -0,0 +1,175 @@
+import collections
+import threading
+import time
+
+import uweb3
+
+
+class ExactCount:
+    """Counts the total number of results for every query.
+
+    This is the default strategy used when yield_unlimited_total_first is True,
+    the total is retrieved with SQL_CALC_FOUND_ROWS together with the page.
+    """
+
+    def lookup(self, cls, connection, key):
+        """Returns the known total for the query key, or None to count it."""
+        return None
+
+    def store(self, cls, connection, key, total):
+        """Called with the exact total after it was counted by the database."""
+
+
+class CachedCount(ExactCount):
+    def __init__(self, ttl=60, maxsize=1024):
+        """Remembers exact totals for a while instead of counting every page.
+
+        Totals are keyed on the table, conditions, search term and joined
+        tables of the query, so paging through the same listing only counts
+        once per ttl.
+
+        Args:
+            ttl (int | float, optional): Number of seconds a total is reused.
+                Defaults to 60.
+            maxsize (int, optional): Maximum number of totals that are kept,
+                the least recently used total is dropped first. Defaults to 1024.
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._totals = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, cls, connection, key):
+        with self._lock:
+            try:
+                total, expires = self._totals[key]
+            except KeyError:
+                return None
+            if expires < time.monotonic():
+                del self._totals[key]
+                return None
+            self._totals.move_to_end(key)
+            return total
+
+    def store(self, cls, connection, key, total):
+        with self._lock:
+            self._totals[key] = total, time.monotonic() + self.ttl
+            self._totals.move_to_end(key)
+            while len(self._totals) > self.maxsize:
+                self._totals.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._totals.clear()
+
+
+class EstimatedCount(ExactCount):
+    def __init__(self, fallback=None):
+        """Uses the row estimate of the table for unfiltered listings.
+
+        For queries without conditions or search term the estimated number of
+        rows from information_schema is used, which does not touch the table
+        itself. The estimate can be off by a few percent for InnoDB tables.
+        Filtered queries and versioned records, where the number of rows
+        differs from the number of records, use the fallback strategy.
+
+        Args:
+            fallback (ExactCount, optional): The strategy for queries that can't
+                be estimated. Defaults to ExactCount.
+        """
+        self.fallback = fallback if fallback is not None else ExactCount()
+
+    def lookup(self, cls, connection, key):
+        table, conditions, search, tables = key
+        if (
+            conditions != repr(None)
+            or search
+            or tables != repr(None)
+            or issubclass(cls, uweb3.model.VersionedRecord)
+        ):
+            return self.fallback.lookup(cls, connection, key)
+        with connection as cursor:
+            result = cursor._Execute(
+                "SELECT `TABLE_ROWS` FROM `information_schema`.`TABLES` "
+                "WHERE `TABLE_SCHEMA` = DATABASE() AND `TABLE_NAME` = %s"
+                % connection.EscapeValues(table)
+            )
+        if not result or result[0][0] is None:
+            return self.fallback.lookup(cls, connection, key)
+        return int(result[0][0])
+
+    def store(self, cls, connection, key, total):
+        self.fallback.store(cls, connection, key, total)
+
+
+EXACT = ExactCount()
+
+
+def get_strategy(yield_unlimited_total_first):
+    """Returns the count strategy for a yield_unlimited_total_first argument.
+
+    True selects the exact count, False or None disables counting and count
+    strategy instances are returned as is.
+    """
+    if yield_unlimited_total_first is True:
+        return EXACT
+    if not yield_unlimited_total_first:
+        return None
+    return yield_unlimited_total_first
+
+
+class Total:
+    def __init__(
+        self, cls, connection, yield_unlimited_total_first, conditions, search, tables
+    ):
+        """The total of a single List call, known up front or to be counted.
+
+        The arguments are those List was called with, the total is looked up
+        with the count strategy right away.
+        """
+        self.cls = cls
+        self.connection = connection
+        self.counter = get_strategy(yield_unlimited_total_first)
+        self.key = None
+        self.value = None
+        if self.counter:
+            self.key = count_key(cls, conditions, search, tables)
+            self.value = self.counter.lookup(cls, connection, self.key)
+        # Whether the database has to count the total for this call.
+        self.counted = bool(self.counter) and self.value is None
+
+    def __bool__(self):
+        return self.counter is not None
+
+    @property
+    def cache_hit(self):
+        """Whether the strategy knew the total, None when it is not requested."""
+        return not self.counted if self.counter else None
+
+    def found_rows(self, limit):
+        """Whether the query should count the rows that the limit leaves out."""
+        return self.counted and limit is not None
+
+    def resolve(self, found_rows, rows):
+        """Returns the total, storing it with the strategy once it is counted.
+
+        Args:
+            found_rows (int): The result of SELECT FOUND_ROWS(), None when the
+                query was not limited.
+            rows (int): The number of records the query returned.
+        """
+        if self.value is None:
+            # Without a limit every record was selected.
+            self.value = rows if found_rows is None else found_rows
+            self.counter.store(self.cls, self.connection, self.key, self.value)
+        return self.value
+
+
+def count_key(cls, conditions, search, tables):
+    """Returns the key that identifies the total of a query."""
+    return (
+        cls.TableName(),
+        repr(conditions or None),
+        search.strip() if search else None,
+        repr(tables or None),
+    )
@@ -0,0 +1,174 @@
+import collections
+import contextlib
+import contextvars
+import re
+import threading
+import time
+
+_LITERALS = re.compile(
+    r"""'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*"|(?<![\w`.])-?\d+(?:\.\d+)?\b"""
+)
+_VALUE_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+
+_listeners = []
+_listeners_lock = threading.Lock()
+_collectors = contextvars.ContextVar("query_collectors", default=())
+
+
+def shape(sql):
+    """Returns the SQL with its literals replaced, so similar queries match.
+
+    String and number literals become ?, lists of values become (...) and
+    whitespace is collapsed.
+    """
+    sql = _LITERALS.sub("?", sql)
+    sql = _VALUE_LISTS.sub("(...)", sql)
+    return " ".join(sql.split())
+
+
+class QueryRecord:
+    def __init__(self, model, method, sql, duration, rows, counted, cache_hit):
+        """A single query executed by a model.
+
+        Attributes:
+            model (str): The name of the model class.
+            method (str): The model method that executed the query.
+            sql (str): The query, None when it was not recorded.
+            duration (float): Seconds spent executing the query and reading
+                its rows. For streamed queries this includes the time the
+                records were being consumed.
+            rows (int): The number of rows returned.
+            counted (bool): Whether the total number of results was counted.
+            cache_hit (bool): Whether the total was answered by the count
+                strategy, None when no total was requested.
+        """
+        self.model = model
+        self.method = method
+        self.sql = sql
+        self.duration = duration
+        self.rows = rows
+        self.counted = counted
+        self.cache_hit = cache_hit
+
+    @property
+    def shape(self):
+        return shape(self.sql) if self.sql else None
+
+    def __repr__(self):
+        return "<%s %s.%s %.2fms rows=%d>" % (
+            type(self).__name__,
+            self.model,
+            self.method,
+            self.duration * 1000,
+            self.rows,
+        )
+
+
+class QueryLog:
+    def __init__(self):
+        """The queries that were executed within a collect() block."""
+        self.queries = []
+
+    def __len__(self):
+        return len(self.queries)
+
+    def __iter__(self):
+        return iter(self.queries)
+
+    @property
+    def total_time(self):
+        return sum(query.duration for query in self.queries)
+
+    def slowest(self, count=10):
+        """Returns the slowest queries, slowest first."""
+        return sorted(self.queries, key=lambda query: query.duration, reverse=True)[
+            :count
+        ]
+
+    def summary(self):
+        """Returns the number of queries, time and rows per query shape."""
+        summary = collections.defaultdict(
+            lambda: {"queries": 0, "time": 0.0, "rows": 0}
+        )
+        for query in self.queries:
+            totals = summary[query.shape or "%s.%s" % (query.model, query.method)]
+            totals["queries"] += 1
+            totals["time"] += query.duration
+            totals["rows"] += query.rows
+        return dict(summary)
+
+
+def add_listener(callback):
+    """Calls callback with the QueryRecord of every query that is executed.
+
+    Listeners are called synchronously from the thread that executed the query,
+    so they should return quickly.
+    """
+    with _listeners_lock:
+        _listeners.append(callback)
+
+
+def remove_listener(callback):
+    with _listeners_lock:
+        if callback in _listeners:
+            _listeners.remove(callback)
+
+
+@contextlib.contextmanager
+def collect():
+    """Collects the queries executed in the current context.
+
+    Usage, for example to log the slow queries of a single request:
+        with instrumentation.collect() as queries:
+            response = handler()
+        if queries.total_time > 0.5:
+            log(queries.slowest(5))
+    """
+    log = QueryLog()
+    token = _collectors.set(_collectors.get() + (log,))
+    try:
+        yield log
+    finally:
+        _collectors.reset(token)
+
+
+def enabled():
+    """Returns whether there is anyone to report queries to."""
+    return bool(_listeners or _collectors.get())
+
+
+def record(cls, method, sql, duration, rows, counted=False, cache_hit=None):
+    """Reports a query executed by the model class cls to the listeners."""
+    query = QueryRecord(cls.__name__, method, sql, duration, rows, counted, cache_hit)
+    for log in _collectors.get():
+        log.queries.append(query)
+    for listener in list(_listeners):
+        listener(query)
+    return query
+
+
+def record_list(cls, sql, duration, rows, total):
+    """Reports a List query, with the counting details of a counting.Total."""
+    if enabled():
+        record(
+            cls,
+            "List",
+            sql,
+            duration,
+            rows,
+            counted=total.counted,
+            cache_hit=total.cache_hit,
+        )
+
+
+def instrument_stream(cls, method, sql, records):
+    """Yields the records and reports the query once they have been consumed."""
+    start = time.perf_counter()
+    rows = 0
+    try:
+        for item in records:
+            rows += 1
+            yield item
+    finally:
+        if enabled():
+            record(cls, method, sql, time.perf_counter() - start, rows)
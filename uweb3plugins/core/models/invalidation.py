@@ -0,0 +1,48 @@
+import threading
+import weakref
+
+_listeners = []
+_listeners_lock = threading.Lock()
+
+
+def add_listener(callback):
+    """Calls callback with the table name whenever a record is written.
+
+    RichModel and RichVersionedRecord report every Create, Save and Delete,
+    which lets caches drop what they stored for the table. Only writes made by
+    the current process are reported, caches shared between processes should
+    rely on a ttl as well.
+    """
+    with _listeners_lock:
+        _listeners.append(callback)
+
+
+def add_weak_listener(method):
+    """Like add_listener, but does not keep the object of the method alive.
+
+    The listener removes itself once the object is garbage collected, so
+    caches created per request or per test don't pile up in the registry.
+    """
+    reference = weakref.WeakMethod(method)
+
+    def listener(table):
+        bound = reference()
+        if bound is None:
+            remove_listener(listener)
+        else:
+            bound(table)
+
+    add_listener(listener)
+    return listener
+
+
+def remove_listener(callback):
+    with _listeners_lock:
+        if callback in _listeners:
+            _listeners.remove(callback)
+
+
+def notify(table):
+    """Reports a write to the given table to all listeners."""
+    for listener in list(_listeners):
+        listener(table)
@@ -0,0 +1,166 @@
+import base64
+import binascii
+import json
+
+import uweb3
+
+# The only value types a token may contain, they end up in the seek condition.
+TOKEN_TYPES = (str, int, float, bool)
+
+
+def normalize_order(order):
+    """Returns the order as a list of (field, descending) tuples."""
+    if not order:
+        return []
+    if isinstance(order, str):
+        order = [order]
+    return [
+        (rule, False) if isinstance(rule, str) else (rule[0], bool(rule[1]))
+        for rule in order
+    ]
+
+
+def reverse_order(order):
+    """Returns the order with the direction of every field flipped."""
+    return [(field, not descending) for field, descending in normalize_order(order)]
+
+
+def seek_condition(connection, order, values):
+    """Builds the condition that selects the rows sorting after `values`.
+
+    This is used for keyset (seek) pagination, instead of skipping `offset`
+    rows the database only reads the rows after the last row of the previous
+    page. With an index on the sort fields deep pages are as cheap as the
+    first page.
+
+    For an order of (a ASC, b DESC) and values (x, y) this results in:
+      ((`a` > x) OR (`a` = x AND `b` < y))
+
+    The sort fields should not contain NULL values, those rows can't be
+    compared and would be skipped.
+    """
+    order = normalize_order(order)
+    if len(order) != len(values):
+        raise ValueError("A seek value is required for every order field.")
+    fields = [connection.EscapeField(field) for field, _descending in order]
+    values = [connection.EscapeValues(value) for value in values]
+    clauses = []
+    for index, (_field, descending) in enumerate(order):
+        parts = [
+            "%s = %s" % (field, value)
+            for field, value in zip(fields[:index], values[:index])
+        ]
+        parts.append(
+            "%s %s %s" % (fields[index], "<" if descending else ">", values[index])
+        )
+        clauses.append("(%s)" % " AND ".join(parts))
+    return "(%s)" % " OR ".join(clauses)
+
+
+def extend_conditions(conditions, *extra):
+    """Returns the conditions with the extra conditions added.
+
+    The conditions of List can be None, a string or a list of strings. A new
+    list is returned, the list of the caller is never extended.
+    """
+    if not conditions:
+        return list(extra)
+    if type(conditions) == list:
+        return conditions + list(extra)
+    return [conditions, *extra]
+
+
+def add_seek_condition(connection, conditions, order, seek):
+    """Returns the conditions extended with the seek condition, if any."""
+    if seek is None:
+        return conditions
+    return extend_conditions(conditions, seek_condition(connection, order, seek))
+
+
+def foreign_fields(order, table):
+    """Returns the order fields that belong to another table than `table`.
+
+    The values of those fields are not part of the records, so they can't be
+    used for keyset pagination.
+    """
+    return [
+        field
+        for field, _descending in normalize_order(order)
+        if "." in field and field.rsplit(".", 1)[0].strip("`") != table
+    ]
+
+
+def record_values(record, order):
+    """Returns the values of the order fields for the given record.
+
+    Foreign relations that have already been loaded are reduced to their key
+    so the value can be compared against the column again. Fields of other
+    tables raise a ValueError, see foreign_fields.
+    """
+    values = []
+    if hasattr(record, "TableName"):
+        joined = foreign_fields(order, record.TableName())
+        if joined:
+            raise ValueError(
+                "Can't read the joined sort fields %s from the record" % joined
+            )
+    for field, _descending in normalize_order(order):
+        column = field.rsplit(".", 1)[-1].strip("`")
+        if isinstance(record, dict):
+            value = dict.get(record, column)
+        else:
+            value = getattr(record, column)
+        if isinstance(value, uweb3.model.BaseRecord):
+            value = value.key
+        values.append(value)
+    return values
+
+
+def encode_token(values):
+    """Encodes a list of sort values into an URL safe token."""
+    data = json.dumps(values, default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(data.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_token(token):
+    """Decodes a token created by encode_token, returns None when invalid."""
+    if not token:
+        return None
+    try:
+        data = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(data.decode("utf-8"))
+    except (binascii.Error, ValueError):
+        return None
+    if not isinstance(values, list) or not all(
+        value is None or isinstance(value, TOKEN_TYPES) for value in values
+    ):
+        return None
+    return values
+
+
+class KeysetPage:
+    def __init__(self, after=None, before=None, next_token=None, previous_token=None):
+        """Describes the position of a keyset paginated page.
+
+        Args:
+            after (str, optional): The token the current page was requested with
+                when navigating forward.
+            before (str, optional): The token the current page was requested
+                with when navigating backward.
+            next_token (str, optional): Token for the page after this one,
+                None when this is the last page.
+            previous_token (str, optional): Token for the page before this one,
+                None when this is the first page.
+        """
+        self.after = after
+        self.before = before
+        self.next_token = next_token
+        self.previous_token = previous_token
+
+    @property
+    def has_next(self):
+        return self.next_token is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_token is not None
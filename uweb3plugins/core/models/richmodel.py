@@ -1,7 +1,16 @@
+import time
 from typing import Generator, Type, TypeVar
 
 import uweb3
 from uweb3.libs.sqltalk.mysql.connection import Connection
+from uweb3plugins.core.models import (
+    counting,
+    instrumentation,
+    invalidation,
+    keyset,
+    streaming,
+    textsearch,
+)
 
 T = TypeVar("T", bound="RichModel")
 
@@ -10,6 +19,35 @@ class RichModel(uweb3.model.Record):
     """Provides a richer uweb Record class."""
 
     SEARCHABLE_COLUMNS = []
+    # Either "like" or "fulltext". The fulltext backend searches the columns in
+    # FULLTEXT_INDEXES with MATCH ... AGAINST and orders by relevance, the other
+    # searchable columns are still searched with LIKE.
+    SEARCH_BACKEND = "like"
+    # Groups of SEARCHABLE_COLUMNS that are each covered by a FULLTEXT index,
+    # for example (("name", "email"), ("client.name",)).
+    FULLTEXT_INDEXES = ()
+
+    def Save(self, *args, **kwargs):
+        result = super().Save(*args, **kwargs)
+        invalidation.notify(self.TableName())
+        return result
+
+    @classmethod
+    def Create(cls, *args, **kwargs):
+        record = super().Create(*args, **kwargs)
+        invalidation.notify(cls.TableName())
+        return record
+
+    def Delete(self, *args, **kwargs):
+        result = super().Delete(*args, **kwargs)
+        invalidation.notify(self.TableName())
+        return result
+
+    @classmethod
+    def DeletePrimary(cls, *args, **kwargs):
+        result = super().DeletePrimary(*args, **kwargs)
+        invalidation.notify(cls.TableName())
+        return result
 
     def PagedChildren(self, classname, *args, **kwargs):
         """Return child objects with extra argument options."""
@@ -34,6 +72,9 @@ class RichModel(uweb3.model.Record):
         tables=None,
         escape=True,
         fields=None,
+        seek=None,
+        stream=False,
+        batch_size=1000,
     ) -> Generator[T, None, None]:
         """Yields a Record object for every table entry.
 
@@ -53,19 +94,41 @@ class RichModel(uweb3.model.Record):
             Defines the fields on which the output should be ordered. This should
             be a list of strings or 2-tuples. The string or first item indicates the
             field, the second argument defines descending order (desc. if True).
-          % yield_unlimited_total_first: bool ~~ False
+          % yield_unlimited_total_first: bool / counting.ExactCount ~~ False
             Instead of yielding only Record objects, the first item returned is the
             number of results from the query if it had been executed without limit.
+            A count strategy from the counting module can be passed to reuse cached
+            or estimated totals instead of counting on every call.
           % search: str
             Specifies what string should be searched for in the default searchable
-            database columns.
+            database columns. With the fulltext search backend the results are
+            ordered by relevance when no order is given.
+          % seek: iterable ~~ None
+            Keyset pagination, the values of the order fields of the last record
+            of the previous page. Only records sorting after these values are
+            yielded. Use this instead of offset for deep pages.
+          % stream: bool ~~ False
+            Reads the results with an unbuffered server side cursor and yields the
+            records batch by batch as they arrive, keeping memory bounded for large
+            exports. No other queries can be executed on the connection while the
+            records are being iterated, so foreign relations can't be lazy loaded.
+            Can't be combined with yield_unlimited_total_first.
+          % batch_size: int ~~ 1000
+            The number of rows fetched, hydrated and cached at once when streaming.
 
         Yields:
           Record: Database record abstraction class.
         """
+        total = counting.Total(
+            cls, connection, yield_unlimited_total_first, conditions, search, tables
+        )
+        if stream and total:
+            raise ValueError("Totals can't be counted while streaming records.")
         if not tables:
             tables = [cls.TableName()]
         group = None
+        relevance = None
+        default_fields = fields is None
         if fields is None:
             fields = "%s.*" % cls.TableName()
         if search:
@@ -78,126 +141,64 @@ class RichModel(uweb3.model.Record):
                     else cls._PRIMARY_KEY
                 ),
             )
-            tables, newconditions = cls._GetColumnData(tables, search)
-            if conditions:
-                if type(conditions) == list:
-                    conditions.extend(newconditions)
-                else:
-                    newconditions.append(conditions)
-                    conditions = newconditions
-            else:
-                conditions = newconditions
+            tables, newconditions, relevance = cls._GetColumnData(
+                connection, tables, search
+            )
+            conditions = keyset.extend_conditions(conditions, *newconditions)
+        if relevance and not order and default_fields and escape:
+            # The relevance expression can't pass through the field escaping, so
+            # the other parts of the query are escaped up front.
+            fields = "`%s`.*, %s AS `%s`" % (
+                cls.TableName(),
+                relevance,
+                textsearch.RELEVANCE_FIELD,
+            )
+            tables = ["`%s`" % table for table in tables]
+            group = "`%s`.`%s`" % tuple(group.split("."))
+            order = [(textsearch.RELEVANCE_FIELD, True)]
+            escape = False
+        conditions = keyset.add_seek_condition(connection, conditions, order, seek)
+        totalcount = total.found_rows(limit)
         with connection as cursor:
-            if hasattr(cls, "_addToCache"):
-                connection.modelcache["_stats"]["queries"].append(
-                    "%s VersionedRecord.List" % cls.TableName()
-                )
-            records = cursor.Select(
-                fields=fields,
-                table=tables,
-                conditions=conditions,
+            query = streaming.select_query(
+                connection,
+                cursor,
+                fields,
+                tables,
+                conditions,
+                order=order,
                 limit=limit,
                 offset=offset,
-                order=order,
-                totalcount=yield_unlimited_total_first,
-                escape=escape,
                 group=group,
+                escape=escape,
+                totalcount=totalcount,
             )
-        if yield_unlimited_total_first:
-            yield records.affected
-        records = [cls(connection, record) for record in list(records)]
-        for record in records:
-            yield record
-        if hasattr(cls, "_addToCache"):
-            # and not fields or fields == '*':
-            # dont cache partial objects
-            list(cls._cacheListPreseed(records))
-
-    @classmethod
-    def List(
-        cls: Type[T],
-        connection: Connection,
-        conditions=None,
-        limit=None,
-        offset=None,
-        order=None,
-        yield_unlimited_total_first=False,
-        search=None,
-        tables=None,
-        escape=True,
-        fields=None,
-    ) -> Generator[T, None, None]:
-        """Yields a Record object for every table entry.
-
-        Arguments:
-          @ connection: object
-            Database connection to use.
-          % conditions: str / iterable ~~ None
-            Optional query portion that will be used to limit the list of results.
-            If multiple conditions are provided, they are joined on an 'AND' string.
-          % limit: int ~~ None
-            Specifies a maximum number of items to be yielded. The limit happens on
-            the database side, limiting the query results.
-          % offset: int ~~ None
-            Specifies the offset at which the yielded items should start. Combined
-            with limit this enables proper pagination.
-          % order: iterable of str/2-tuple
-            Defines the fields on which the output should be ordered. This should
-            be a list of strings or 2-tuples. The string or first item indicates the
-            field, the second argument defines descending order (desc. if True).
-          % yield_unlimited_total_first: bool ~~ False
-            Instead of yielding only Record objects, the first item returned is the
-            number of results from the query if it had been executed without limit.
-          % search: str
-            Specifies what string should be searched for in the default searchable
-            database columns.
-
-        Yields:
-          Record: Database record abstraction class.
-        """
-        if not tables:
-            tables = [cls.TableName()]
-        group = None
-        if fields is None:
-            fields = "%s.*" % cls.TableName()
-        if search:
-            search = search.strip()
-            group = "%s.%s" % (
-                cls.TableName(),
-                (
-                    cls.RecordKey()
-                    if getattr(cls, "RecordKey", None)
-                    else cls._PRIMARY_KEY
-                ),
+        if stream:
+            yield from instrumentation.instrument_stream(
+                cls,
+                "List",
+                query,
+                streaming.stream_records(cls, connection, query, batch_size),
             )
-            tables, newconditions = cls._GetColumnData(tables, search)
-            if conditions:
-                if type(conditions) == list:
-                    conditions.extend(newconditions)
-                else:
-                    newconditions.append(conditions)
-                    conditions = newconditions
-            else:
-                conditions = newconditions
+            return
         with connection as cursor:
             if hasattr(cls, "_addToCache"):
                 connection.modelcache["_stats"]["queries"].append(
                     "%s VersionedRecord.List" % cls.TableName()
                 )
-            records = cursor.Select(
-                fields=fields,
-                table=tables,
-                conditions=conditions,
-                limit=limit,
-                offset=offset,
-                order=order,
-                totalcount=yield_unlimited_total_first,
-                escape=escape,
-                group=group,
+            start = time.perf_counter()
+            records = cursor.Execute(query)
+            found_rows = (
+                cursor._Execute("SELECT FOUND_ROWS()")[0][0] if totalcount else None
             )
-        if yield_unlimited_total_first:
-            yield records.affected
-        records = [cls(connection, record) for record in list(records)]
+            duration = time.perf_counter() - start
+        records = [
+            cls(connection, textsearch.strip_relevance(record))
+            for record in list(records)
+        ]
+        instrumentation.record_list(cls, query, duration, len(records), total)
+        if total:
+            yield total.resolve(found_rows, len(records))
         for record in records:
             yield record
         if hasattr(cls, "_addToCache"):
@@ -206,43 +207,26 @@ class RichModel(uweb3.model.Record):
             list(cls._cacheListPreseed(records))
 
     @classmethod
-    def _GetColumnData(cls, tables, search):
-        """Extracts table information from the searchable columns."""
-        conditions = []
-        # XXX search needs to be escaped properly
-        condition = 'like "%%%s%%" or ' % search
-        searchcondition = ""
-        for column in cls.SEARCHABLE_COLUMNS:
-            columndata = column.split(".")
-            if len(columndata) == 2:
-                classname = columndata[0]
-                table = cls._SUBTYPES[classname]
-                fkey = cls._FOREIGN_RELATIONS.get(classname, False)
-                if fkey and fkey.get("LookupKey", False):
-                    key = fkey.get("LookupKey")
-                elif getattr(table, "RecordKey", None):
-                    key = table.RecordKey()
-                else:
-                    key = table._PRIMARY_KEY
-                conditions.append(
-                    "`%s`.`%s` = %s.%s"
-                    % (cls.TableName(), table.TableName(), table.TableName(), key)
-                )
-                if (
-                    table.TableName() not in tables
-                    and table.TableName() != cls.TableName()
-                ):
-                    tables.append(table.TableName())
-                searchcondition += "`%s`.`%s` %s" % (
-                    table.TableName(),
-                    columndata[1],
-                    condition,
-                )
-            else:
-                searchcondition += "`%s`.`%s` %s" % (cls.TableName(), column, condition)
-        if searchcondition:
-            searchcondition = (
-                "(%s)" % searchcondition[:-4]
-            )  # TODO use ' or '.join on search conditions instead
-            conditions.append(searchcondition)
-        return tables, conditions
+    def _GetColumnData(cls, connection, tables, search):
+        """Extracts table information from the searchable columns.
+
+        Returns:
+          tuple: The tables, the conditions and the relevance expression, which
+            is None unless a FULLTEXT index is searched.
+        """
+        fulltext = cls.FULLTEXT_INDEXES if cls.SEARCH_BACKEND == "fulltext" else ()
+        plan = textsearch.get_plan(cls, cls._SearchForeignTable)
+        return plan.Bind(connection, tables, search, fulltext)
+
+    @classmethod
+    def _SearchForeignTable(cls, name):
+        """Returns the foreign record class and join key for a searched column."""
+        table = cls._SUBTYPES[name]
+        fkey = cls._FOREIGN_RELATIONS.get(name, False)
+        if fkey and fkey.get("LookupKey", False):
+            key = fkey.get("LookupKey")
+        elif getattr(table, "RecordKey", None):
+            key = table.RecordKey()
+        else:
+            key = table._PRIMARY_KEY
+        return table, key
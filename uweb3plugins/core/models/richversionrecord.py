@@ -1,7 +1,17 @@
+import sys
+import time
 from typing import Generator, Type, TypeVar
 
 import uweb3
 from uweb3.libs.sqltalk.mysql.connection import Connection
+from uweb3plugins.core.models import (
+    counting,
+    instrumentation,
+    invalidation,
+    keyset,
+    streaming,
+    textsearch,
+)
 
 T = TypeVar("T", bound="RichVersionedRecord")
 
@@ -10,6 +20,143 @@ class RichVersionedRecord(uweb3.model.VersionedRecord):
     """Provides a richer uweb VersionedRecord class."""
 
     SEARCHABLE_COLUMNS = []
+    # Either "like" or "fulltext". The fulltext backend searches the columns in
+    # FULLTEXT_INDEXES with MATCH ... AGAINST and orders by relevance, the other
+    # searchable columns are still searched with LIKE.
+    SEARCH_BACKEND = "like"
+    # Groups of SEARCHABLE_COLUMNS that are each covered by a FULLTEXT index,
+    # for example (("name", "email"), ("client.name",)).
+    FULLTEXT_INDEXES = ()
+    # How List selects the latest version of every record, see _LatestVersions.
+    LATEST_VERSION_STRATEGY = "groupby"
+    # Table that holds a pointer to the latest version of every record, used by
+    # the "pointer" strategy and kept up to date when records are created,
+    # saved or deleted:
+    #   CREATE TABLE `<name>` (
+    #     `<record key>` <record key type> NOT NULL PRIMARY KEY,
+    #     `version` <primary key type> NOT NULL)
+    # Records that existed before the table was set up are not listed until
+    # BackfillLatestVersions has been run once.
+    LATEST_VERSION_TABLE = None
+
+    def Save(self, *args, **kwargs):
+        result = super().Save(*args, **kwargs)
+        self._UpdateLatestVersionPointer()
+        invalidation.notify(self.TableName())
+        return result
+
+    @classmethod
+    def Create(cls, *args, **kwargs):
+        record = super().Create(*args, **kwargs)
+        record._UpdateLatestVersionPointer()
+        invalidation.notify(cls.TableName())
+        return record
+
+    def Delete(self, *args, **kwargs):
+        result = super().Delete(*args, **kwargs)
+        self._RefreshLatestVersionPointer(self.connection, self[self.RecordKey()])
+        invalidation.notify(self.TableName())
+        return result
+
+    @classmethod
+    def DeletePrimary(cls, connection, pkey_value):
+        record_key = None
+        if cls.LATEST_VERSION_TABLE:
+            # The record key of the version is gone once the row is deleted.
+            with connection as cursor:
+                rows = cursor._Execute(
+                    "SELECT `%s` FROM `%s` WHERE `%s` = %s"
+                    % (
+                        cls.RecordKey(),
+                        cls.TableName(),
+                        cls._PRIMARY_KEY,
+                        connection.EscapeValues(pkey_value),
+                    )
+                )
+            if rows:
+                record_key = rows[0][0]
+        result = super().DeletePrimary(connection, pkey_value)
+        if record_key is not None:
+            cls._RefreshLatestVersionPointer(connection, record_key)
+        invalidation.notify(cls.TableName())
+        return result
+
+    @classmethod
+    def BackfillLatestVersions(cls, connection):
+        """Points LATEST_VERSION_TABLE to the latest version of every record.
+
+        Run this once after creating the table, records that were saved before
+        have no pointer and are not listed by the "pointer" strategy.
+        """
+        if not cls.LATEST_VERSION_TABLE:
+            raise ValueError("%s has no LATEST_VERSION_TABLE" % cls.__name__)
+        with connection as cursor:
+            cursor.Execute(
+                """
+          INSERT INTO `%(pointers)s` (`%(record_key)s`, `version`)
+          SELECT `%(record_key)s`, MAX(`%(primary)s`)
+          FROM `%(table)s`
+          GROUP BY `%(record_key)s`
+          ON DUPLICATE KEY UPDATE `version` = GREATEST(`version`, VALUES(`version`))
+          """
+                % {
+                    "pointers": cls.LATEST_VERSION_TABLE,
+                    "record_key": cls.RecordKey(),
+                    "primary": cls._PRIMARY_KEY,
+                    "table": cls.TableName(),
+                }
+            )
+
+    @classmethod
+    def _RefreshLatestVersionPointer(cls, connection, record_key):
+        """Points the latest version table to the newest remaining version.
+
+        After a version is deleted the previous version becomes the latest,
+        like it does for the other strategies. The pointer is removed when no
+        version is left.
+        """
+        if not cls.LATEST_VERSION_TABLE:
+            return
+        values = {
+            "pointers": cls.LATEST_VERSION_TABLE,
+            "record_key": cls.RecordKey(),
+            "primary": cls._PRIMARY_KEY,
+            "table": cls.TableName(),
+            "key": connection.EscapeValues(record_key),
+        }
+        with connection as cursor:
+            cursor.Execute(
+                "DELETE FROM `%(pointers)s` WHERE `%(record_key)s` = %(key)s" % values
+            )
+            cursor.Execute(
+                """
+          INSERT INTO `%(pointers)s` (`%(record_key)s`, `version`)
+          SELECT `%(record_key)s`, MAX(`%(primary)s`)
+          FROM `%(table)s`
+          WHERE `%(record_key)s` = %(key)s
+          GROUP BY `%(record_key)s`
+          """
+                % values
+            )
+
+    def _UpdateLatestVersionPointer(self):
+        """Points the latest version table to the current version."""
+        if not self.LATEST_VERSION_TABLE:
+            return
+        with self.connection as cursor:
+            cursor.Execute(
+                """
+          INSERT INTO `%(pointers)s` (`%(record_key)s`, `version`)
+          VALUES (%(key)s, %(version)s)
+          ON DUPLICATE KEY UPDATE `version` = GREATEST(`version`, VALUES(`version`))
+          """
+                % {
+                    "pointers": self.LATEST_VERSION_TABLE,
+                    "record_key": self.RecordKey(),
+                    "key": self.connection.EscapeValues(self[self.RecordKey()]),
+                    "version": self.connection.EscapeValues(self.key),
+                }
+            )
 
     @classmethod
     def List(
@@ -24,6 +171,10 @@ class RichVersionedRecord(uweb3.model.VersionedRecord):
         tables=None,
         escape=True,
         fields=None,
+        seek=None,
+        stream=False,
+        batch_size=1000,
+        latest=None,
     ) -> Generator[T, None, None]:
         """Yields the latest Record for each versioned entry in the table.
 
@@ -43,18 +194,43 @@ class RichVersionedRecord(uweb3.model.VersionedRecord):
           Defines the fields on which the output should be ordered. This should
           be a list of strings or 2-tuples. The string or first item indicates the
           field, the second argument defines descending order (desc. if True).
-        % yield_unlimited_total_first: bool ~~ False
+        % yield_unlimited_total_first: bool / counting.ExactCount ~~ False
           Instead of yielding only Record objects, the first item returned is the
           number of results from the query if it had been executed without limit.
+          A count strategy from the counting module can be passed to reuse cached
+          totals instead of counting on every call.
         % search: str
           Specifies what string should be searched for in the default searchable
-          database columns.
+          database columns. With the fulltext search backend the results are
+          ordered by relevance when no order is given.
+        % seek: iterable ~~ None
+          Keyset pagination, the values of the order fields of the last record
+          of the previous page. Only records sorting after these values are
+          yielded. Use this instead of offset for deep pages.
+        % latest: str ~~ None
+          The strategy used to select the latest version of every record,
+          defaults to LATEST_VERSION_STRATEGY. See _LatestVersions.
+        % stream: bool ~~ False
+          Reads the results with an unbuffered server side cursor and yields the
+          records batch by batch as they arrive, keeping memory bounded for large
+          exports. No other queries can be executed on the connection while the
+          records are being iterated, so foreign relations can't be lazy loaded.
+          Can't be combined with yield_unlimited_total_first.
+        % batch_size: int ~~ 1000
+          The number of rows fetched, hydrated and cached at once when streaming.
 
         Yields:
           Record: The Record with the newest version for each versioned entry.
         """
+        total = counting.Total(
+            cls, connection, yield_unlimited_total_first, conditions, search, tables
+        )
+        if stream and total:
+            raise ValueError("Totals can't be counted while streaming records.")
         if not tables:
             tables = [cls.TableName()]
+        relevance = None
+        default_fields = not fields
         if not fields:
             fields = "%s.*" % cls.TableName()
         else:
@@ -65,51 +241,68 @@ class RichVersionedRecord(uweb3.model.VersionedRecord):
                     fields = connection.EscapeField(fields)
         if search:
             search = search.strip()
-            tables, newconditions = cls._GetColumnData(tables, search)
-            if conditions:
-                if type(conditions) == list:
-                    conditions.extend(newconditions)
-                else:
-                    newconditions.append(conditions)
-                    conditions = newconditions
-            else:
-                conditions = newconditions
+            tables, newconditions, relevance = cls._GetColumnData(
+                connection, tables, search
+            )
+            conditions = keyset.extend_conditions(conditions, *newconditions)
+        if relevance and not order and default_fields:
+            fields = "%s, %s AS `%s`" % (fields, relevance, textsearch.RELEVANCE_FIELD)
+            order = [(textsearch.RELEVANCE_FIELD, True)]
+        conditions = keyset.add_seek_condition(connection, conditions, order, seek)
         field_escape = connection.EscapeField if escape else lambda x: x
-        if yield_unlimited_total_first and limit is not None:
-            totalcount = "SQL_CALC_FOUND_ROWS"
-        else:
-            totalcount = ""
+        totalcount = total.found_rows(limit)
         with connection as cursor:
-            records = cursor.Execute(
+            versions, conditions = cls._LatestVersions(
+                cursor, latest, tables, conditions, field_escape
+            )
+            query = (
                 """
           SELECT %(totalcount)s %(fields)s
           FROM %(tables)s
-          JOIN (SELECT MAX(`%(primary)s`) AS `max`
-                FROM `%(table)s`
-                GROUP BY `%(record_key)s`) AS `versions`
-              ON (`%(table)s`.`%(primary)s` = `versions`.`max`)
+          %(versions)s
           WHERE %(conditions)s
           %(order)s
           %(limit)s
           """
                 % {
-                    "totalcount": totalcount,
-                    "primary": cls._PRIMARY_KEY,
-                    "record_key": cls.RecordKey(),
+                    "totalcount": "SQL_CALC_FOUND_ROWS" if totalcount else "",
                     "fields": fields,
-                    "table": cls.TableName(),
                     "tables": cursor._StringTable(tables, field_escape),
+                    "versions": versions,
                     "conditions": cursor._StringConditions(conditions, field_escape),
                     "order": cursor._StringOrder(order, field_escape),
                     "limit": cursor._StringLimit(limit, offset),
                 }
             )
-        if yield_unlimited_total_first and limit is not None:
-            with connection as cursor:
-                records.affected = cursor._Execute("SELECT FOUND_ROWS()")[0][0]
-            yield records.affected
+        if stream:
+            yield from instrumentation.instrument_stream(
+                cls,
+                "List",
+                query,
+                streaming.stream_records(
+                    cls,
+                    connection,
+                    query,
+                    batch_size,
+                    preseed=default_fields and len(tables) == 1,
+                ),
+            )
+            return
+        with connection as cursor:
+            start = time.perf_counter()
+            records = cursor.Execute(query)
+            found_rows = (
+                cursor._Execute("SELECT FOUND_ROWS()")[0][0] if totalcount else None
+            )
+            duration = time.perf_counter() - start
         # turn sqltalk rows into model
-        records = [cls(connection, record) for record in list(records)]
+        records = [
+            cls(connection, textsearch.strip_relevance(record))
+            for record in list(records)
+        ]
+        instrumentation.record_list(cls, query, duration, len(records), total)
+        if total:
+            yield total.resolve(found_rows, len(records))
         for record in records:
             yield record
         if (
@@ -120,37 +313,103 @@ class RichVersionedRecord(uweb3.model.VersionedRecord):
             list(cls._cacheListPreseed(records))
 
     @classmethod
-    def _GetColumnData(cls, tables, search):
-        """Extracts table information from the searchable columns."""
-        conditions = []
-        # XXX search needs to be escaped properly
-        condition = 'like "%%%s%%" or ' % search
-        searchcondition = ""
-        for column in cls.SEARCHABLE_COLUMNS:
-            columndata = column.split(".")
-            if len(columndata) == 2:
-                classname = columndata[0][0].upper() + columndata[0][1:]
-                table = globals()[classname]
-                if getattr(table, "RecordKey", None):
-                    key = table.RecordKey()
-                else:
-                    key = table._PRIMARY_KEY
-                conditions.append(
-                    "`%s`.`%s` = %s.%s"
-                    % (cls.TableName(), table.TableName(), table.TableName(), key)
-                )
-                if (
-                    table.TableName() not in tables
-                    and table.TableName() != cls.TableName()
-                ):
-                    tables.append(table.TableName())
-                searchcondition += "`%s`.`%s` %s" % (
-                    table.TableName(),
-                    columndata[1],
-                    condition,
+    def _LatestVersions(cls, cursor, strategy, tables, conditions, field_escape):
+        """Returns the join and conditions that limit a query to latest versions.
+
+        Strategies:
+          groupby: Joins the maximum primary key per record key, aggregated
+            over the whole table.
+          window: Like groupby, but ranks the versions with ROW_NUMBER().
+            Requires MySQL 8.
+          pushdown: Like groupby, but only aggregates the versions of records
+            that have a version matching the conditions. The conditions are
+            still applied to the latest version itself, so records whose
+            latest version does not match are not listed. Falls back to groupby
+            when the query joins other tables.
+          correlated: Checks per selected row whether it is the latest version
+            of its record. With an index on (record key, primary key) the cost
+            scales with the rows that are read instead of the table size.
+          pointer: Joins LATEST_VERSION_TABLE, which is kept up to date on save.
+
+        Returns:
+          tuple: The join clause and the conditions to use for the query.
+        """
+        strategy = strategy or cls.LATEST_VERSION_STRATEGY
+        values = {
+            "primary": cls._PRIMARY_KEY,
+            "record_key": cls.RecordKey(),
+            "table": cls.TableName(),
+        }
+        if strategy == "pushdown" and (not conditions or len(tables) > 1):
+            strategy = "groupby"
+
+        if strategy == "groupby":
+            versions = """JOIN (SELECT MAX(`%(primary)s`) AS `max`
+                FROM `%(table)s`
+                GROUP BY `%(record_key)s`) AS `versions`"""
+        elif strategy == "window":
+            versions = """JOIN (SELECT `%(primary)s` AS `max`
+                FROM (SELECT `%(primary)s`, ROW_NUMBER() OVER (
+                        PARTITION BY `%(record_key)s`
+                        ORDER BY `%(primary)s` DESC) AS `version_rank`
+                      FROM `%(table)s`) AS `ranked`
+                WHERE `version_rank` = 1) AS `versions`"""
+        elif strategy == "pushdown":
+            values["conditions"] = cursor._StringConditions(conditions, field_escape)
+            versions = """JOIN (SELECT MAX(`%(primary)s`) AS `max`
+                FROM `%(table)s`
+                WHERE `%(record_key)s` IN (
+                  SELECT `%(record_key)s` FROM `%(table)s` WHERE %(conditions)s)
+                GROUP BY `%(record_key)s`) AS `versions`"""
+        elif strategy == "correlated":
+            latest = (
+                "`%(table)s`.`%(primary)s` = ("
+                "SELECT MAX(`latest`.`%(primary)s`) FROM `%(table)s` AS `latest` "
+                "WHERE `latest`.`%(record_key)s` = `%(table)s`.`%(record_key)s`)"
+            ) % values
+            return "", keyset.extend_conditions(conditions, latest)
+        elif strategy == "pointer":
+            if not cls.LATEST_VERSION_TABLE:
+                raise ValueError(
+                    "The pointer strategy requires a LATEST_VERSION_TABLE on %s"
+                    % cls.__name__
                 )
-            else:
-                searchcondition += "`%s`.`%s` %s" % (cls.TableName(), column, condition)
-        searchcondition = "(%s)" % searchcondition[:-4]
-        conditions.append(searchcondition)
-        return tables, conditions
+            values["pointers"] = cls.LATEST_VERSION_TABLE
+            versions = "JOIN `%(pointers)s` AS `versions`"
+            return (
+                versions + " ON (`%(table)s`.`%(primary)s` = `versions`.`version`)"
+            ) % values, conditions
+        else:
+            raise ValueError("Unknown latest version strategy %r" % strategy)
+        versions += """
+              ON (`%(table)s`.`%(primary)s` = `versions`.`max`)"""
+        return versions % values, conditions
+
+    @classmethod
+    def _GetColumnData(cls, connection, tables, search):
+        """Extracts table information from the searchable columns.
+
+        Returns:
+          tuple: The tables, the conditions and the relevance expression, which
+            is None unless a FULLTEXT index is searched.
+        """
+        fulltext = cls.FULLTEXT_INDEXES if cls.SEARCH_BACKEND == "fulltext" else ()
+        plan = textsearch.get_plan(cls, cls._SearchForeignTable)
+        return plan.Bind(connection, tables, search, fulltext)
+
+    @classmethod
+    def _SearchForeignTable(cls, name):
+        """Returns the foreign record class and join key for a searched column.
+
+        The class is looked up in _SUBTYPES, or by its capitalized name in the
+        module that defines this model.
+        """
+        table = getattr(cls, "_SUBTYPES", {}).get(name)
+        if table is None:
+            classname = name[0].upper() + name[1:]
+            table = getattr(sys.modules[cls.__module__], classname)
+        if getattr(table, "RecordKey", None):
+            key = table.RecordKey()
+        else:
+            key = table._PRIMARY_KEY
+        return table, key
@@ -0,0 +1,85 @@
+import pymysql.cursors
+
+from uweb3plugins.core.models import textsearch
+
+
+def select_query(
+    connection,
+    cursor,
+    fields,
+    tables,
+    conditions,
+    order=None,
+    limit=None,
+    offset=None,
+    group=None,
+    escape=True,
+    totalcount=False,
+):
+    """Builds a SELECT statement with the string helpers of a sqltalk cursor.
+
+    With totalcount the statement asks MySQL to count the rows without the
+    limit, read them with SELECT FOUND_ROWS() right after executing it.
+    """
+    field_escape = connection.EscapeField if escape else lambda x: x
+    if type(fields) != str:
+        fields = ", ".join(field_escape(field) for field in fields)
+    return """
+          SELECT %(totalcount)s%(fields)s
+          FROM %(tables)s
+          WHERE %(conditions)s
+          %(group)s
+          %(order)s
+          %(limit)s
+          """ % {
+        "totalcount": "SQL_CALC_FOUND_ROWS " if totalcount else "",
+        "fields": fields,
+        "tables": cursor._StringTable(tables, field_escape),
+        "conditions": cursor._StringConditions(conditions, field_escape),
+        "group": "GROUP BY %s" % field_escape(group) if group else "",
+        "order": cursor._StringOrder(order, field_escape),
+        "limit": cursor._StringLimit(limit, offset),
+    }
+
+
+def fetch_batches(connection, query, batch_size):
+    """Executes the query on an unbuffered cursor and yields lists of rows.
+
+    The rows are read from the server as they are needed, so at most
+    batch_size rows are held in memory. No other queries can be executed on
+    the connection until all rows have been read or the generator is closed.
+    """
+    cursor = connection.cursor(pymysql.cursors.SSDictCursor)
+    try:
+        cursor.execute(query)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        # Closing an unbuffered cursor reads and discards the remaining rows.
+        cursor.close()
+
+
+def stream_records(cls, connection, query, batch_size, preseed=True):
+    """Yields records for the query, hydrated and cached one batch at a time.
+
+    Arguments:
+      @ cls: class
+        The record class the rows are turned into.
+      @ connection: object
+        Database connection to use.
+      @ query: str
+        The SELECT statement to execute.
+      @ batch_size: int
+        The number of rows that are fetched and hydrated at once.
+      % preseed: bool ~~ True
+        Adds every batch of records to the model cache, when the class has one.
+    """
+    preseed = preseed and hasattr(cls, "_addToCache")
+    for rows in fetch_batches(connection, query, batch_size):
+        records = [cls(connection, textsearch.strip_relevance(row)) for row in rows]
+        yield from records
+        if preseed:
+            list(cls._cacheListPreseed(records))
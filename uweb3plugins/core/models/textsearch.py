@@ -0,0 +1,165 @@
+RELEVANCE_FIELD = "_relevance"
+
+
+def escape_like(term):
+    """Escapes the LIKE wildcards in a search term."""
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def like_condition(connection, fields, term):
+    """Returns a condition that matches the term anywhere in one of the fields.
+
+    Arguments:
+      @ connection: object
+        Database connection used to escape the term.
+      @ fields: iterable of str
+        Already escaped field names.
+      @ term: str
+        The search term, wildcards in the term are matched literally.
+    """
+    value = connection.EscapeValues("%%%s%%" % escape_like(term))
+    return "(%s)" % " OR ".join("%s LIKE %s" % (field, value) for field in fields)
+
+
+def match_expression(connection, fields, term):
+    """Returns a MATCH ... AGAINST expression for a FULLTEXT index."""
+    return "MATCH (%s) AGAINST (%s IN NATURAL LANGUAGE MODE)" % (
+        ", ".join(fields),
+        connection.EscapeValues(term),
+    )
+
+
+def search_condition(connection, columns, fulltext_indexes, term):
+    """Builds the search condition and relevance expression for a search term.
+
+    Columns that are covered by one of the FULLTEXT indexes are searched with
+    MATCH ... AGAINST, which can use the index. All other columns fall back to
+    a LIKE condition.
+
+    Arguments:
+      @ connection: object
+        Database connection used to escape the term.
+      @ columns: dict
+        Maps the searchable column names to their escaped field names.
+      @ fulltext_indexes: iterable of iterables
+        Groups of column names that are covered by a single FULLTEXT index.
+      @ term: str
+        The search term.
+
+    Returns:
+      tuple: The condition, and the relevance expression or None when no
+        FULLTEXT index was used.
+    """
+    matches = []
+    covered = set()
+    for index in fulltext_indexes:
+        if not all(column in columns for column in index):
+            continue
+        matches.append(
+            match_expression(connection, [columns[column] for column in index], term)
+        )
+        covered.update(index)
+    conditions = list(matches)
+    remaining = [field for column, field in columns.items() if column not in covered]
+    if remaining:
+        conditions.append(like_condition(connection, remaining, term))
+    if not conditions:
+        return None, None
+    relevance = " + ".join(matches) if matches else None
+    if len(conditions) == 1:
+        return conditions[0], relevance
+    return "(%s)" % " OR ".join(conditions), relevance
+
+
+def strip_relevance(record):
+    """Removes the relevance field that was selected for ordering."""
+    if RELEVANCE_FIELD not in record:
+        return record
+    record = dict(record)
+    del record[RELEVANCE_FIELD]
+    return record
+
+
+class SearchPlan:
+    def __init__(self, searchable, tables, joins, columns):
+        """The tables, join conditions and fields needed to search a model.
+
+        The plan only depends on the model class, so it is built once and
+        reused for every search, only the search term is bound per query.
+
+        Args:
+            searchable (tuple): The SEARCHABLE_COLUMNS the plan was built for.
+            tables (list): The foreign tables that need to be joined.
+            joins (list): The conditions that join the foreign tables.
+            columns (dict): Maps the searchable columns to escaped fields.
+        """
+        self.searchable = searchable
+        self.tables = tables
+        self.joins = joins
+        self.columns = columns
+
+    @classmethod
+    def Build(cls, model, foreign_table):
+        """Builds the plan for a model.
+
+        Arguments:
+          @ model: class
+            The record class that is searched.
+          @ foreign_table: callable
+            Called with the first part of a dotted searchable column, returns
+            the foreign record class and the key it is joined on.
+        """
+        tables = []
+        joins = []
+        columns = {}
+        for column in model.SEARCHABLE_COLUMNS:
+            columndata = column.split(".")
+            if len(columndata) == 2:
+                table, key = foreign_table(columndata[0])
+                join = "`%s`.`%s` = %s.%s" % (
+                    model.TableName(),
+                    table.TableName(),
+                    table.TableName(),
+                    key,
+                )
+                if join not in joins:
+                    joins.append(join)
+                if (
+                    table.TableName() not in tables
+                    and table.TableName() != model.TableName()
+                ):
+                    tables.append(table.TableName())
+                columns[column] = "`%s`.`%s`" % (table.TableName(), columndata[1])
+            else:
+                columns[column] = "`%s`.`%s`" % (model.TableName(), column)
+        return cls(tuple(model.SEARCHABLE_COLUMNS), tables, joins, columns)
+
+    def Bind(self, connection, tables, term, fulltext_indexes=()):
+        """Returns the tables, conditions and relevance for a search term.
+
+        The given tables are not modified, a new list is returned.
+        """
+        tables = list(tables)
+        for table in self.tables:
+            if table not in tables:
+                tables.append(table)
+        conditions = list(self.joins)
+        condition, relevance = search_condition(
+            connection, self.columns, fulltext_indexes, term
+        )
+        if condition:
+            conditions.append(condition)
+        return tables, conditions, relevance
+
+
+def get_plan(model, foreign_table):
+    """Returns the cached search plan of a model class, building it once.
+
+    The plan is rebuilt when SEARCHABLE_COLUMNS changes, plans are never
+    shared between a class and its subclasses.
+    """
+    plan = model.__dict__.get("_search_plan")
+    if plan is None or plan.searchable != tuple(model.SEARCHABLE_COLUMNS):
+        plan = SearchPlan.Build(model, foreign_table)
+        model._search_plan = plan
+    return plan
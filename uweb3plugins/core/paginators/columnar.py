@@ -0,0 +1,131 @@
+from uweb3plugins.core.paginators import helpers
+from uweb3plugins.core.paginators.columns import ConstantAttr
+
+
+class ColumnarData:
+    def __init__(self, columns):
+        """Table items stored as columns instead of as a list of rows.
+
+        The columns are keyed on the attr of the table columns, dotted attrs
+        are used as a single key. Every column is a sequence, like a list or a
+        NumPy array, and all columns have the same length:
+
+            class RevenueTable(BasicTable):
+                month = Col("Month", "month")
+                client = LinkCol("Client", "client.name", href="/clients/{client.ID}")
+                revenue = Col("Revenue", "revenue", value_formatter=currency)
+
+            table = RevenueTable(
+                items=ColumnarData(
+                    {
+                        "month": months,
+                        "client.name": names,
+                        "client.ID": client_ids,
+                        "revenue": revenue,
+                    }
+                )
+            )
+
+        Columns retrieve and format their values a whole column at a time, the
+        cells are only zipped into rows when the table body is rendered.
+
+        Args:
+            columns (Mapping[str, Sequence]): The values per attr.
+        """
+        self.columns = dict(columns)
+        lengths = {len(values) for values in self.columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("All columns must have the same length, got %r" % lengths)
+        self._length = lengths.pop() if lengths else 0
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        """Yields a row view per row, for code that works on single items."""
+        for index in range(self._length):
+            yield ColumnarRow(self, index)
+
+    def column(self, attr, getter=None):
+        """Returns the values of a single column.
+
+        The getter is only used by ItemColumns, columnar data is looked up on
+        the attr itself.
+        """
+        if isinstance(attr, ConstantAttr):
+            return [attr.attr] * self._length
+        try:
+            return self.columns[attr]
+        except KeyError:
+            raise KeyError(
+                "There is no column %r in the columnar data" % attr
+            ) from None
+
+    def slice(self, start, stop):
+        """Returns the rows from start up to stop as new ColumnarData."""
+        return ColumnarData(
+            {attr: values[start:stop] for attr, values in self.columns.items()}
+        )
+
+    def take(self, indices):
+        """Returns the rows at the given indices as new ColumnarData."""
+        return ColumnarData(
+            {
+                attr: [values[index] for index in indices]
+                for attr, values in self.columns.items()
+            }
+        )
+
+
+class ItemColumns:
+    def __init__(self, items):
+        """Column wise access to a list of items, the counterpart of ColumnarData.
+
+        Used to render regular items a column at a time, so batch formatters
+        receive the values of all items in one call.
+        """
+        self.items = items
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def column(self, attr, getter=None):
+        """Returns the value of attr for every item.
+
+        Columns pass their compiled getter, so the attr is not compiled again
+        for every page or chunk that is rendered.
+        """
+        if getter is None:
+            getter = helpers.compile_attr(attr)
+        return list(map(getter, self.items))
+
+    def take(self, indices):
+        return ItemColumns([self.items[index] for index in indices])
+
+
+class ColumnarRow:
+    def __init__(self, data, index, prefix=""):
+        """Read only view on a single row of ColumnarData.
+
+        Dotted column keys can be retrieved as nested items, so "client.name"
+        is available as row["client"]["name"], like it is on a record.
+        """
+        self._data = data
+        self._index = index
+        self._prefix = prefix
+
+    def __getitem__(self, key):
+        key = self._prefix + key
+        try:
+            return self._data.columns[key][self._index]
+        except KeyError:
+            nested = key + "."
+            if any(attr.startswith(nested) for attr in self._data.columns):
+                return ColumnarRow(self._data, self._index, nested)
+            raise
+
+    def __repr__(self):
+        return "<%s %d>" % (type(self).__name__, self._index)
@@ -1,11 +1,27 @@
-from uweb3plugins.core.paginators.html_elements import Element
-from uweb3plugins.core.paginators import helpers
+from uweb3plugins.core.paginators.html_elements import Element, render_value
 import string
 
+from uweb3plugins.core.paginators import helpers
+
+
+def batch_formatter(formatter):
+    """Marks a value_formatter as batch capable.
+
+    A batch formatter is called with the list of column values of all rows
+    that are rendered together, a page or a streamed chunk, and returns the
+    list of formatted values in the same order. This allows a single bulk
+    lookup or a vectorized conversion instead of one call per cell:
 
-class MyFormatter(string.Formatter):
-    def get_field(self, field_name, args, kwargs):
-        return (self.get_value(field_name, args, kwargs), field_name)
+        @batch_formatter
+        def status_labels(values):
+            labels = Status.Labels(connection, set(values))
+            return [labels.get(value) for value in values]
+
+        class OrderTable(BasicTable):
+            status = Col("Status", "status", value_formatter=status_labels)
+    """
+    formatter.batch = True
+    return formatter
 
 
 class Col:
@@ -37,6 +53,8 @@ class Col:
                     value_formatter (Callable, optional): A callable that is called
                         right before the column value is renderd. The result of
                         the value_formatter will be used as value in the element.
+                        Formatters decorated with batch_formatter are called once
+                        with the list of values of all rendered rows instead.
 
                 Example usage:
                     class Items:
@@ -76,15 +94,97 @@ class Col:
         self.enabled = enabled
         self.value_formatter = value_formatter
 
-    def render(self, item):
-        value = helpers.get_attr(item, self.attr)
+    @property
+    def attr(self):
+        return self._attr
+
+    @attr.setter
+    def attr(self, attr):
+        self._attr = attr
+        self._getter = helpers.compile_attr(attr) if attr is not None else None
+
+    def attr_paths(self):
+        """Returns the attr paths this column retrieves from an item."""
+        if isinstance(self.attr, str):
+            return [self.attr]
+        return []
+
+    @property
+    def batch(self):
+        """Whether the value_formatter formats a list of values at once."""
+        return getattr(self.value_formatter, "batch", False)
+
+    def value(self, item):
+        """Retrieves the value for this column from the item and formats it."""
+        value = self._getter(item)
         if self.value_formatter:
+            if self.batch:
+                return self.format_values([value])[0]
             value = self.value_formatter(value)
-        return Element("td", value=value)
+        return value
+
+    def format_values(self, values):
+        """Formats a list of values, in one call for batch formatters."""
+        if not self.value_formatter:
+            return values
+        if not self.batch:
+            return [self.value_formatter(value) for value in values]
+        formatted = self.value_formatter(list(values))
+        if len(formatted) != len(values):
+            raise ValueError(
+                "Batch formatter of column %r returned %d values for %d rows"
+                % (self.name, len(formatted), len(values))
+            )
+        return formatted
+
+    def render(self, item):
+        return Element("td", value=self.value(item))
+
+    def cell(self, item):
+        """Renders the <td> markup for the item without building Elements."""
+        return "".join(("<td>", render_value(self.value(item)), "</td>"))
+
+    def cell_renderer(self):
+        """Returns the callable used by the compiled row renderer.
+
+        Subclasses that only override render() keep working, their cells are
+        rendered through the Element tree instead.
+        """
+        for klass in type(self).__mro__:
+            if "cell" in vars(klass):
+                return self.cell
+            if "render" in vars(klass):
+                break
+        return lambda item: self.render(item).render
+
+    def values(self, data):
+        """Retrieves and formats the values of a whole column of ColumnarData."""
+        return self.format_values(data.column(self.attr, self._getter))
+
+    def cells(self, data):
+        """Renders the <td> markup for every row of ColumnarData or ItemColumns."""
+        return [
+            "".join(("<td>", render_value(value), "</td>"))
+            for value in self.values(data)
+        ]
+
+    def cells_renderer(self):
+        """Returns the callable that renders a column of ColumnarData.
+
+        Subclasses that only override cell() or render() are rendered row by
+        row instead.
+        """
+        for klass in type(self).__mro__:
+            if "cells" in vars(klass):
+                return self.cells
+            if "cell" in vars(klass) or "render" in vars(klass):
+                break
+        render = self.cell_renderer()
+        return lambda data: [render(row) for row in data]
 
 
 class LinkCol(Col):
-    def __init__(self, name, attr, href, *args, **kwargs):
+    def __init__(self, name, attr, href, *args, quote=True, **kwargs):
         """Adds a row to the table of the following format:
             <td>
                 <a href="href">attr</a>
@@ -153,39 +253,67 @@ class LinkCol(Col):
                         </tr>
                     </tbody>
                 </table>
+
+        The href is parsed once when the column is defined. Values that are
+        substituted in the href are URL encoded, pass quote=False when the
+        retrieved values are already valid URLs.
         """
         super().__init__(name, attr, *args, **kwargs)
+        self.quote = quote
         self.href = href
 
-    def render(self, item):
-        # Retrieve all fields that should be replaced in the href.
-        # When no {replacements} are found just use the href as is.
-        field_names = [
-            name
-            for text, name, spec, conv in string.Formatter().parse(self.href)
-            if name
+    @property
+    def href(self):
+        return self._href
+
+    @href.setter
+    def href(self, href):
+        self._href = href
+        self._url = helpers.compile_url(href, quote=self.quote)
+
+    def url(self, item):
+        return self._url(item)
+
+    def attr_paths(self):
+        return super().attr_paths() + [
+            field
+            for _literal, field, _spec, _conversion in string.Formatter().parse(
+                self.href
+            )
+            if field
         ]
-        # This is some fuckery that allows formatting replacements like
-        # {replacement.key}, normally this is not allowed because
-        # dot syntax is not supported in fstrings. This is a workaround.
-        formatted_url = MyFormatter().vformat(
-            self.href, [], {name: helpers.get_attr(item, name) for name in field_names}
-        )
-        value = helpers.get_attr(item, self.attr)
-        if self.value_formatter:
-            value = self.value_formatter(value)
 
+    def render(self, item):
         return Element(
             "td",
             children=[
                 Element(
                     "a",
-                    value=value,
-                    attrs=f'href="{formatted_url}"',
+                    value=self.value(item),
+                    attrs=f'href="{self.url(item)}"',
                 )
             ],
         )
 
+    def cell(self, item):
+        return "".join(
+            (
+                '<td>\n  <a href="',
+                self.url(item),
+                '">',
+                render_value(self.value(item)),
+                "</a>\n</td>",
+            )
+        )
+
+    def cells(self, data):
+        return [
+            "".join(
+                ('<td>\n  <a href="', url, '">', render_value(value), "</a>\n</td>")
+            )
+            for url, value in zip(self._url.column(data), self.values(data))
+        ]
+
 
 class ConstantAttr:
     def __init__(self, value):
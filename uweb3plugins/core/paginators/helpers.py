@@ -1,3 +1,8 @@
+import collections.abc
+import functools
+import string
+import urllib.parse
+
 import uweb3plugins.core.paginators.columns as columns
 
 
@@ -27,11 +32,157 @@ def _recursive_getattr(item, keys):
         return _recursive_getattr(_single_get(item, keys[0]), keys[1:])
 
 
-def get_attr(item, attr):
+# How _KeyGetter retrieves a key from items of a type.
+_MAPPING = "mapping"
+_ITEM = "item"
+_ATTR = "attr"
+
+
+class _KeyGetter:
+    def __init__(self, key):
+        """Retrieves a single key from an item, see _single_get.
+
+        How an item type is accessed is looked up once per type. Mappings, like
+        records, are checked for the key before it is retrieved, so attrs that
+        are methods or properties never raise and catch a KeyError. Other
+        types without __getitem__ go straight to the attribute.
+        """
+        self.key = key
+        self._item_types = {}
+
+    def __call__(self, item):
+        item_type = type(item)
+        try:
+            access = self._item_types[item_type]
+        except KeyError:
+            access = self._item_types[item_type] = self._access(item_type)
+
+        if access is _MAPPING:
+            if self.key in item:
+                val = item[self.key]
+            else:
+                val = getattr(item, self.key)
+        elif access is _ITEM:
+            try:
+                val = item[self.key]
+            except (KeyError, TypeError):
+                val = getattr(item, self.key)
+        else:
+            val = getattr(item, self.key)
+
+        if callable(val):
+            try:
+                return val()
+            except TypeError:
+                return val
+        return val
+
+    @staticmethod
+    def _access(item_type):
+        if issubclass(item_type, collections.abc.Mapping):
+            return _MAPPING
+        if hasattr(item_type, "__getitem__"):
+            return _ITEM
+        return _ATTR
+
+
+def compile_attr(attr):
+    """Compiles an attr path into a callable that retrieves it from an item.
+
+    The dotted path is split once, every part gets its own getter that caches
+    the lookup strategy per item type. The result behaves like get_attr.
+    """
     if isinstance(attr, columns.ConstantAttr):
-        return attr.attr
+        return lambda item: attr.attr
 
-    if "." in attr:
-        return _recursive_getattr(item, attr)
-    else:
-        return _single_get(item, attr)
+    if "." not in attr:
+        return _KeyGetter(attr)
+
+    getters = tuple(_KeyGetter(key) for key in attr.split("."))
+
+    def getter(item):
+        for get in getters:
+            if item is None:
+                return None
+            item = get(item)
+        return item
+
+    return getter
+
+
+class _Url:
+    def __init__(self, template, quote=True):
+        """A compiled url template, see compile_url."""
+        self.quote = quote
+        self._formatter = string.Formatter()
+        self._parts = []
+        for literal, field, spec, conversion in self._formatter.parse(template):
+            if literal:
+                self._parts.append(literal)
+            if field is None:
+                continue
+            if not field:
+                raise ValueError(
+                    f"Positional placeholders are not supported in url {template!r}"
+                )
+            self._parts.append((field, compile_attr(field), conversion, spec))
+
+    def __call__(self, item):
+        result = []
+        for part in self._parts:
+            if isinstance(part, str):
+                result.append(part)
+                continue
+            _field, getter, conversion, spec = part
+            result.append(self._format(getter(item), conversion, spec))
+        return "".join(result)
+
+    def column(self, data):
+        """Returns the urls for all rows of ColumnarData or ItemColumns.
+
+        Every placeholder is retrieved a whole column at a time, like the
+        values of a column, instead of row by row.
+        """
+        parts = []
+        for part in self._parts:
+            if isinstance(part, str):
+                parts.append([part] * len(data))
+                continue
+            field, getter, conversion, spec = part
+            parts.append(
+                [
+                    self._format(value, conversion, spec)
+                    for value in data.column(field, getter)
+                ]
+            )
+        if not parts:
+            return [""] * len(data)
+        return ["".join(row) for row in zip(*parts)]
+
+    def _format(self, value, conversion, spec):
+        value = self._formatter.format_field(
+            self._formatter.convert_field(value, conversion), spec
+        )
+        return urllib.parse.quote(value, safe="/") if self.quote else value
+
+
+def compile_url(template, quote=True):
+    """Compiles a url template like "/client/{client.ID}" into a callable.
+
+    The template is parsed once into its literal parts and placeholders, every
+    placeholder gets a compiled accessor (see compile_attr). Conversions and
+    format specs are supported like in str.format. When quote is enabled the
+    substituted values are percent encoded, the literal parts are used as is.
+    The callable also has a column method that builds the urls of a whole
+    ColumnarData at once.
+    """
+    return _Url(template, quote=quote)
+
+
+@functools.lru_cache(maxsize=1024)
+def _compiled_attr(attr):
+    return compile_attr(attr)
+
+
+def get_attr(item, attr):
+    return _compiled_attr(attr)(item)
@@ -1,12 +1,119 @@
+import html
 import os
+import threading
 from typing import Iterable
 
 import urllib.parse
+from uweb3.libs.safestring import HTMLsafestring
 from uweb3.templateparser import Parser
 
+TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), "templates")
+
+
+class TemplateCache:
+    def __init__(self, path, reload=False):
+        """Process wide wrapper around a single uweb3 template parser.
+
+        Templates are read and parsed once, the first time they are used, after
+        which every render reuses the parsed template. Loading is guarded by a
+        lock so concurrent requests never parse the same file twice.
+
+        Args:
+            path (str): The directory that holds the templates.
+            reload (bool, optional): When enabled the modification time of a
+                template is checked before every render and the template is
+                parsed again when the file changed on disk. Intended for
+                development mode. Defaults to False.
+        """
+        self.path = path
+        self.reload = reload
+        self._parser = Parser(path=path)
+        self._mtimes = {}
+        self._lock = threading.Lock()
+
+    def Parse(self, template, **replacements):
+        if template not in self._mtimes or self.reload:
+            self._load(template)
+        return self._parser.Parse(template, **replacements)
+
+    def _load(self, template):
+        mtime = os.path.getmtime(os.path.join(self.path, template))
+        if self._mtimes.get(template) == mtime:
+            return
+        with self._lock:
+            if self._mtimes.get(template) != mtime:
+                self._parser.AddTemplate(template)
+                self._mtimes[template] = mtime
+
+
+_template_cache = TemplateCache(TEMPLATE_DIR)
+
 
 def get_parser():
-    return Parser(path=os.path.join(os.path.dirname(__file__), "templates"))
+    return _template_cache
+
+
+def set_template_reloading(enabled):
+    """Enables or disables re-parsing templates that changed on disk.
+
+    This is meant for development mode, in production the templates are parsed
+    exactly once per process.
+    """
+    _template_cache.reload = enabled
+
+
+def render_value(value):
+    """Returns the markup element.html produces for an element value.
+
+    Falsy values are omitted, safe strings are used as is and everything else
+    is converted to a string and HTML escaped.
+    """
+    if not value:
+        return ""
+    if isinstance(value, HTMLsafestring):
+        return value
+    return html.escape(str(value))
+
+
+def compile_row_renderer(columns):
+    """Compiles a function that renders the <tr> markup for a single item.
+
+    The returned function produces exactly the same markup as rendering an
+    Element("tr") with a child per column, without building the Element tree.
+    """
+    cells = tuple(col.cell_renderer() for col in columns)
+    if not cells:
+        return lambda item: "<tr></tr>"
+
+    def render_row(item):
+        return "".join(
+            ("<tr>\n  ", "\n  ".join([cell(item) for cell in cells]), "\n</tr>")
+        )
+
+    return render_row
+
+
+def render_columnar_rows(columns, data):
+    """Renders the <tr> markup for every row of ColumnarData.
+
+    Every column renders its cells in one go, the cells are zipped into rows
+    afterwards. The markup is identical to that of compile_row_renderer.
+    """
+    if not len(data):
+        return []
+    if not columns:
+        return ["<tr></tr>"] * len(data)
+    cells = [col.cells_renderer()(data) for col in columns]
+    return [
+        "".join(("<tr>\n  ", "\n  ".join(row), "\n</tr>")) for row in zip(*cells)
+    ]
+
+
+def render_body(rows):
+    """Wraps a list of rendered <tr> rows in a <tbody> element."""
+    if not rows:
+        return HTMLsafestring("<tbody></tbody>")
+    return HTMLsafestring("".join(("<tbody>\n  ", "\n  ".join(rows), "\n</tbody>")))
 
 
 def build_url(table, keys):
@@ -110,9 +217,16 @@ class TablePagination:
         else:
             self.total_pages = 0
         self.sliding_range = self._sliding_range()
+        self.keyset = getattr(table, "keyset", None)
+        self.has_next = getattr(table, "has_next", None)
 
     @property
     def render(self):
+        if self.keyset:
+            return get_parser().Parse("keyset_pagination.html", element=self)
+        if self.has_next is not None:
+            # Count free pagination, only knows whether there is a next page.
+            return get_parser().Parse("next_pagination.html", element=self)
         return get_parser().Parse("pagination.html", element=self)
 
     def _sliding_range(self):
@@ -152,16 +266,22 @@ class TableBody:
 
     @property
     def render(self):
-        return Element(
-            "tbody",
-            children=[
-                Element(
-                    "tr",
-                    children=[col.render(item) for col in self.table._get_columns()],
-                )
-                for item in self.table.items
-            ],
-        ).render
+        return render_body(self.table._render_rows(self.table.items))
+
+    def stream(self, chunk_size=100):
+        """Yields the <tbody> markup in chunks of at most chunk_size rows.
+
+        Rows are rendered as the table items are iterated, so a generator of
+        records is consumed lazily. The joined chunks are identical to render.
+        """
+        prefix = "<tbody>\n  "
+        for chunk in self.table._item_chunks(chunk_size):
+            yield HTMLsafestring(prefix + "\n  ".join(self.table._render_rows(chunk)))
+            prefix = "\n  "
+        if prefix == "\n  ":
+            yield HTMLsafestring("\n</tbody>")
+        else:
+            yield HTMLsafestring("<tbody></tbody>")
 
 
 class Table:
@@ -176,3 +296,21 @@ class Table:
     @property
     def render(self):
         return Element("table", children=self.initialized_children).render
+
+    def stream(self, chunk_size=100):
+        if not self.initialized_children:
+            yield HTMLsafestring("<table></table>")
+            return
+        yield HTMLsafestring("<table>")
+        for child in self.initialized_children:
+            yield HTMLsafestring("\n  ")
+            yield from stream_component(child, chunk_size)
+        yield HTMLsafestring("\n</table>")
+
+
+def stream_component(component, chunk_size=100):
+    """Yields the markup of a component, in chunks when it supports streaming."""
+    if hasattr(component, "stream"):
+        yield from component.stream(chunk_size)
+    else:
+        yield component.render
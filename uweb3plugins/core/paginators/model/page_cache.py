@@ -0,0 +1,114 @@
+import collections
+import threading
+import time
+
+from uweb3plugins.core.models import invalidation
+
+
+class PageCache:
+    def __init__(self, ttl=30, maxsize=256, depends=()):
+        """Caches the pages of SearchableTableMixin.IntergratedTable.
+
+        A page is stored with its total and keyed on the model class,
+        conditions, search term, sort and page. Pages are dropped after ttl
+        seconds, or as soon as a record is saved or deleted in the table of the
+        model, one of its searched foreign tables or one of the depends tables.
+        Writes are only seen within the current process, the ttl bounds how
+        long other processes can serve an outdated page.
+
+        The cache is meant to be shared between requests, so create it once:
+
+            INVOICE_PAGES = PageCache(ttl=60, depends=("client",))
+
+            results, total, page = Invoice.IntergratedTable(
+                connection, request_data, 25, cache=INVOICE_PAGES
+            )
+
+        Args:
+            ttl (int | float, optional): Seconds a page is reused. Defaults to 30.
+            maxsize (int, optional): Maximum number of cached pages, the least
+                recently used page is dropped first. Defaults to 256.
+            depends (tuple, optional): Other tables whose writes invalidate the
+                pages, for example the tables of foreign records shown in the
+                table columns.
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.depends = tuple(depends)
+        self._pages = collections.OrderedDict()
+        self._tables = collections.defaultdict(set)
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._stats = collections.Counter()
+        invalidation.add_weak_listener(self.invalidate)
+
+    @property
+    def stats(self):
+        """Returns the hits, misses, invalidations and the number of pages."""
+        with self._lock:
+            return {
+                "hits": self._stats["hits"],
+                "misses": self._stats["misses"],
+                "invalidations": self._stats["invalidations"],
+                "size": len(self._pages),
+            }
+
+    @property
+    def writes(self):
+        """The number of writes seen so far, taken before a page is queried."""
+        return self._writes
+
+    def lookup(self, key):
+        """Returns the cached rows and total for the key, or None."""
+        with self._lock:
+            try:
+                rows, total, expires, _tables = self._pages[key]
+            except KeyError:
+                self._stats["misses"] += 1
+                return None
+            if expires < time.monotonic():
+                self._remove(key)
+                self._stats["misses"] += 1
+                return None
+            self._pages.move_to_end(key)
+            self._stats["hits"] += 1
+            return rows, total
+
+    def store(self, key, rows, total, tables, writes):
+        """Stores a page, unless a write happened since writes was taken."""
+        tables = frozenset(tables).union(self.depends)
+        with self._lock:
+            if writes != self._writes:
+                return
+            self._remove(key)
+            self._pages[key] = rows, total, time.monotonic() + self.ttl, tables
+            for table in tables:
+                self._tables[table].add(key)
+            while len(self._pages) > self.maxsize:
+                self._remove(next(iter(self._pages)))
+
+    def invalidate(self, table):
+        """Drops all pages that depend on the table."""
+        with self._lock:
+            self._writes += 1
+            keys = self._tables.pop(table, ())
+            for key in list(keys):
+                self._remove(key)
+            if keys:
+                self._stats["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+            self._tables.clear()
+
+    def _remove(self, key):
+        page = self._pages.pop(key, None)
+        if page is None:
+            return
+        for table in page[3]:
+            keys = self._tables.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tables[table]
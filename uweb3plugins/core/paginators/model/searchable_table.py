@@ -4,7 +4,9 @@ import uweb3
 
 from typing import Type
 from uweb3.libs.sqltalk.mysql.connection import Connection
+from uweb3plugins.core.models import counting, keyset, textsearch
 from uweb3plugins.core.paginators import table
+from uweb3plugins.core.paginators.model.page_cache import PageCache
 
 
 class SearchableTableMixin:
@@ -17,41 +19,263 @@ class SearchableTableMixin:
         conditions: Optional[list] = None,
         searchable: Optional[list | tuple] = None,
         default_sort: Optional[list[tuple[str, bool]] | None] = None,
+        count: bool | counting.ExactCount = True,
+        cache: Optional[PageCache] = None,
     ):
+        """Retrieves a page of records for the current request.
 
-        order = request_data.getfirst("sort_by", None)
-        direction = request_data.getfirst("sort_direction", "ASC")
-        order_asc = True if direction == "ASC" else False
+        Args:
+            count (bool | counting.ExactCount, optional): The count strategy
+                used for the total number of items, for example a
+                counting.CachedCount instance shared between requests.
+                Defaults to True, an exact count on every request. Use
+                NextPageTable to paginate without a total.
+            cache (PageCache, optional): Reuses the records and total of pages
+                that were queried before, until they expire or a record of the
+                model or its searched tables is written. Defaults to None.
+
+        Returns:
+            tuple: The records, the total number of items and the page.
+        """
+        if not count:
+            raise ValueError(
+                "IntergratedTable always counts the total, use NextPageTable to "
+                "paginate without it."
+            )
+        page = table.get_current_page(request_data)
+
+        data = {
+            "offset": max(0, page_size * (page - 1)),
+            "limit": page_size,
+            "conditions": cls._TableConditions(
+                connection, request_data, conditions, searchable
+            ),
+            "order": cls._TableOrder(request_data, default_sort),
+            "yield_unlimited_total_first": count,
+        }
+
+        def query():
+            results = cls._TableResults(connection, data)
+            try:
+                total_items = int(results.pop(0))
+            except (IndexError, ValueError):
+                total_items = 0
+            return results, total_items
+
+        key = (
+            cls,
+            "total",
+            repr(data["conditions"]),
+            repr(data["order"]),
+            data["offset"],
+            data["limit"],
+        )
+        results, total_items = cls._TableCachedPage(
+            connection, cache, key, searchable, query
+        )
+        return results, total_items, page
+
+    @classmethod
+    def NextPageTable(
+        cls: Type[uweb3.model.BaseRecord],  # type: ignore
+        connection: Connection,
+        request_data: uweb3.request.IndexedFieldStorage,
+        page_size: int,
+        conditions: Optional[list] = None,
+        searchable: Optional[list | tuple] = None,
+        default_sort: Optional[list[tuple[str, bool]] | None] = None,
+        cache: Optional[PageCache] = None,
+    ):
+        """Like IntergratedTable, but finds out whether there is a next page
+        instead of counting the total number of items.
+
+        page_size + 1 records are fetched, the extra record only tells that a
+        next page exists. Use this for tables where counting is too expensive
+        and the last page number does not need to be shown:
+
+            results, has_next, page = Invoice.NextPageTable(
+                connection, request_data, 25
+            )
+            table = InvoiceTable(results, page=page, has_next=has_next)
+
+        Returns:
+            tuple: The records, whether there is a next page and the page.
+        """
         page = table.get_current_page(request_data)
+
+        data = {
+            "offset": max(0, page_size * (page - 1)),
+            "limit": page_size + 1,
+            "conditions": cls._TableConditions(
+                connection, request_data, conditions, searchable
+            ),
+            "order": cls._TableOrder(request_data, default_sort),
+        }
+
+        def query():
+            results = cls._TableResults(connection, data)
+            return results[:page_size], len(results) > page_size
+
+        key = (
+            cls,
+            "has_next",
+            repr(data["conditions"]),
+            repr(data["order"]),
+            data["offset"],
+            data["limit"],
+        )
+        results, has_next = cls._TableCachedPage(
+            connection, cache, key, searchable, query
+        )
+        return results, has_next, page
+
+    @classmethod
+    def KeysetTable(
+        cls: Type[uweb3.model.BaseRecord],  # type: ignore
+        connection: Connection,
+        request_data: uweb3.request.IndexedFieldStorage,
+        page_size: int,
+        conditions: Optional[list] = None,
+        searchable: Optional[list | tuple] = None,
+        default_sort: Optional[list[tuple[str, bool]] | None] = None,
+    ):
+        """Like IntergratedTable, but paginates with keyset (seek) tokens.
+
+        Instead of a page number the request carries an `after` or `before`
+        token that holds the sort values of the last or first record of the
+        previous page. The primary key is added to the order to make it unique.
+        No total is counted, every page costs the same regardless of depth.
+
+        Only fields of the model's own table can be sorted on. A requested sort
+        on a joined field is ignored in favour of default_sort, a joined field
+        in default_sort raises a ValueError.
+
+        Returns:
+            tuple: The records for the page and a keyset.KeysetPage that can be
+                passed to BasicTable(keyset=...) to render the navigation.
+        """
+        order = keyset.normalize_order(cls._TableOrder(request_data, default_sort))
+        if keyset.foreign_fields(order, cls.TableName()):
+            order = keyset.normalize_order(default_sort)
+            joined = keyset.foreign_fields(order, cls.TableName())
+            if joined:
+                raise ValueError(
+                    "Keyset pagination can't sort on the joined fields %s" % joined
+                )
+        primary = "%s.%s" % (cls.TableName(), cls._PRIMARY_KEY)
+        if not any(field in (primary, cls._PRIMARY_KEY) for field, _desc in order):
+            order.append((primary, order[-1][1] if order else False))
+
+        after = request_data.getfirst("after", None)
+        before = request_data.getfirst("before", None)
+        after_values = keyset.decode_token(after)
+        before_values = keyset.decode_token(before)
+        backwards = after_values is None and before_values is not None
+
+        data = {
+            "limit": page_size + 1,
+            "conditions": cls._TableConditions(
+                connection, request_data, conditions, searchable
+            ),
+            "order": keyset.reverse_order(order) if backwards else order,
+            "seek": before_values if backwards else after_values,
+        }
+        if len(data["seek"] or ()) != len(order):
+            # Tokens from a different sort order can't be used.
+            data["seek"] = None
+            backwards = False
+            data["order"] = order
+
+        results = cls._TableResults(connection, data)
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if backwards:
+            results.reverse()
+
+        page = keyset.KeysetPage(after=after, before=before)
+        if results:
+            first = keyset.encode_token(keyset.record_values(results[0], order))
+            last = keyset.encode_token(keyset.record_values(results[-1], order))
+            if backwards:
+                page.next_token = last
+                page.previous_token = first if has_more else None
+            else:
+                page.next_token = last if has_more else None
+                page.previous_token = first if data["seek"] is not None else None
+        return results, page
+
+    @classmethod
+    def _TableCachedPage(cls, connection, cache, key, searchable, query):
+        """Returns the records and total of a page, from the cache if possible.
+
+        query is called on a miss and returns the records and the total, which
+        is stored along with the raw rows of the records.
+        """
+        if cache is None:
+            return query()
+        cached = cache.lookup(key)
+        if cached is not None:
+            rows, total = cached
+            return [cls(connection, dict(row)) for row in rows], total
+        writes = cache.writes
+        results, total = query()
+        cache.store(
+            key,
+            # The raw rows, the records are bound to this request's connection.
+            [dict.copy(record) for record in results],
+            total,
+            cls._TableCacheTables(searchable),
+            writes,
+        )
+        return results, total
+
+    @classmethod
+    def _TableCacheTables(cls, searchable):
+        """Returns the tables whose writes invalidate a cached page."""
+        tables = {cls.TableName()}
+        for name in searchable or ():
+            table, _sep, _column = name.rpartition(".")
+            if table:
+                tables.add(table.strip("`"))
+        if getattr(cls, "SEARCHABLE_COLUMNS", None) and hasattr(
+            cls, "_SearchForeignTable"
+        ):
+            tables.update(textsearch.get_plan(cls, cls._SearchForeignTable).tables)
+        return tables
+
+    @classmethod
+    def _TableConditions(cls, connection, request_data, conditions, searchable):
         query = request_data.getfirst("query", None)
 
-        if not conditions:
-            conditions = []
+        # Never extend the list of the caller.
+        conditions = list(conditions) if conditions else []
 
         if query and searchable:
             conditions.append(
-                " OR ".join(
-                    [
-                        f"{connection.EscapeField(name)} LIKE {connection.EscapeValues(f'%{query}%')}"
-                        for name in searchable
-                    ]
+                textsearch.like_condition(
+                    connection,
+                    [connection.EscapeField(name) for name in searchable],
+                    query,
                 )
             )
+        return conditions
 
-        data = {
-            "offset": max(0, page_size * (page - 1)),
-            "limit": page_size,
-            "conditions": conditions,
-            "yield_unlimited_total_first": True,
-        }
+    @classmethod
+    def _TableOrder(cls, request_data, default_sort):
+        order = request_data.getfirst("sort_by", None)
+        direction = request_data.getfirst("sort_direction", "ASC")
+        order_asc = True if direction == "ASC" else False
 
         if order:
-            data["order"] = [(order, order_asc)]
-        if not order and default_sort:
-            data["order"] = default_sort
+            return [(order, order_asc)]
+        if default_sort:
+            return default_sort
+        return None
 
+    @classmethod
+    def _TableResults(cls, connection, data):
         try:
-            results: list[uweb3.model.BaseRecord] = list(
+            return list(
                 cls.List(
                     connection,
                     **{key: value for key, value in data.items() if value is not None},
@@ -61,11 +285,4 @@ class SearchableTableMixin:
             if exc.args[0] == 1054:
                 # Unknown column, this should probably be logged.
                 pass
-            results = []
-
-        try:
-            total_items = int(results.pop(0))
-        except (IndexError, ValueError):
-            total_items = 0
-
-        return results, total_items, page
+            return []
@@ -0,0 +1,96 @@
+import uweb3
+
+
+def relation_paths(columns):
+    """Returns the relations that are traversed by the dotted column attrs.
+
+    For a column with attr "client.company.name" this returns the paths
+    "client" and "client.company", ordered so parents come before children.
+    """
+    paths = set()
+    for col in columns:
+        for attr in col.attr_paths():
+            keys = attr.split(".")
+            for depth in range(1, len(keys)):
+                paths.add(".".join(keys[:depth]))
+    return sorted(paths, key=lambda path: (path.count("."), path))
+
+
+def prefetch_relations(items, paths):
+    """Loads the foreign records for the given relation paths in bulk.
+
+    Instead of lazy loading the foreign record for every row, the keys of all
+    items are collected and the foreign records are loaded with one IN (...)
+    query per relation. The loaded records are stored in the items, exactly
+    like a lazy load would. Items that are not uweb3 records, and relations
+    that can't be resolved, are left alone and will be lazy loaded as before.
+
+    Arguments:
+      @ items: list
+        The items that are about to be rendered.
+      @ paths: iterable of str
+        Relation paths as returned by relation_paths.
+    """
+    loaded = {"": items}
+    for path in paths:
+        parent, _sep, field = path.rpartition(".")
+        records = loaded.get(parent, ())
+        loaded[path] = _prefetch_field(records, field)
+
+
+def _foreign_class(cls, field):
+    """Returns the record class and key a foreign field refers to, or None."""
+    relations = getattr(cls, "_FOREIGN_RELATIONS", {})
+    if field in relations:
+        relation = relations[field]
+        if isinstance(relation, dict):
+            if relation.get("loader", "FromPrimary") != "FromPrimary":
+                return None
+            target = relation.get("class")
+            key = relation.get("LookupKey")
+        else:
+            target = relation
+            key = None
+    else:
+        target = getattr(cls, "_SUBTYPES", {}).get(field)
+        key = None
+    if not isinstance(target, type) or not issubclass(target, uweb3.model.BaseRecord):
+        return None
+    if not key:
+        key = (
+            target.RecordKey()
+            if getattr(target, "RecordKey", None)
+            else target._PRIMARY_KEY
+        )
+    return target, key
+
+
+def _prefetch_field(records, field):
+    """Loads the foreign records of a single field, returns all of them."""
+    pending = {}
+    foreign_records = []
+    for record in records:
+        if not isinstance(record, uweb3.model.BaseRecord):
+            continue
+        value = dict.get(record, field)
+        if value is None:
+            continue
+        if isinstance(value, uweb3.model.BaseRecord):
+            foreign_records.append(value)
+            continue
+        target = _foreign_class(type(record), field)
+        if target is None:
+            continue
+        pending.setdefault(target, {}).setdefault(value, []).append(record)
+
+    for (target, key), waiting in pending.items():
+        connection = waiting[next(iter(waiting))][0].connection
+        condition = "%s IN (%s)" % (
+            connection.EscapeField("%s.%s" % (target.TableName(), key)),
+            ", ".join(connection.EscapeValues(value) for value in waiting),
+        )
+        for foreign in target.List(connection, conditions=condition):
+            for record in waiting.pop(dict.get(foreign, key), ()):
+                dict.__setitem__(record, field, foreign)
+            foreign_records.append(foreign)
+    return foreign_records
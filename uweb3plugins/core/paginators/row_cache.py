@@ -0,0 +1,110 @@
+import collections
+import sys
+import threading
+
+import uweb3
+
+
+def version_key(item):
+    """Returns the record key and version of a versioned record, or None.
+
+    Items without a version can't be told apart from their changed selves, so
+    they are not cached unless the RowCache is given a key function.
+    """
+    if isinstance(item, uweb3.model.VersionedRecord):
+        return type(item), item[item.RecordKey()], item.key
+    return None
+
+
+class RowCache:
+    def __init__(self, maxsize=10000, maxbytes=16 * 1024 * 1024, key=version_key):
+        """LRU cache for the rendered <tr> markup of table rows.
+
+        Rows are cached per table class, set of enabled columns and item key.
+        By default only versioned records are cached, keyed on their record
+        key and version, so a saved record gets a new cache entry. Note that
+        this does not cover foreign records shown through dotted attrs, pass a
+        key function that includes their versions when those can change.
+
+        The cache is meant to be shared between requests, so define it once:
+
+            class InvoiceTable(BasicTable):
+                row_cache = RowCache(
+                    key=lambda item: (item["ID"], item["dateModified"])
+                )
+
+        Args:
+            maxsize (int, optional): Maximum number of cached rows. Defaults to
+                10000.
+            maxbytes (int, optional): Maximum memory used by the cached markup,
+                in bytes. Defaults to 16 MiB.
+            key (Callable, optional): Returns the cache key of an item, or None
+                when the item should not be cached. Defaults to version_key.
+        """
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.key = key
+        self._rows = collections.OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = collections.Counter()
+
+    @property
+    def stats(self):
+        """Returns the hits, misses, number of rows and bytes used."""
+        with self._lock:
+            return {
+                "hits": self._stats["hits"],
+                "misses": self._stats["misses"],
+                "size": len(self._rows),
+                "bytes": self._bytes,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._rows.clear()
+            self._bytes = 0
+
+    def render_rows(self, items, render, prefix):
+        """Returns the rows for the items, rendering only those not cached.
+
+        Args:
+            items (Iterable): The items to return the rows for.
+            render (Callable): Called with the indices of the items that are not
+                cached, returns their rendered rows in the same order.
+            prefix (tuple): Identifies the table and columns the rows are for.
+        """
+        keys = [self.key(item) for item in items]
+        keys = [key if key is None else (prefix, key) for key in keys]
+        rows = [None] * len(keys)
+        missing = []
+        with self._lock:
+            for index, key in enumerate(keys):
+                row = self._rows.get(key) if key is not None else None
+                if row is None:
+                    missing.append(index)
+                    continue
+                self._rows.move_to_end(key)
+                rows[index] = row
+            self._stats["hits"] += len(keys) - len(missing)
+            self._stats["misses"] += len(missing)
+        if missing:
+            for index, row in zip(missing, render(missing)):
+                rows[index] = row
+                if keys[index] is not None:
+                    self._store(keys[index], row)
+        return rows
+
+    def _store(self, key, row):
+        size = sys.getsizeof(row)
+        if size > self.maxbytes:
+            return
+        with self._lock:
+            previous = self._rows.pop(key, None)
+            if previous is not None:
+                self._bytes -= sys.getsizeof(previous)
+            self._rows[key] = row
+            self._bytes += size
+            while len(self._rows) > self.maxsize or self._bytes > self.maxbytes:
+                _key, evicted = self._rows.popitem(last=False)
+                self._bytes -= sys.getsizeof(evicted)
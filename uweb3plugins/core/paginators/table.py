@@ -1,9 +1,15 @@
 from __future__ import annotations
 
+import csv
+import io
+import itertools
+import json
 import math
 from abc import abstractmethod
 
 from uweb3.libs.safestring import HTMLsafestring
+from uweb3plugins.core.models.keyset import KeysetPage
+from uweb3plugins.core.paginators.columnar import ColumnarData, ItemColumns
 from uweb3plugins.core.paginators.columns import Col
 from uweb3plugins.core.paginators.html_elements import (
     SearchField,
@@ -11,7 +17,12 @@ from uweb3plugins.core.paginators.html_elements import (
     TableBody,
     TableHeader,
     TablePagination,
+    compile_row_renderer,
+    render_columnar_rows,
+    stream_component,
 )
+from uweb3plugins.core.paginators.prefetch import prefetch_relations, relation_paths
+from uweb3plugins.core.paginators.row_cache import RowCache
 
 
 def get_current_page(get_request_data):
@@ -31,10 +42,14 @@ class MetaTable(type):
         cls._columns = {
             name: obj for name, obj in attrs.items() if isinstance(obj, Col)
         }
+        cls._row_renderers = {}
         return cls
 
 
 class BasicTable(metaclass=MetaTable):
+    # Optional RowCache for the rendered rows, shared by all instances.
+    row_cache: None | RowCache = None
+
     def __init__(
         self,
         items,
@@ -45,6 +60,10 @@ class BasicTable(metaclass=MetaTable):
         total_pages=None,
         renderer: None | "RenderCustomTable" = None,
         query: None | str = None,
+        keyset: None | KeysetPage = None,
+        prefetch: bool = False,
+        row_cache: None | RowCache = None,
+        has_next: None | bool = None,
     ):
         self.items = items
         self.sort_by = sort_by
@@ -52,6 +71,12 @@ class BasicTable(metaclass=MetaTable):
         self.page = page
         self.total_pages = total_pages
         self.query = query
+        self.keyset = keyset
+        self.prefetch = prefetch
+        # Set instead of total_pages to paginate without counting the total.
+        self.has_next = has_next
+        if row_cache is not None:
+            self.row_cache = row_cache
 
         if not renderer:
             self.renderer = RenderSimpleTable()
@@ -67,10 +92,105 @@ class BasicTable(metaclass=MetaTable):
     def _get_columns(self):
         yield from [col for col in self._columns.values() if col.enabled]
 
+    def _prepare_items(self, items):
+        """Prepares a list of items right before their rows are rendered.
+
+        When prefetch is enabled the foreign records used by dotted column
+        attrs are loaded with one query per relation, instead of one lazy load
+        per row.
+        """
+        if not self.prefetch:
+            return items
+        items = list(items)
+        prefetch_relations(items, relation_paths(self._get_columns()))
+        return items
+
+    def _get_row_renderer(self):
+        """Returns the compiled row renderer for the currently enabled columns.
+
+        Renderers are compiled once per table class and column set.
+        """
+        columns = tuple(self._get_columns())
+        try:
+            return self._row_renderers[columns]
+        except KeyError:
+            if len(self._row_renderers) >= 32:
+                # Columns are created on the fly, don't grow without bounds.
+                self._row_renderers.clear()
+            renderer = self._row_renderers[columns] = compile_row_renderer(columns)
+            return renderer
+
+    def _render_rows(self, items):
+        """Renders the <tr> markup for a list of items, or for ColumnarData.
+
+        Columnar data, and items of tables with a batch formatter, are rendered
+        a column at a time. With a row_cache only the rows that are not cached
+        are rendered.
+        """
+        columns = tuple(self._get_columns())
+        if not isinstance(items, ColumnarData):
+            items = list(self._prepare_items(items))
+            if any(col.batch for col in columns):
+                items = ItemColumns(items)
+
+        if isinstance(items, (ColumnarData, ItemColumns)):
+            if self.row_cache is None:
+                return render_columnar_rows(columns, items)
+
+            def render(indices):
+                return render_columnar_rows(columns, items.take(indices))
+
+        else:
+            render_row = self._get_row_renderer()
+            if self.row_cache is None:
+                return [render_row(item) for item in items]
+
+            def render(indices):
+                return [render_row(items[index]) for index in indices]
+
+        names = tuple(self._get_column_names())
+        return self.row_cache.render_rows(items, render, (type(self), names))
+
+    def _get_column_names(self):
+        """Yields the attribute names of the enabled columns, in column order."""
+        yield from [name for name, col in self._columns.items() if col.enabled]
+
+    def _export_rows(self, chunk_size):
+        """Yields lists of rows with the formatted column values per row.
+
+        The items are read chunk_size at a time, every column retrieves and
+        formats the values of a chunk in one go.
+        """
+        columns = tuple(self._get_columns())
+        for chunk in self._item_chunks(chunk_size):
+            if not isinstance(chunk, ColumnarData):
+                chunk = ItemColumns(list(self._prepare_items(chunk)))
+            yield list(zip(*[col.values(chunk) for col in columns]))
+
+    def _item_chunks(self, chunk_size):
+        """Yields the items in chunks of at most chunk_size items."""
+        if isinstance(self.items, ColumnarData):
+            for start in range(0, len(self.items), chunk_size):
+                yield self.items.slice(start, start + chunk_size)
+            return
+        items = iter(self.items)
+        while chunk := list(itertools.islice(items, chunk_size)):
+            yield chunk
+
     @property
     def render(self):
         return self.renderer.render(self)
 
+    def stream(self, chunk_size=100):
+        """Yields the rendered table in chunks instead of one string.
+
+        The header is yielded first, followed by the body rows in chunks of
+        chunk_size as they are read from items, and finally the pagination.
+        This keeps memory use flat for very large tables when the result is
+        passed on to the client as a streaming response.
+        """
+        return self.renderer.stream(self, chunk_size)
+
 
 class TableComponents:
     def __init__(self):
@@ -84,6 +204,10 @@ class TableComponents:
             component(table=table).render for component in self._components
         )
 
+    def stream(self, table: BasicTable, chunk_size=100):
+        for component in self._components:
+            yield from stream_component(component(table=table), chunk_size)
+
 
 class RenderCustomTable:
     @abstractmethod
@@ -93,6 +217,9 @@ class RenderCustomTable:
     def render(self, table: BasicTable):
         return self._renderer.render(table)
 
+    def stream(self, table: BasicTable, chunk_size=100):
+        return self._renderer.stream(table, chunk_size)
+
 
 class RenderCompleteTable(RenderCustomTable):
     def __init__(self):
@@ -120,3 +247,82 @@ class RenderSimpleTable(RenderCustomTable):
                 ]
             )
         )
+
+
+class RenderCsvTable(RenderCustomTable):
+    def __init__(self, header=True, dialect="excel"):
+        """Renders the table items as CSV instead of HTML.
+
+        The values are retrieved and formatted by the table columns, exactly
+        like they are for the HTML table, but without the markup of custom
+        cell renderers. Use stream() with a generator of records, for example
+        Model.List(connection, stream=True), to export any number of rows with
+        constant memory:
+
+            table = InvoiceTable(
+                Invoice.List(connection, stream=True), renderer=RenderCsvTable()
+            )
+            for chunk in table.stream(chunk_size=1000):
+                output.write(chunk)
+
+        A streaming List keeps its query open on the connection until the last
+        record is read, so nothing else may query that connection meanwhile.
+        The columns of a streamed table can therefore not use dotted attrs that
+        load foreign records, and the table can not use prefetch=True, both
+        fail with a "commands out of sync" error. Join the foreign values into
+        the query, or list the foreign records up front on another connection
+        and resolve them in a value_formatter.
+
+        Args:
+            header (bool, optional): Starts with a row of column names.
+                Defaults to True.
+            dialect (str | csv.Dialect, optional): The csv dialect. Defaults to
+                "excel".
+        """
+        self.header = header
+        self.dialect = dialect
+
+    def render(self, table: BasicTable):
+        return "".join(self.stream(table))
+
+    def stream(self, table: BasicTable, chunk_size=1000):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, dialect=self.dialect)
+        if self.header:
+            writer.writerow([col.name for col in table._get_columns()])
+        for rows in table._export_rows(chunk_size):
+            writer.writerows(
+                ["" if value is None else value for value in row] for row in rows
+            )
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+
+
+class RenderJsonLinesTable(RenderCustomTable):
+    def __init__(self, default=str):
+        """Renders the table items as JSON Lines, one JSON object per row.
+
+        The objects are keyed on the attribute names of the table columns,
+        the values are formatted by the columns like for the HTML table. Like
+        RenderCsvTable, stream() exports any number of rows with constant
+        memory, with the same restrictions on the columns of streamed records.
+
+        Args:
+            default (Callable, optional): Converts values that are not JSON
+                serializable, like dates and decimals. Defaults to str.
+        """
+        self.default = default
+
+    def render(self, table: BasicTable):
+        return "".join(self.stream(table))
+
+    def stream(self, table: BasicTable, chunk_size=1000):
+        names = tuple(table._get_column_names())
+        for rows in table._export_rows(chunk_size):
+            yield "".join(
+                json.dumps(dict(zip(names, row)), default=self.default) + "\n"
+                for row in rows
+            )